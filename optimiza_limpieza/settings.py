@@ -41,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'solver_app.middleware.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -164,8 +165,11 @@ if 'DATABASE_URL' in os.environ:
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = []
 
-# Whitenoise para servir archivos estáticos
-MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+# Whitenoise para servir archivos estáticos (justo después de SecurityMiddleware)
+MIDDLEWARE.insert(
+    MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+)
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Seguridad para producción (solo si DEBUG=False)
@@ -175,4 +179,82 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = True
     SECURE_BROWSER_XSS_FILTER = True
     SECURE_CONTENT_TYPE_NOSNIFF = True
-    X_FRAME_OPTIONS = 'DENY'
\ No newline at end of file
+    X_FRAME_OPTIONS = 'DENY'
+
+# =============================================================================
+# CONFIGURACIÓN DEL SOLVER
+# =============================================================================
+
+# Hilos del pool local que ejecuta los trabajos de optimización (por proceso)
+SOLVER_WORKERS = int(os.environ.get('SOLVER_WORKERS', '1'))
+
+# Dónde se ejecutan los trabajos: 'local' (pool de hilos de cada proceso web)
+# o 'worker' (proceso dedicado `manage.py solver_worker`, que mantiene
+# OR-Tools cargado; los procesos web no lo importan). El worker busca
+# trabajos pendientes cada SOLVER_WORKER_INTERVALO segundos
+SOLVER_EJECUTOR = os.environ.get('SOLVER_EJECUTOR', 'local')
+SOLVER_WORKER_INTERVALO = float(os.environ.get('SOLVER_WORKER_INTERVALO', '0.25'))
+
+# Segundos sin latido tras los que un trabajo activo se da por abandonado
+# (proceso web reiniciado, worker caído o envío al pool perdido) y se marca
+# como fallido
+SOLVER_LATIDO_VENCIDO_S = int(os.environ.get('SOLVER_LATIDO_VENCIDO_S', '60'))
+
+# Motor de resolución: 'auto' (flujo si el modelo lo permite), 'flujo', 'mip',
+# 'sectores' (un MIP por sector en paralelo) o 'heuristica' (plan rápido)
+SOLVER_MOTOR = os.environ.get('SOLVER_MOTOR', 'auto')
+
+# Backend del MIP: 'SCIP', 'CBC' o 'CP-SAT', y workers de búsqueda en
+# paralelo (CP-SAT usa por defecto todos los núcleos)
+SOLVER_BACKEND = os.environ.get('SOLVER_BACKEND', 'SCIP')
+SOLVER_HILOS = int(os.environ.get('SOLVER_HILOS', '0')) or None
+
+# Procesos del pool que resuelve los subproblemas del motor 'sectores'
+# (por defecto todos los núcleos)
+SOLVER_PROCESOS = int(os.environ.get('SOLVER_PROCESOS', '0')) or None
+
+# Caché de soluciones: máximo de entradas y de bytes antes del desalojo LRU
+SOLVER_CACHE_MAX_ENTRADAS = int(os.environ.get('SOLVER_CACHE_MAX_ENTRADAS', '50'))
+SOLVER_CACHE_MAX_BYTES = int(os.environ.get('SOLVER_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+
+# Retención de versiones del plan de asignaciones: versiones inactivas que se
+# conservan y antigüedad máxima en días (0 = sin límite)
+SOLVER_PLANES_RETENIDOS = int(os.environ.get('SOLVER_PLANES_RETENIDOS', '10'))
+SOLVER_PLANES_DIAS = int(os.environ.get('SOLVER_PLANES_DIAS', '0')) or None
+
+# =============================================================================
+# CACHÉ DEL DASHBOARD
+# =============================================================================
+
+# Estadísticas y fragmentos de las vistas, con las versiones de los datos en
+# la clave (ver solver_app.versiones). Por defecto en memoria del proceso;
+# con DASHBOARD_CACHE_DIR se usa una caché en archivos compartida entre
+# procesos
+DASHBOARD_CACHE_DIR = os.environ.get('DASHBOARD_CACHE_DIR')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': DASHBOARD_CACHE_DIR,
+    } if DASHBOARD_CACHE_DIR else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dashboard',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+
+# Expiración de las entradas (segundos) y cada cuánto se releen las versiones
+# de la base de datos (acota la demora en ver un cambio hecho en otro proceso)
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', '3600'))
+DASHBOARD_VERSION_TTL = int(os.environ.get('DASHBOARD_VERSION_TTL', '5'))
+
+# =============================================================================
+# MÉTRICAS
+# =============================================================================
+
+# /metrics expone métricas en formato Prometheus (solver_app.metricas). Si se
+# define METRICAS_TOKEN, el scrape debe enviar "Authorization: Bearer <token>";
+# sin token el endpoint responde 404 salvo con DEBUG=True
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN', '')
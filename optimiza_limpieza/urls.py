@@ -28,9 +28,19 @@ urlpatterns = [
     
     # Optimización
     path('ejecutar-solver/', views.ejecutar_solver, name='ejecutar_solver'),
+    path('plan-rapido/', views.plan_rapido, name='plan_rapido'),
     path('resultados/', views.resultados_optimizacion, name='resultados_optimizacion'),
     path('limpiar-asignaciones/', views.limpiar_asignaciones, name='limpiar_asignaciones'),
+    path('exportar/asignaciones.<str:formato>', views.exportar_asignaciones, name='exportar_asignaciones'),
     
     # API endpoints
     path('api/stats/', views.api_stats, name='api_stats'),
+    path('api/asignaciones/', views.api_asignaciones, name='api_asignaciones'),
+    path('api/jobs/<int:job_id>/', views.api_job_estado, name='api_job_estado'),
+    path('api/jobs/<int:job_id>/eventos/', views.api_job_eventos, name='api_job_eventos'),
+    path('api/jobs/<int:job_id>/detener/', views.api_job_detener, name='api_job_detener'),
+    path('api/solver-runs/', views.api_solver_runs, name='api_solver_runs'),
+    
+    # Monitoreo
+    path('metrics', views.metricas_prometheus, name='metricas'),
 ]
@@ -1,5 +1,12 @@
-from django.contrib import admin
-from .models import Ruta, Camion, AsignacionOptima
+from django.contrib import admin, messages
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast
+from .models import (
+    Ruta, Camion, AsignacionOptima, PlanAsignacion, SolverJob, SolucionCache, ResolucionEnCurso, SolverRun, MarcaIngesta,
+    OperacionHistorica, ResumenPlacaTurnoDia, ResumenPlacaSemana, ResumenTurnoDiaSemana
+)
+from .jobs import encolar_optimizacion, trabajo_activo
+from . import cache_soluciones, instrumentacion, versiones
 
 
 @admin.register(Ruta)
@@ -24,21 +31,80 @@ class RutaAdmin(admin.ModelAdmin):
 class CamionAdmin(admin.ModelAdmin):
     """
     Configuración del admin para el modelo Camion
+
+    El uso en el plan activo se anota en get_queryset (una consulta para
+    toda la página, y ordenable) en lugar de consultarse por fila.
     """
-    list_display = ['placa', 'capacidad_kg', 'veces_usado', 'carga_total_asignada']
+    list_display = ['placa', 'capacidad_kg', 'disponible', 'veces_usado', 'carga_total_asignada']
+    list_filter = ['disponible']
     search_fields = ['placa']
     ordering = ['-capacidad_kg']
+    actions = ['reoptimizar_camiones', 'marcar_no_disponibles', 'marcar_disponibles']
+    
+    def get_queryset(self, request):
+        del_plan_activo = Q(asignacionoptima__plan__activo=True)
+        return super().get_queryset(request).annotate(
+            num_asignaciones=Count('asignacionoptima', filter=del_plan_activo),
+            carga_asignada=Sum('asignacionoptima__carga_kg', filter=del_plan_activo),
+        )
     
     def veces_usado(self, obj):
-        """Cuenta cuántas veces se ha asignado este camión"""
-        return obj.asignacionoptima_set.count()
+        """Cuántas veces asigna este camión el plan activo"""
+        return obj.num_asignaciones
     veces_usado.short_description = 'Veces Usado'
+    veces_usado.admin_order_field = 'num_asignaciones'
     
     def carga_total_asignada(self, obj):
-        """Suma la carga total asignada a este camión"""
-        total = sum(a.carga_kg for a in obj.asignacionoptima_set.all())
-        return f"{total:.2f} kg"
+        """Carga total asignada a este camión en el plan activo"""
+        return f"{obj.carga_asignada or 0:.2f} kg"
     carga_total_asignada.short_description = 'Carga Total'
+    carga_total_asignada.admin_order_field = 'carga_asignada'
+    
+    def _reoptimizar(self, request, placas):
+        """
+        Encola una re-optimización incremental que reasigna las rutas de
+        `placas` y deja fijo el resto del plan.
+        """
+        if trabajo_activo() is not None:
+            self.message_user(
+                request,
+                'Hay una optimización en curso; re-optimiza cuando termine.',
+                messages.WARNING,
+            )
+            return
+        job = encolar_optimizacion(incremental=True, liberar_camiones=sorted(placas))
+        self.message_user(
+            request,
+            f"Re-optimización incremental encolada (trabajo #{job.pk}) para {len(placas)} camiones.",
+            messages.SUCCESS,
+        )
+    
+    def reoptimizar_camiones(self, request, queryset):
+        placas = list(queryset.values_list('placa', flat=True))
+        if not PlanAsignacion.objects.filter(activo=True).exists():
+            self.message_user(request, 'No hay un plan activo que re-optimizar.', messages.ERROR)
+            return
+        self._reoptimizar(request, placas)
+    reoptimizar_camiones.short_description = 'Re-optimizar las rutas de los camiones seleccionados'
+    
+    def marcar_no_disponibles(self, request, queryset):
+        placas = list(queryset.filter(disponible=True).values_list('placa', flat=True))
+        if not placas:
+            return
+        # update() no emite señales: la versión de los datos se incrementa aquí
+        Camion.objects.filter(placa__in=placas).update(disponible=False)
+        versiones.incrementar(versiones.DATOS)
+        self.message_user(request, f"{len(placas)} camiones marcados como no disponibles.")
+        if AsignacionOptima.objects.filter(camion_asignado__in=placas).exists():
+            self._reoptimizar(request, placas)
+    marcar_no_disponibles.short_description = 'Marcar como no disponibles (y reasignar sus rutas)'
+    
+    def marcar_disponibles(self, request, queryset):
+        actualizados = queryset.filter(disponible=False).update(disponible=True)
+        if actualizados:
+            versiones.incrementar(versiones.DATOS)
+        self.message_user(request, f"{actualizados} camiones marcados como disponibles.")
+    marcar_disponibles.short_description = 'Marcar como disponibles'
 
 
 @admin.register(AsignacionOptima)
@@ -55,12 +121,200 @@ class AsignacionOptimaAdmin(admin.ModelAdmin):
         'carga_kg',
         'utilizacion_capacidad'
     ]
-    list_filter = ['turno', 'camion_asignado']
+    # Solo los camiones del plan activo (una consulta), no toda la flota
+    list_filter = ['turno', ('camion_asignado', admin.RelatedOnlyFieldListFilter)]
+    list_select_related = ['camion_asignado', 'ruta_asignada']
+    # Sin COUNT(*) adicional de toda la tabla en cada página
+    show_full_result_count = False
     search_fields = ['camion_asignado__placa', 'ruta_asignada__id_zona_barrido']
     ordering = ['turno', 'camion_asignado__placa']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            utilizacion=Cast(F('carga_kg'), FloatField()) * 100
+            / Cast(F('camion_asignado__capacidad_kg'), FloatField())
+        )
+    
     def utilizacion_capacidad(self, obj):
-        """Calcula el porcentaje de utilización de la capacidad del camión"""
-        porcentaje = (obj.carga_kg / obj.camion_asignado.capacidad_kg) * 100
-        return f"{porcentaje:.1f}%"
+        """Porcentaje de utilización de la capacidad del camión"""
+        if obj.utilizacion is None:
+            return "N/A"
+        return f"{obj.utilizacion:.1f}%"
     utilizacion_capacidad.short_description = 'Utilización'
+    utilizacion_capacidad.admin_order_field = 'utilizacion'
+
+
+@admin.register(PlanAsignacion)
+class PlanAsignacionAdmin(admin.ModelAdmin):
+    """
+    Configuración del admin para las versiones del plan de asignaciones
+    (las asignaciones listadas en AsignacionOptima son las del plan activo)
+    """
+    list_display = [
+        'id', 'creado_en', 'activo', 'origen', 'motor', 'distancia_total',
+        'num_asignaciones', 'ejecucion'
+    ]
+    list_filter = ['activo', 'origen', 'motor']
+    readonly_fields = [f.name for f in PlanAsignacion._meta.fields]
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(SolverJob)
+class SolverJobAdmin(admin.ModelAdmin):
+    """
+    Configuración del admin para los trabajos de optimización en segundo plano
+    """
+    list_display = ['id', 'estado', 'progreso', 'mensaje', 'creado_en', 'finalizado_en']
+    list_filter = ['estado']
+    readonly_fields = ['creado_en', 'iniciado_en', 'finalizado_en', 'latido_en']
+
+
+@admin.register(SolucionCache)
+class SolucionCacheAdmin(admin.ModelAdmin):
+    """
+    Configuración del admin para la caché de soluciones
+    """
+    list_display = [
+        'huella_corta', 'aciertos', 'resoluciones', 'tasa', 'tamano_kb',
+        'creado_en', 'ultimo_acceso'
+    ]
+    readonly_fields = [
+        'huella', 'parametros', 'aciertos', 'resoluciones', 'tamano_bytes',
+        'creado_en', 'ultimo_acceso'
+    ]
+    exclude = ['resultado']
+    ordering = ['-ultimo_acceso']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def changelist_view(self, request, extra_context=None):
+        """Agrega los totales y la tasa de aciertos global al listado"""
+        extra_context = extra_context or {}
+        extra_context['stats_cache'] = cache_soluciones.estadisticas()
+        return super().changelist_view(request, extra_context=extra_context)
+    
+    def huella_corta(self, obj):
+        return obj.huella[:12]
+    huella_corta.short_description = 'Huella'
+    
+    def tasa(self, obj):
+        """Porcentaje de solicitudes servidas desde la caché"""
+        return f"{obj.tasa_aciertos:.1f}%"
+    tasa.short_description = 'Tasa de Aciertos'
+    
+    def tamano_kb(self, obj):
+        return f"{obj.tamano_bytes / 1024:.1f} KB"
+    tamano_kb.short_description = 'Tamaño'
+
+
+@admin.register(ResolucionEnCurso)
+class ResolucionEnCursoAdmin(admin.ModelAdmin):
+    """
+    Configuración del admin para las resoluciones en curso (borrar una
+    fila libera su huella si el proceso dueño quedó colgado)
+    """
+    list_display = ['huella_corta', 'iniciado_en', 'expira_en']
+    readonly_fields = ['huella', 'propietario', 'iniciado_en', 'expira_en']
+    ordering = ['-iniciado_en']
+
+    def has_add_permission(self, request):
+        return False
+
+    def huella_corta(self, obj):
+        return obj.huella[:12]
+    huella_corta.short_description = 'Huella'
+
+
+@admin.register(SolverRun)
+class SolverRunAdmin(admin.ModelAdmin):
+    """
+    Configuración del admin para el historial de ejecuciones del solver
+    """
+    list_display = [
+        'id', 'creado_en', 'motor', 'backend', 'estado', 'num_rutas',
+        'variables', 'restricciones', 'tiempo_modelo', 'tiempo_resolucion',
+        'tiempo_guardado', 'tiempo_total', 'memoria_pico_mb'
+    ]
+    list_filter = ['motor', 'backend', 'estado']
+    date_hierarchy = 'creado_en'
+    readonly_fields = [f.name for f in SolverRun._meta.fields]
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def changelist_view(self, request, extra_context=None):
+        """Agrega los promedios diarios por fase al listado"""
+        extra_context = extra_context or {}
+        extra_context['tendencias'] = instrumentacion.tendencias()
+        extra_context['fases'] = SolverRun.FASES
+        return super().changelist_view(request, extra_context=extra_context)
+
+
+@admin.register(MarcaIngesta)
+class MarcaIngestaAdmin(admin.ModelAdmin):
+    """
+    Configuración del admin para las marcas de agua de load_data
+    """
+    list_display = [
+        'fuente', 'filas', 'ultimo_nro_registro', 'ultima_fecha_corte',
+        'tamano_bytes', 'actualizado_en'
+    ]
+    readonly_fields = [f.name for f in MarcaIngesta._meta.fields]
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(OperacionHistorica)
+class OperacionHistoricaAdmin(admin.ModelAdmin):
+    """
+    Configuración del admin para el histórico de viajes del dataton
+    """
+    list_display = ['nro_registro', 'dia_recorrido', 'turno', 'placa', 'cantidad_t', 'nro_boleta']
+    list_filter = ['turno']
+    search_fields = ['placa', 'nro_boleta']
+    date_hierarchy = 'dia_recorrido'
+    readonly_fields = [f.name for f in OperacionHistorica._meta.fields]
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False
+
+
+class ResumenAdmin(admin.ModelAdmin):
+    """
+    Configuración común de los resúmenes del histórico (se mantienen desde
+    load_data; solo lectura)
+    """
+    show_full_result_count = False
+    
+    def get_readonly_fields(self, request, obj=None):
+        return [f.name for f in self.model._meta.fields]
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ResumenPlacaTurnoDia)
+class ResumenPlacaTurnoDiaAdmin(ResumenAdmin):
+    list_display = ['dia', 'turno', 'placa', 'viajes', 'toneladas', 'max_toneladas']
+    list_filter = ['turno']
+    search_fields = ['placa']
+    date_hierarchy = 'dia'
+
+
+@admin.register(ResumenPlacaSemana)
+class ResumenPlacaSemanaAdmin(ResumenAdmin):
+    list_display = ['semana', 'placa', 'viajes', 'toneladas', 'max_toneladas']
+    search_fields = ['placa']
+    date_hierarchy = 'semana'
+
+
+@admin.register(ResumenTurnoDiaSemana)
+class ResumenTurnoDiaSemanaAdmin(ResumenAdmin):
+    list_display = ['turno', 'dia_semana', 'dias', 'viajes', 'toneladas', 'max_toneladas']
+    list_filter = ['turno']
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SolverAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'solver_app'
+
+    def ready(self):
+        from solver_app import signals  # noqa: F401  (registra los receptores)
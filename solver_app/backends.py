@@ -0,0 +1,333 @@
+"""
+Backends intercambiables para resolver el MIP.
+
+Todos reciben el mismo MPModelProto emitido por ConstructorModelo y devuelven
+un ResultadoSolver uniforme (estado, objetivo, cota, gap, tiempo y valores de
+las variables), de modo que SolverRutasLimpieza no depende del solver
+concreto:
+
+    - 'SCIP' y 'CBC': MPSolver de OR-Tools (pywraplp)
+    - 'CP-SAT': solver CP-SAT de OR-Tools con varios workers de búsqueda en
+      paralelo (portfolio), que aprovecha los núcleos que SCIP deja ociosos
+
+El backend se elige por ejecución (parámetro `backend`) o con
+settings.SOLVER_BACKEND.
+
+Resolución "anytime": todos aceptan un límite de tiempo, un gap relativo
+objetivo, un valor de objetivo "suficientemente bueno" y una función
+debe_detenerse() que se consulta periódicamente para aceptar la mejor
+solución encontrada y cortar la búsqueda. CP-SAT informa cada nueva solución
+incumbente a al_mejorar() durante la búsqueda; SCIP y CBC no exponen
+callbacks en Python y solo informan la solución final.
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+from ortools.linear_solver import pywraplp, linear_solver_pb2
+from ortools.sat.python import cp_model
+
+
+class ResultadoSolver:
+    """
+    Resultado uniforme de un backend.
+
+    Atributos:
+        estado: 'Optimal', 'Feasible', 'Infeasible', 'Unbounded',
+            'Abnormal', 'Not Solved' o 'Unknown'
+        objetivo: valor objetivo de la mejor solución (None si no hay)
+        cota: mejor cota inferior conocida
+        gap: gap relativo entre objetivo y cota (0 si es óptimo)
+        tiempo: tiempo de pared en segundos
+        valores: arreglo con el valor de cada variable del proto
+    """
+
+    def __init__(self, backend, estado, objetivo=None, cota=None, tiempo=0.0, valores=None):
+        self.backend = backend
+        self.estado = estado
+        self.objetivo = objetivo
+        self.cota = cota
+        self.tiempo = tiempo
+        self.valores = valores
+
+    @property
+    def tiene_solucion(self):
+        return self.estado in ('Optimal', 'Feasible')
+
+    @property
+    def gap(self):
+        if self.estado == 'Optimal':
+            return 0.0
+        return calcular_gap(self.objetivo, self.cota)
+
+    def como_incumbente(self):
+        """La solución final en el formato de al_mejorar()"""
+        return {'objetivo': self.objetivo, 'cota': self.cota, 'gap': self.gap, 'tiempo': self.tiempo}
+
+    def como_dict(self):
+        return {
+            'backend': self.backend,
+            'estado': self.estado,
+            'objetivo': self.objetivo,
+            'cota': self.cota,
+            'gap': self.gap,
+            'tiempo': self.tiempo,
+        }
+
+
+def calcular_gap(objetivo, cota):
+    """Gap relativo |objetivo - cota| / |objetivo| (None si no hay cota finita)"""
+    if objetivo is None or cota is None or not math.isfinite(cota):
+        return None
+    return abs(objetivo - cota) / max(abs(objetivo), 1e-9)
+
+
+def incumbente(objetivo, cota, inicio):
+    """Descripción de una solución incumbente para al_mejorar()"""
+    return {
+        'objetivo': objetivo,
+        'cota': cota if cota is not None and math.isfinite(cota) else None,
+        'gap': calcular_gap(objetivo, cota),
+        'tiempo': time.perf_counter() - inicio,
+    }
+
+
+@contextmanager
+def vigilar_detencion(debe_detenerse, interrumpir, intervalo=0.2):
+    """
+    Mientras dura el bloque, un hilo consulta debe_detenerse() y llama a
+    interrumpir() cuando devuelve True.
+    """
+    if debe_detenerse is None:
+        yield
+        return
+
+    fin = threading.Event()
+
+    def vigilar():
+        while not fin.wait(intervalo):
+            if debe_detenerse():
+                # Se repite por si la búsqueda aún no había comenzado
+                interrumpir()
+
+    hilo = threading.Thread(target=vigilar, name='solver-vigilante', daemon=True)
+    hilo.start()
+    try:
+        yield
+    finally:
+        fin.set()
+        hilo.join()
+
+
+def hilos_por_defecto():
+    """Workers de búsqueda configurados (por defecto, todos los núcleos)"""
+    return getattr(settings, 'SOLVER_HILOS', None) or os.cpu_count() or 1
+
+
+class BackendPywraplp:
+    """MPSolver de OR-Tools (SCIP, CBC)"""
+
+    ESTADOS = {
+        pywraplp.Solver.OPTIMAL: 'Optimal',
+        pywraplp.Solver.FEASIBLE: 'Feasible',
+        pywraplp.Solver.INFEASIBLE: 'Infeasible',
+        pywraplp.Solver.UNBOUNDED: 'Unbounded',
+        pywraplp.Solver.ABNORMAL: 'Abnormal',
+        pywraplp.Solver.NOT_SOLVED: 'Not Solved',
+    }
+
+    def __init__(self, nombre, hilos=1):
+        self.nombre = nombre
+        self.hilos = hilos
+
+    # Parámetro de SCIP que corta la búsqueda al alcanzar un objetivo (su
+    # nombre cambió en SCIP 10)
+    PARAMETROS_OBJETIVO_SCIP = ('limits/primal', 'limits/objectivestop')
+
+    def resolver(self, proto, limite_tiempo_s, gap_relativo=None, objetivo_aceptable=None,
+                 al_mejorar=None, debe_detenerse=None):
+        solver = pywraplp.Solver.CreateSolver(self.nombre)
+        if not solver:
+            raise Exception(f"No se pudo crear el solver {self.nombre} de OR-Tools")
+
+        # LoadModelFromProto también carga la solución inicial (solution_hint)
+        error = solver.LoadModelFromProto(proto)
+        if error:
+            raise Exception(f"No se pudo cargar el modelo en el solver: {error}")
+        solver.SetTimeLimit(int(limite_tiempo_s * 1000))  # en milisegundos
+        if self.hilos > 1:
+            solver.SetNumThreads(self.hilos)
+
+        parametros = pywraplp.MPSolverParameters()
+        if gap_relativo is not None:
+            parametros.SetDoubleParam(parametros.RELATIVE_MIP_GAP, gap_relativo)
+        if objetivo_aceptable is not None and self.nombre == 'SCIP':
+            for nombre in self.PARAMETROS_OBJETIVO_SCIP:
+                if solver.SetSolverSpecificParametersAsString(f"{nombre} = {objetivo_aceptable}"):
+                    break
+
+        inicio = time.perf_counter()
+        with vigilar_detencion(debe_detenerse, solver.InterruptSolve):
+            status = solver.Solve(parametros)
+        tiempo = time.perf_counter() - inicio
+
+        estado = self.ESTADOS.get(status, 'Unknown')
+        resultado = ResultadoSolver(self.nombre, estado, tiempo=tiempo)
+        if resultado.tiene_solucion:
+            respuesta = linear_solver_pb2.MPSolutionResponse()
+            solver.FillSolutionResponseProto(respuesta)
+            resultado.valores = np.array(respuesta.variable_value)
+            resultado.objetivo = solver.Objective().Value()
+            resultado.cota = solver.Objective().BestBound()
+            if al_mejorar is not None:
+                al_mejorar(incumbente(resultado.objetivo, resultado.cota, inicio))
+        return resultado
+
+
+def _escala_entera(valores, max_decimales=6):
+    """Menor potencia de 10 que vuelve enteros todos los valores"""
+    valores = np.asarray(valores, dtype=np.float64)
+    valores = valores[np.isfinite(valores)]
+    for decimales in range(max_decimales + 1):
+        escalados = valores * 10 ** decimales
+        if np.all(np.abs(escalados - np.rint(escalados)) < 1e-6):
+            return 10 ** decimales
+    return 10 ** max_decimales
+
+
+class _CallbackIncumbentes(cp_model.CpSolverSolutionCallback):
+    """Informa cada solución de CP-SAT y corta la búsqueda si basta"""
+
+    def __init__(self, escala, offset, inicio, objetivo_aceptable, al_mejorar, debe_detenerse):
+        super().__init__()
+        self.escala = escala
+        self.offset = offset
+        self.inicio = inicio
+        self.objetivo_aceptable = objetivo_aceptable
+        self.al_mejorar = al_mejorar
+        self.debe_detenerse = debe_detenerse
+
+    def on_solution_callback(self):
+        objetivo = self.ObjectiveValue() / self.escala + self.offset
+        if self.al_mejorar is not None:
+            cota = self.BestObjectiveBound() / self.escala + self.offset
+            self.al_mejorar(incumbente(objetivo, cota, self.inicio))
+        if (self.objetivo_aceptable is not None and objetivo <= self.objetivo_aceptable + 1e-9) \
+                or (self.debe_detenerse is not None and self.debe_detenerse()):
+            self.StopSearch()
+
+
+class BackendCPSAT:
+    """
+    CP-SAT de OR-Tools con búsqueda paralela.
+
+    CP-SAT solo admite coeficientes enteros: cada restricción y el objetivo
+    se escalan por la menor potencia de 10 que los vuelve enteros (los datos
+    tienen dos decimales, así que la traducción es exacta).
+    """
+
+    ESTADOS = {
+        cp_model.OPTIMAL: 'Optimal',
+        cp_model.FEASIBLE: 'Feasible',
+        cp_model.INFEASIBLE: 'Infeasible',
+        cp_model.MODEL_INVALID: 'Abnormal',
+        cp_model.UNKNOWN: 'Not Solved',
+    }
+
+    nombre = 'CP-SAT'
+
+    def __init__(self, hilos=None):
+        self.hilos = hilos or hilos_por_defecto()
+
+    def traducir(self, proto):
+        """
+        Convierte un MPModelProto de variables binarias en un CpModel.
+
+        Returns:
+            tuple: (modelo, variables, escala_objetivo)
+        """
+        modelo = cp_model.CpModel()
+        variables = [modelo.NewBoolVar('') for _ in range(len(proto.variable))]
+
+        for restriccion in proto.constraint:
+            indices = list(restriccion.var_index)
+            coeficientes = np.array(restriccion.coefficient, dtype=np.float64)
+            escala = _escala_entera(np.concatenate((
+                coeficientes, [restriccion.lower_bound, restriccion.upper_bound]
+            )))
+            enteros = np.rint(coeficientes * escala).astype(np.int64)
+
+            # Cotas infinitas: el rango alcanzable con variables binarias
+            minimo = int(enteros[enteros < 0].sum())
+            maximo = int(enteros[enteros > 0].sum())
+            inferior = minimo if math.isinf(restriccion.lower_bound) else \
+                math.ceil(restriccion.lower_bound * escala - 1e-9)
+            superior = maximo if math.isinf(restriccion.upper_bound) else \
+                math.floor(restriccion.upper_bound * escala + 1e-9)
+
+            expresion = cp_model.LinearExpr.WeightedSum(
+                [variables[k] for k in indices], enteros.tolist()
+            )
+            modelo.AddLinearConstraint(expresion, inferior, superior)
+
+        coef_objetivo = np.array([v.objective_coefficient for v in proto.variable], dtype=np.float64)
+        escala_objetivo = _escala_entera(coef_objetivo)
+        enteros = np.rint(coef_objetivo * escala_objetivo).astype(np.int64)
+        expresion = cp_model.LinearExpr.WeightedSum(variables, enteros.tolist())
+        if proto.maximize:
+            modelo.Maximize(expresion)
+        else:
+            modelo.Minimize(expresion)
+
+        pista = proto.solution_hint
+        for k, valor in zip(pista.var_index, pista.var_value):
+            modelo.AddHint(variables[k], int(round(valor)))
+
+        return modelo, variables, escala_objetivo
+
+    def resolver(self, proto, limite_tiempo_s, gap_relativo=None, objetivo_aceptable=None,
+                 al_mejorar=None, debe_detenerse=None):
+        modelo, variables, escala = self.traducir(proto)
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = float(limite_tiempo_s)
+        solver.parameters.num_workers = self.hilos
+        if gap_relativo is not None:
+            solver.parameters.relative_gap_limit = gap_relativo
+
+        inicio = time.perf_counter()
+        callback = _CallbackIncumbentes(
+            escala, proto.objective_offset, inicio, objetivo_aceptable, al_mejorar, debe_detenerse,
+        )
+        with vigilar_detencion(debe_detenerse, solver.StopSearch):
+            status = solver.Solve(modelo, callback)
+        tiempo = time.perf_counter() - inicio
+
+        estado = self.ESTADOS.get(status, 'Unknown')
+        resultado = ResultadoSolver(self.nombre, estado, tiempo=tiempo)
+        if resultado.tiene_solucion:
+            resultado.valores = np.array(solver.ResponseProto().solution, dtype=np.float64)
+            resultado.objetivo = solver.ObjectiveValue() / escala + proto.objective_offset
+            resultado.cota = solver.BestObjectiveBound() / escala + proto.objective_offset
+        return resultado
+
+
+def obtener_backend(nombre=None, hilos=None):
+    """
+    Instancia el backend pedido (por defecto settings.SOLVER_BACKEND).
+
+    Args:
+        nombre: 'SCIP', 'CBC' o 'CP-SAT'
+        hilos: workers de búsqueda; por defecto settings.SOLVER_HILOS
+    """
+    nombre = (nombre or getattr(settings, 'SOLVER_BACKEND', 'SCIP')).upper()
+    if nombre == 'CP-SAT':
+        return BackendCPSAT(hilos)
+    if nombre in ('SCIP', 'CBC'):
+        return BackendPywraplp(nombre, hilos or 1)
+    raise ValueError(f"Backend desconocido: {nombre}")
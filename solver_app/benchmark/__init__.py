@@ -0,0 +1,8 @@
+"""
+Benchmark del solver con instancias sintéticas.
+
+    - generador: instancias reproducibles muestreadas de los datos reales
+    - ejecutor: ejecución de casos, informe JSON y comparación entre commits
+
+Uso: python manage.py benchmark_solver --zonas 46 500 2000 --salida benchmark.json
+"""
@@ -0,0 +1,186 @@
+"""
+Ejecución del benchmark del solver.
+
+Cada caso (tamaño de instancia × motor × backend × rutas por turno) se
+ejecuta en un proceso nuevo, para que la memoria pico medida (RSS máximo del
+proceso) corresponda solo a ese caso. Los resultados se escriben en JSON
+junto con metadatos del entorno (commit, versiones, núcleos) para comparar
+ejecuciones entre commits con comparar().
+"""
+
+import itertools
+import json
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.utils import timezone
+
+from solver_app.descomposicion import inicializar_worker
+from solver_app.instrumentacion import memoria_pico_mb
+
+# Campos que identifican un caso al comparar dos archivos de resultados
+CLAVE_CASO = ('zonas', 'camiones', 'motor', 'backend', 'rutas_por_turno', 'semilla')
+
+
+def ejecutar_caso(zonas, camiones, motor, backend, rutas_por_turno, semilla, limite_tiempo_s):
+    """
+    Genera una instancia y la resuelve (se ejecuta en un proceso aparte).
+
+    Returns:
+        dict: identificación del caso, estado, objetivo, gap, tiempos por
+            fase, tamaño del modelo y memoria pico
+    """
+    from solver_app.benchmark.generador import generar_instancia
+    from solver_app.solver_logic import SolverRutasLimpieza
+
+    caso = {
+        'zonas': zonas, 'camiones': camiones, 'motor': motor, 'backend': backend,
+        'rutas_por_turno': rutas_por_turno, 'semilla': semilla,
+    }
+    try:
+        inicio = time.perf_counter()
+        rutas, flota = generar_instancia(zonas, camiones, semilla=semilla)
+        caso['camiones'] = len(flota)
+        tiempo_generacion = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        solver = SolverRutasLimpieza(
+            rutas=rutas, camiones=flota, motor=motor, backend=backend,
+            rutas_por_turno=rutas_por_turno, limite_tiempo_s=limite_tiempo_s,
+        )
+        resultados = solver.resolver()
+        tiempo_total = time.perf_counter() - inicio
+    except Exception as e:
+        return {
+            **caso, 'estado': 'Error', 'error': str(e),
+            'memoria_pico_mb': memoria_pico_mb(incluir_hijos=True),
+        }
+
+    variables, restricciones = solver.dimensiones_modelo()
+    return {
+        **caso,
+        'motor_usado': resultados['motor'],
+        'estado': resultados['estado'],
+        'objetivo': resultados['distancia_total'],
+        'gap': resultados['solver']['gap'],
+        'variables': variables,
+        'restricciones': restricciones,
+        'tiempos': {
+            'generacion': tiempo_generacion,
+            **resultados['tiempos'],
+            'total': tiempo_total,
+        },
+        'memoria_pico_mb': memoria_pico_mb(incluir_hijos=True),
+    }
+
+
+def metadatos():
+    """Entorno de la ejecución, para interpretar comparaciones entre commits"""
+    from ortools import __version__ as version_ortools
+    from solver_app.solver_logic import VERSION_MOTOR
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'fecha': timezone.now().isoformat(),
+        'commit': commit,
+        'version_motor': VERSION_MOTOR,
+        'python': platform.python_version(),
+        'ortools': version_ortools,
+        'plataforma': platform.platform(),
+        'nucleos': os.cpu_count(),
+    }
+
+
+def ejecutar_benchmark(zonas, motores, backends, rutas_por_turno=(1,), camiones=None,
+                       semilla=0, limite_tiempo_s=300, progreso=None):
+    """
+    Ejecuta todas las combinaciones de casos.
+
+    Args:
+        zonas: tamaños de instancia (número de zonas)
+        motores: motores de SolverRutasLimpieza a medir
+        backends: backends del MIP; el motor 'flujo' se mide una sola vez
+        camiones: tamaño fijo de flota (por defecto, proporcional a las zonas)
+        progreso: callable opcional que recibe el dict de cada caso terminado
+
+    Returns:
+        dict: 'metadatos' y 'resultados' (un dict por caso)
+    """
+    casos = []
+    for num_zonas, motor, rpt in itertools.product(zonas, motores, rutas_por_turno):
+        for backend in (backends[:1] if motor == 'flujo' else backends):
+            casos.append((num_zonas, camiones, motor, backend, rpt, semilla, limite_tiempo_s))
+
+    resultados = []
+    for caso in casos:
+        # Un proceso por caso: aísla la memoria pico y el estado de OR-Tools
+        with ProcessPoolExecutor(max_workers=1, initializer=inicializar_worker) as pool:
+            resultado = pool.submit(ejecutar_caso, *caso).result()
+        resultados.append(resultado)
+        if progreso is not None:
+            progreso(resultado)
+
+    return {'metadatos': metadatos(), 'resultados': resultados}
+
+
+def guardar(informe, ruta):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(informe, archivo, indent=2, ensure_ascii=False)
+
+
+def cargar(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+def comparar(base, actual, tolerancia=0.2):
+    """
+    Compara dos informes caso a caso.
+
+    Args:
+        base, actual: informes de ejecutar_benchmark()
+        tolerancia: aumento relativo de tiempo total que se considera regresión
+
+    Returns:
+        list: un dict por caso común con 'caso', 'tiempo_base', 'tiempo_actual',
+            'razon', 'objetivo_base', 'objetivo_actual' y 'regresion'
+    """
+    def indexar(informe):
+        return {
+            tuple(r[k] for k in CLAVE_CASO): r
+            for r in informe['resultados'] if 'tiempos' in r
+        }
+
+    anteriores = indexar(base)
+    comparacion = []
+    for clave, r in indexar(actual).items():
+        anterior = anteriores.get(clave)
+        if anterior is None:
+            continue
+        tiempo_base = anterior['tiempos']['total']
+        tiempo_actual = r['tiempos']['total']
+        razon = tiempo_actual / tiempo_base if tiempo_base else None
+        comparacion.append({
+            'caso': dict(zip(CLAVE_CASO, clave)),
+            'tiempo_base': tiempo_base,
+            'tiempo_actual': tiempo_actual,
+            'razon': razon,
+            'objetivo_base': anterior['objetivo'],
+            'objetivo_actual': r['objetivo'],
+            'regresion': (
+                (razon is not None and razon > 1 + tolerancia)
+                or abs(r['objetivo'] - anterior['objetivo']) > 1e-6 * max(1.0, abs(anterior['objetivo']))
+            ),
+        })
+    return comparacion
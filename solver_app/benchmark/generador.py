@@ -0,0 +1,92 @@
+"""
+Generador de instancias sintéticas reproducibles.
+
+Las instancias se muestrean de las distribuciones reales de data/: pares
+(distancia_km, residuos_kg) de rutas.csv + demanda.csv, tamaño de los
+sectores y capacidades de camión derivadas de dataton_pueblo_libre.csv (la
+carga máxima registrada por placa, igual que load_data). Cada valor se
+remuestrea con un ruido multiplicativo para no repetir exactamente las 46
+zonas reales al escalar a miles.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from solver_app import dataset
+from solver_app.models import Ruta, Camion
+
+# Proporción camiones / zonas del dataset real (42 camiones para 46 zonas)
+CAMIONES_POR_ZONA = 42 / 46
+
+
+class DistribucionesReales:
+    """Muestras empíricas de los CSV de data/"""
+
+    def __init__(self, directorio=None):
+        directorio = directorio or settings.BASE_DIR / 'data'
+        df_zonas = pd.merge(
+            pd.read_csv(directorio / 'rutas.csv'),
+            pd.read_csv(directorio / 'demanda.csv'),
+            on='id_zona_barrido',
+        )
+        self.distancias = df_zonas['distancia_km'].to_numpy(dtype=np.float64)
+        self.residuos = df_zonas['residuos_kg'].to_numpy(dtype=np.float64)
+        self.zonas_por_sector = df_zonas.groupby('id_sector').size().to_numpy()
+
+        df_operaciones = dataset.leer_operaciones(
+            directorio / 'dataton_pueblo_libre.csv', ['PLACA', 'CANTIDAD']
+        )
+        self.capacidades = (
+            df_operaciones.groupby('PLACA', observed=True)['CANTIDAD'].max().to_numpy(dtype=np.float64)
+            * 1000
+        )
+
+
+def generar_instancia(num_zonas, num_camiones=None, semilla=0, ruido=0.15, distribuciones=None):
+    """
+    Genera rutas y camiones sintéticos (instancias de modelo sin guardar).
+
+    Args:
+        num_zonas: número de zonas de barrido
+        num_camiones: tamaño de la flota (por defecto, la proporción real)
+        semilla: semilla del generador; misma semilla, misma instancia
+        ruido: desviación del ruido multiplicativo log-normal
+        distribuciones: DistribucionesReales ya cargadas (para reutilizarlas)
+
+    Returns:
+        tuple: (lista de Ruta, lista de Camion)
+    """
+    distribuciones = distribuciones or DistribucionesReales()
+    rng = np.random.default_rng(semilla)
+    num_camiones = num_camiones or max(1, math.ceil(num_zonas * CAMIONES_POR_ZONA))
+
+    # Sectores: tamaños remuestreados hasta cubrir todas las zonas
+    tamanos = []
+    while sum(tamanos) < num_zonas:
+        tamanos.append(int(rng.choice(distribuciones.zonas_por_sector)))
+    sectores = np.repeat(np.arange(1, len(tamanos) + 1), tamanos)[:num_zonas]
+
+    # Distancia y residuos se muestrean juntos para conservar su correlación
+    muestra = rng.integers(0, len(distribuciones.distancias), size=num_zonas)
+    distancias = distribuciones.distancias[muestra] * rng.lognormal(0, ruido, num_zonas)
+    residuos = distribuciones.residuos[muestra] * rng.lognormal(0, ruido, num_zonas)
+    rutas = [
+        Ruta(
+            id_zona_barrido=j + 1,
+            id_sector=int(sectores[j]),
+            distancia_km=round(float(distancias[j]), 2),
+            residuos_kg=round(float(residuos[j]), 2),
+        )
+        for j in range(num_zonas)
+    ]
+
+    capacidades = rng.choice(distribuciones.capacidades, size=num_camiones) * \
+        rng.lognormal(0, ruido, num_camiones)
+    camiones = [
+        Camion(placa=f"SIM{i + 1:05d}", capacidad_kg=round(float(capacidades[i]), 2))
+        for i in range(num_camiones)
+    ]
+    return rutas, camiones
@@ -0,0 +1,128 @@
+"""
+Caché de soluciones direccionada por contenido.
+
+La huella de una instancia es un SHA-256 sobre las filas de Ruta y Camion
+(en orden de clave primaria), los parámetros normalizados del solver y
+VERSION_MOTOR. Si nada cambió desde la última resolución, la solución se
+devuelve desde SolucionCache sin reconstruir ni resolver el modelo.
+
+La caché vive en la base de datos para compartirse entre workers y se acota
+con desalojo LRU por número de entradas y por tamaño total
+(SOLVER_CACHE_MAX_ENTRADAS y SOLVER_CACHE_MAX_BYTES).
+"""
+
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from solver_app.models import Ruta, Camion, SolucionCache
+
+logger = logging.getLogger(__name__)
+
+
+def calcular_huella(parametros, version_motor):
+    """
+    Huella estable de la instancia actual.
+
+    Args:
+        parametros: dict de parámetros normalizados del solver
+        version_motor: versión del motor; cambiarla invalida la caché
+
+    Returns:
+        str: digest hexadecimal SHA-256
+    """
+    h = hashlib.sha256()
+    h.update(f"motor:{version_motor}\n".encode())
+    h.update(f"parametros:{json.dumps(parametros, sort_keys=True)}\n".encode())
+
+    filas_rutas = Ruta.objects.order_by('pk').values_list(
+        'id_zona_barrido', 'id_sector', 'distancia_km', 'residuos_kg'
+    )
+    for fila in filas_rutas.iterator(chunk_size=2000):
+        h.update(("R|" + "|".join(map(str, fila)) + "\n").encode())
+
+    # Solo la flota disponible entra al solver
+    filas_camiones = Camion.objects.filter(disponible=True).order_by('pk').values_list('placa', 'capacidad_kg')
+    for fila in filas_camiones.iterator(chunk_size=2000):
+        h.update(("C|" + "|".join(map(str, fila)) + "\n").encode())
+
+    return h.hexdigest()
+
+
+def obtener(huella):
+    """
+    Busca una solución en caché y registra el acierto.
+
+    Returns:
+        dict | None: resultado serializado, o None si no hay entrada
+    """
+    entrada = SolucionCache.objects.filter(huella=huella).only('resultado').first()
+    if entrada is None:
+        return None
+    SolucionCache.objects.filter(huella=huella).update(
+        aciertos=F('aciertos') + 1, ultimo_acceso=timezone.now()
+    )
+    logger.info(f"Solución recuperada de la caché ({huella[:12]})")
+    return entrada.resultado
+
+
+def guardar(huella, parametros, resultado):
+    """Almacena (o refresca) la solución de una huella y aplica el desalojo"""
+    tamano = len(json.dumps(resultado).encode())
+    entrada, creada = SolucionCache.objects.get_or_create(
+        huella=huella,
+        defaults={'parametros': parametros, 'resultado': resultado, 'tamano_bytes': tamano},
+    )
+    if not creada:
+        # Resolución forzada sobre una huella existente
+        SolucionCache.objects.filter(huella=huella).update(
+            resultado=resultado,
+            tamano_bytes=tamano,
+            resoluciones=F('resoluciones') + 1,
+            ultimo_acceso=timezone.now(),
+        )
+    desalojar()
+
+
+def desalojar():
+    """Elimina las entradas menos usadas recientemente hasta respetar los límites"""
+    max_entradas = getattr(settings, 'SOLVER_CACHE_MAX_ENTRADAS', 50)
+    max_bytes = getattr(settings, 'SOLVER_CACHE_MAX_BYTES', 50 * 1024 * 1024)
+
+    entradas = list(
+        SolucionCache.objects.order_by('-ultimo_acceso').values_list('huella', 'tamano_bytes')
+    )
+    conservadas, acumulado = 0, 0
+    for huella, tamano in entradas:
+        if conservadas >= max_entradas or acumulado + tamano > max_bytes:
+            break
+        conservadas += 1
+        acumulado += tamano
+
+    desalojadas = [huella for huella, _ in entradas[conservadas:]]
+    if desalojadas:
+        SolucionCache.objects.filter(huella__in=desalojadas).delete()
+        logger.info(f"Desalojadas {len(desalojadas)} soluciones de la caché")
+
+
+def estadisticas():
+    """Totales de la caché para el admin"""
+    totales = SolucionCache.objects.aggregate(
+        aciertos=Sum('aciertos'),
+        resoluciones=Sum('resoluciones'),
+        tamano_bytes=Sum('tamano_bytes'),
+    )
+    aciertos = totales['aciertos'] or 0
+    resoluciones = totales['resoluciones'] or 0
+    total = aciertos + resoluciones
+    return {
+        'entradas': SolucionCache.objects.count(),
+        'aciertos': aciertos,
+        'resoluciones': resoluciones,
+        'tamano_bytes': totales['tamano_bytes'] or 0,
+        'tasa_aciertos': round(aciertos / total * 100, 2) if total else 0,
+    }
@@ -0,0 +1,350 @@
+"""
+Carga de los CSV de data/ por bloques.
+
+Los archivos se leen con pandas en bloques de `tamano_bloque` filas, de modo
+que la memoria pico no depende del tamaño del archivo:
+
+    - rutas.csv + demanda.csv: cada bloque de rutas se une con la demanda
+      (un dict por zona) y se inserta de inmediato.
+    - dataton_pueblo_libre.csv: se recorre con solver_app.dataset (que de
+      paso reconstruye su caché columnar) leyendo solo las columnas del
+      histórico; cada bloque se guarda en OperacionHistorica
+      (solver_app.historico) y la capacidad de cada camión (la carga máxima
+      registrada) se acumula en un dict por placa.
+
+Las filas se escriben con bulk_create(update_conflicts=True) en lotes de
+`tamano_lote`, cada uno en su propia transacción: las tablas nunca quedan
+vacías durante la carga. Al final se eliminan las rutas y camiones que ya no
+aparecen en los archivos (salvo con conservar_ausentes=True). El histórico
+del dataton, en cambio, se reemplaza completo en una sola transacción: una
+carga que falla deja el histórico y los resúmenes anteriores.
+
+ingerir_rutas() e ingerir_camiones() agregan una marca de agua por archivo (MarcaIngesta: checksum,
+tamaño y último NRO_REGISTRO / FECHA_CORTE):
+
+    - archivo sin cambios: se omite sin leerlo con pandas
+    - dataton con filas agregadas al final (los bytes ya ingeridos no
+      cambiaron): se leen solo las filas nuevas, se suman a los resúmenes
+      del histórico y se actualizan solo los camiones afectados
+    - cualquier otro cambio: carga completa del archivo
+"""
+
+import logging
+import time
+
+import pandas as pd
+from django.db import transaction
+
+from solver_app import dataset, historico, versiones
+from solver_app.dataset import checksum_archivo
+from solver_app.models import Ruta, Camion, MarcaIngesta
+
+logger = logging.getLogger(__name__)
+
+TAMANO_BLOQUE = 50_000
+TAMANO_LOTE = 2_000
+
+ARCHIVO_OPERACIONES = 'dataton_pueblo_libre.csv'
+COLUMNAS_OPERACIONES = historico.COLUMNAS
+
+
+def leer_por_bloques(ruta, columnas, tamano_bloque=TAMANO_BLOQUE):
+    """Itera el CSV en DataFrames de a lo sumo `tamano_bloque` filas"""
+    return pd.read_csv(ruta, usecols=columnas, chunksize=tamano_bloque)
+
+
+def upsert(modelo, objetos, campos, tamano_lote=TAMANO_LOTE):
+    """
+    Inserta o actualiza (por clave primaria) una lista de instancias, un lote
+    por transacción.
+
+    Args:
+        campos: campos que se actualizan cuando la fila ya existe
+
+    Returns:
+        int: filas escritas
+    """
+    clave = modelo._meta.pk.name
+    for inicio in range(0, len(objetos), tamano_lote):
+        with transaction.atomic():
+            modelo.objects.bulk_create(
+                objetos[inicio:inicio + tamano_lote],
+                update_conflicts=True,
+                unique_fields=[clave],
+                update_fields=campos,
+            )
+    return len(objetos)
+
+
+def eliminar_ausentes(modelo, claves, tamano_lote=TAMANO_LOTE):
+    """
+    Elimina las filas cuya clave primaria no está en `claves`.
+
+    Returns:
+        int: filas eliminadas
+    """
+    ausentes = list(set(modelo.objects.values_list('pk', flat=True)) - set(claves))
+    for inicio in range(0, len(ausentes), tamano_lote):
+        with transaction.atomic():
+            modelo.objects.filter(pk__in=ausentes[inicio:inicio + tamano_lote]).delete()
+    return len(ausentes)
+
+
+def _informe(filas, registros, eliminados, inicio):
+    tiempo = time.perf_counter() - inicio
+    return {
+        'filas': filas,
+        'registros': registros,
+        'eliminados': eliminados,
+        'tiempo': tiempo,
+        'filas_por_s': filas / tiempo if tiempo > 0 else 0.0,
+    }
+
+
+def _informe_sin_cambios():
+    return {'modo': 'sin_cambios', 'filas': 0, 'registros': 0, 'eliminados': 0,
+            'tiempo': 0.0, 'filas_por_s': 0.0}
+
+
+def cargar_rutas(directorio, tamano_bloque=TAMANO_BLOQUE, tamano_lote=TAMANO_LOTE,
+                 conservar_ausentes=False, progreso=None):
+    """
+    Carga rutas.csv unido con demanda.csv en la tabla Ruta.
+
+    Args:
+        directorio: carpeta con los CSV
+        progreso: callable opcional que recibe las filas leídas acumuladas
+
+    Returns:
+        dict: 'filas' (leídas), 'registros' (escritos), 'eliminados',
+            'tiempo', 'filas_por_s' y 'filas_demanda'
+    """
+    inicio = time.perf_counter()
+    demanda = {}
+    for bloque in leer_por_bloques(directorio / 'demanda.csv', ['id_zona_barrido', 'residuos_kg'], tamano_bloque):
+        demanda.update(zip(bloque['id_zona_barrido'].tolist(), bloque['residuos_kg'].tolist()))
+
+    filas = registros = 0
+    vistas = set()
+    columnas = ['id_zona_barrido', 'id_sector', 'distancia_km']
+    for bloque in leer_por_bloques(directorio / 'rutas.csv', columnas, tamano_bloque):
+        filas += len(bloque)
+        # Zonas sin demanda se descartan (igual que el merge interno)
+        bloque = bloque[bloque['id_zona_barrido'].isin(demanda.keys())]
+        bloque = bloque.drop_duplicates('id_zona_barrido', keep='last')
+        rutas = [
+            Ruta(
+                id_zona_barrido=zona,
+                id_sector=sector,
+                distancia_km=round(distancia, 2),
+                residuos_kg=round(demanda[zona], 2),
+            )
+            for zona, sector, distancia in bloque[columnas].itertuples(index=False)
+        ]
+        registros += upsert(Ruta, rutas, ['id_sector', 'distancia_km', 'residuos_kg'], tamano_lote)
+        vistas.update(bloque['id_zona_barrido'].tolist())
+        if progreso is not None:
+            progreso(filas)
+
+    eliminados = 0 if conservar_ausentes else eliminar_ausentes(Ruta, vistas, tamano_lote)
+    informe = _informe(filas, registros, eliminados, inicio)
+    informe['filas_demanda'] = len(demanda)
+    logger.info(f"Rutas cargadas: {registros} ({informe['filas_por_s']:.0f} filas/s)")
+    return informe
+
+
+def capacidades_por_placa(bloques, progreso=None):
+    """
+    Carga máxima registrada por placa, acumulada bloque a bloque.
+
+    Args:
+        bloques: DataFrames normalizados (solver_app.dataset) con PLACA,
+            CANTIDAD, NRO_REGISTRO y FECHA_CORTE
+
+    Returns:
+        tuple: (dict placa -> CANTIDAD máxima en toneladas, filas leídas,
+            último NRO_REGISTRO, última FECHA_CORTE)
+    """
+    maximos = {}
+    filas = 0
+    ultimo_registro = ultima_fecha = None
+    for bloque in bloques:
+        filas += len(bloque)
+        if len(bloque):
+            ultimo_registro = max(ultimo_registro or 0, int(bloque['NRO_REGISTRO'].max()))
+            fecha = int(bloque['FECHA_CORTE'].max().strftime('%Y%m%d'))
+            ultima_fecha = max(ultima_fecha or 0, fecha)
+        for placa, cantidad in bloque.groupby('PLACA', observed=True)['CANTIDAD'].max().items():
+            if cantidad > maximos.get(placa, float('-inf')):
+                maximos[placa] = cantidad
+        if progreso is not None:
+            progreso(filas)
+    return maximos, filas, ultimo_registro, ultima_fecha
+
+
+def cargar_camiones(directorio, tamano_bloque=TAMANO_BLOQUE, tamano_lote=TAMANO_LOTE,
+                    conservar_ausentes=False, progreso=None):
+    """
+    Carga la flota en la tabla Camion a partir de dataton_pueblo_libre.csv.
+
+    La capacidad de cada camión es la carga máxima registrada para su placa,
+    con CANTIDAD en toneladas. El histórico de operaciones y sus resúmenes
+    se reconstruyen en la misma pasada y la capacidad se toma de los
+    resúmenes (historico.capacidades_estimadas).
+
+    Returns:
+        dict: 'filas' (leídas), 'registros' (escritos), 'eliminados',
+            'tiempo', 'filas_por_s', 'ultimo_nro_registro' y
+            'ultima_fecha_corte'
+    """
+    inicio = time.perf_counter()
+    # El histórico se reemplaza en una sola transacción: si la carga falla
+    # queda el anterior, y los lectores no lo ven vacío mientras se carga
+    with transaction.atomic():
+        historico.vaciar()
+        bloques = dataset.iterar_operaciones(directorio / ARCHIVO_OPERACIONES, COLUMNAS_OPERACIONES, tamano_bloque)
+        bloques = historico.registrar(bloques, tamano_lote)
+        _, filas, ultimo_registro, ultima_fecha = capacidades_por_placa(bloques, progreso)
+        historico.reconstruir_resumenes(tamano_lote)
+        # La carga máxima por placa se lee del resumen recién reconstruido
+        capacidades = historico.capacidades_estimadas()
+    camiones = [
+        Camion(placa=placa, capacidad_kg=round(cantidad * 1000, 2))  # Toneladas a Kg
+        for placa, cantidad in capacidades.items()
+    ]
+    registros = upsert(Camion, camiones, ['capacidad_kg'], tamano_lote)
+
+    eliminados = 0 if conservar_ausentes else eliminar_ausentes(Camion, capacidades.keys(), tamano_lote)
+    informe = _informe(filas, registros, eliminados, inicio)
+    informe.update(ultimo_nro_registro=ultimo_registro, ultima_fecha_corte=ultima_fecha)
+    logger.info(f"Camiones cargados: {registros} ({informe['filas_por_s']:.0f} filas/s)")
+    return informe
+
+
+def cargar_camiones_nuevos(directorio, marca, tamano_bloque=TAMANO_BLOQUE,
+                           tamano_lote=TAMANO_LOTE, progreso=None):
+    """
+    Procesa solo las filas agregadas al dataton después de `marca`.
+
+    Lee el archivo desde el byte marca.tamano_bytes y actualiza únicamente
+    los camiones cuya carga máxima aumenta (o que aparecen por primera vez).
+
+    Returns:
+        dict: mismo formato que cargar_camiones()
+    """
+    inicio = time.perf_counter()
+    ruta = directorio / ARCHIVO_OPERACIONES
+    columnas = pd.read_csv(ruta, nrows=0).columns
+    with open(ruta, 'rb') as archivo:
+        archivo.seek(marca.tamano_bytes)
+        bloques = (
+            dataset.normalizar_operaciones(bloque)
+            for bloque in pd.read_csv(
+                archivo, header=None, names=columnas, usecols=COLUMNAS_OPERACIONES,
+                chunksize=tamano_bloque,
+            )
+        )
+        # Defensa ante filas repetidas: solo cuentan registros posteriores
+        if marca.ultimo_nro_registro is not None:
+            bloques = (b[b['NRO_REGISTRO'] > marca.ultimo_nro_registro] for b in bloques)
+        bloques = historico.registrar(bloques, tamano_lote, acumular=True)
+        maximos, filas, ultimo_registro, ultima_fecha = capacidades_por_placa(bloques, progreso)
+
+    actuales = dict(Camion.objects.filter(placa__in=maximos.keys()).values_list('placa', 'capacidad_kg'))
+    camiones = []
+    for placa, cantidad in maximos.items():
+        capacidad = round(cantidad * 1000, 2)
+        if placa not in actuales or capacidad > float(actuales[placa]):
+            camiones.append(Camion(placa=placa, capacidad_kg=capacidad))
+    registros = upsert(Camion, camiones, ['capacidad_kg'], tamano_lote)
+
+    informe = _informe(filas, registros, 0, inicio)
+    informe.update(
+        ultimo_nro_registro=max(filter(None, (marca.ultimo_nro_registro, ultimo_registro)), default=None),
+        ultima_fecha_corte=max(filter(None, (marca.ultima_fecha_corte, ultima_fecha)), default=None),
+    )
+    logger.info(
+        f"Ingesta incremental: {filas} filas nuevas, {registros} camiones actualizados "
+        f"({informe['filas_por_s']:.0f} filas/s)"
+    )
+    return informe
+
+
+def _termina_en_linea(ruta, posicion):
+    """Indica si el byte anterior a `posicion` es un salto de línea"""
+    with open(ruta, 'rb') as archivo:
+        archivo.seek(posicion - 1)
+        return archivo.read(1) == b'\n'
+
+
+def _guardar_marca(fuente, checksum, tamano, filas, informe=None):
+    informe = informe or {}
+    MarcaIngesta.objects.update_or_create(
+        fuente=fuente,
+        defaults={
+            'checksum': checksum,
+            'tamano_bytes': tamano,
+            'filas': filas,
+            'ultimo_nro_registro': informe.get('ultimo_nro_registro'),
+            'ultima_fecha_corte': informe.get('ultima_fecha_corte'),
+        },
+    )
+
+
+def ingerir_rutas(directorio, completa=False, tamano_bloque=TAMANO_BLOQUE, tamano_lote=TAMANO_LOTE,
+                  conservar_ausentes=False):
+    """
+    Carga rutas.csv + demanda.csv salvo que ninguno haya cambiado.
+
+    Returns:
+        dict: informe de cargar_rutas() con 'modo' ('sin_cambios' o 'completa')
+    """
+    marcas = MarcaIngesta.objects.in_bulk(['rutas.csv', 'demanda.csv'])
+    checksums = {fuente: checksum_archivo(directorio / fuente) for fuente in ('rutas.csv', 'demanda.csv')}
+    sin_cambios = all(
+        fuente in marcas and marcas[fuente].checksum == checksum
+        for fuente, (checksum, _, _) in checksums.items()
+    )
+    if sin_cambios and not completa:
+        return _informe_sin_cambios()
+
+    informe = cargar_rutas(directorio, tamano_bloque, tamano_lote, conservar_ausentes)
+    # Rutas eliminadas arrastran sus asignaciones: también cambia el plan
+    versiones.incrementar(versiones.DATOS, versiones.PLAN)
+    for fuente, (checksum, _, tamano) in checksums.items():
+        filas = informe['filas'] if fuente == 'rutas.csv' else informe['filas_demanda']
+        _guardar_marca(fuente, checksum, tamano, filas)
+    informe['modo'] = 'completa'
+    return informe
+
+
+def ingerir_camiones(directorio, completa=False, tamano_bloque=TAMANO_BLOQUE, tamano_lote=TAMANO_LOTE,
+                     conservar_ausentes=False, progreso=None):
+    """
+    Carga la flota desde el dataton usando la marca de agua.
+
+    Returns:
+        dict: informe de cargar_camiones() con 'modo' ('sin_cambios',
+            'incremental' o 'completa')
+    """
+    ruta = directorio / ARCHIVO_OPERACIONES
+    marca = MarcaIngesta.objects.filter(fuente=ARCHIVO_OPERACIONES).first()
+    checksum, prefijo, tamano = checksum_archivo(ruta, marca.tamano_bytes if marca else None)
+
+    if marca is not None and not completa:
+        if checksum == marca.checksum:
+            return _informe_sin_cambios()
+        # Solo se agregaron filas: los bytes ya ingeridos no cambiaron
+        if prefijo == marca.checksum and tamano > marca.tamano_bytes > 0 \
+                and _termina_en_linea(ruta, marca.tamano_bytes):
+            informe = cargar_camiones_nuevos(directorio, marca, tamano_bloque, tamano_lote, progreso)
+            versiones.incrementar(versiones.DATOS)
+            _guardar_marca(ARCHIVO_OPERACIONES, checksum, tamano, marca.filas + informe['filas'], informe)
+            informe['modo'] = 'incremental'
+            return informe
+
+    informe = cargar_camiones(directorio, tamano_bloque, tamano_lote, conservar_ausentes, progreso)
+    versiones.incrementar(versiones.DATOS, versiones.PLAN)
+    _guardar_marca(ARCHIVO_OPERACIONES, checksum, tamano, informe['filas'], informe)
+    informe['modo'] = 'completa'
+    return informe
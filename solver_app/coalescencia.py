@@ -0,0 +1,76 @@
+"""
+Coalescencia de resoluciones concurrentes de la misma instancia.
+
+Si dos solicitudes piden resolver la misma huella (mismas rutas, camiones,
+parámetros y versión del motor) a la vez, solo la primera resuelve: toma la
+fila de ResolucionEnCurso con esa huella (clave primaria, así que la
+exclusión vale entre workers de gunicorn y entre hosts que comparten la base
+de datos). Las demás esperan a que la fila desaparezca y leen la solución
+que el dueño dejó en la caché de soluciones.
+
+La fila vence en `expira_en` (límite de tiempo del solver más
+MARGEN_EXPIRACION_S) para que un proceso caído no bloquee la huella. Cada
+toma guarda un token `propietario` y liberar() solo borra la fila con ese
+token: un dueño lento cuya fila venció y fue tomada por otro proceso no
+libera la del nuevo dueño.
+"""
+
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from solver_app.models import ResolucionEnCurso
+
+logger = logging.getLogger(__name__)
+
+# Margen sobre el límite de tiempo del solver (construcción, guardado)
+MARGEN_EXPIRACION_S = 300
+
+INTERVALO_ESPERA_S = 0.5
+
+
+def tomar(huella, limite_tiempo_s):
+    """
+    Intenta ser el dueño de la resolución de `huella`.
+
+    Returns:
+        uuid.UUID | None: token del dueño para liberar() si la fila se creó
+            (o reemplazó una vencida); None si otro proceso la tiene
+    """
+    ahora = timezone.now()
+    expira_en = ahora + timedelta(seconds=limite_tiempo_s + MARGEN_EXPIRACION_S)
+    # Una fila vencida quedó de un proceso que murió sin liberarla
+    vencidas, _ = ResolucionEnCurso.objects.filter(huella=huella, expira_en__lt=ahora).delete()
+    if vencidas:
+        logger.warning(f"Resolución en curso vencida descartada ({huella[:12]})")
+    propietario = uuid.uuid4()
+    try:
+        with transaction.atomic():
+            ResolucionEnCurso.objects.create(huella=huella, expira_en=expira_en, propietario=propietario)
+    except IntegrityError:
+        return None
+    return propietario
+
+
+def liberar(huella, propietario):
+    """
+    Borra la fila de `huella` si sigue siendo de `propietario` (el token de
+    tomar()).
+
+    Returns:
+        bool: False si la fila ya no era suya (venció y la tomó otro proceso)
+    """
+    borradas, _ = ResolucionEnCurso.objects.filter(huella=huella, propietario=propietario).delete()
+    if not borradas:
+        logger.warning(f"La resolución de {huella[:12]} venció y ya no es de este proceso; no se libera")
+    return bool(borradas)
+
+
+def esperar(huella, intervalo=INTERVALO_ESPERA_S):
+    """Bloquea hasta que la resolución de `huella` termine o venza"""
+    while ResolucionEnCurso.objects.filter(huella=huella, expira_en__gte=timezone.now()).exists():
+        time.sleep(intervalo)
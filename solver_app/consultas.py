@@ -0,0 +1,171 @@
+"""
+Consultas agregadas de las vistas del dashboard.
+
+Cada función resuelve su resumen en una sola consulta usando agregación
+condicional (aggregate/annotate con filter=Q(...), que Django traduce a
+CASE WHEN o FILTER): los totales por turno y por camión no agregan una
+consulta por turno ni por camión, así que el número de consultas de cada
+vista es constante sin importar el tamaño de la flota.
+
+cacheada() devuelve el resultado desde la caché del dashboard, con las
+versiones de los datos de los que depende cada consulta en la clave (ver
+solver_app.versiones).
+"""
+
+from django.db.models import Avg, Count, Exists, OuterRef, Q, Sum
+
+from solver_app import versiones
+from solver_app.models import AsignacionOptima, Camion, Ruta
+
+
+def resumen_rutas():
+    """
+    Returns:
+        dict: 'total', 'distancia_total', 'residuos_totales',
+            'distancia_promedio' y 'residuos_promedio'
+    """
+    return Ruta.objects.aggregate(
+        total=Count('id_zona_barrido'),
+        distancia_total=Sum('distancia_km'),
+        residuos_totales=Sum('residuos_kg'),
+        distancia_promedio=Avg('distancia_km'),
+        residuos_promedio=Avg('residuos_kg'),
+    )
+
+
+def rutas_con_asignacion():
+    """
+    Rutas ordenadas por sector, anotadas con 'asignada' (si el plan activo
+    las incluye) en la misma consulta.
+    """
+    return Ruta.objects.annotate(
+        asignada=Exists(AsignacionOptima.objects.filter(ruta_asignada=OuterRef('pk')))
+    ).order_by('id_sector', 'id_zona_barrido')
+
+
+def resumen_camiones():
+    """
+    Returns:
+        dict: 'total', 'capacidad_total' y 'capacidad_promedio'
+    """
+    return Camion.objects.aggregate(
+        total=Count('placa'),
+        capacidad_total=Sum('capacidad_kg'),
+        capacidad_promedio=Avg('capacidad_kg'),
+    )
+
+
+def resumen_asignaciones():
+    """
+    Totales del plan activo y desglose por turno en una consulta.
+
+    Returns:
+        dict: 'total', 'distancia_total', 'carga_total',
+            'camiones_utilizados' y 'por_turno' (turno -> dict con 'count',
+            'distancia', 'carga' y 'camiones')
+    """
+    agregados = {
+        'total': Count('id'),
+        'distancia_total': Sum('costo_distancia_km'),
+        'carga_total': Sum('carga_kg'),
+        'camiones_utilizados': Count('camion_asignado', distinct=True),
+    }
+    # Los alias usan el índice del turno (deben ser identificadores ASCII)
+    for k, turno in enumerate(AsignacionOptima.TURNOS):
+        en_turno = Q(turno=turno)
+        agregados[f'count_{k}'] = Count('id', filter=en_turno)
+        agregados[f'distancia_{k}'] = Sum('costo_distancia_km', filter=en_turno)
+        agregados[f'carga_{k}'] = Sum('carga_kg', filter=en_turno)
+        agregados[f'camiones_{k}'] = Count('camion_asignado', distinct=True, filter=en_turno)
+
+    fila = AsignacionOptima.objects.aggregate(**agregados)
+    resumen = {clave: fila[clave] for clave in ('total', 'distancia_total', 'carga_total', 'camiones_utilizados')}
+    resumen['por_turno'] = {
+        turno: {
+            'count': fila[f'count_{k}'],
+            'distancia': fila[f'distancia_{k}'] or 0,
+            'carga': fila[f'carga_{k}'] or 0,
+            'camiones': fila[f'camiones_{k}'],
+        }
+        for k, turno in enumerate(AsignacionOptima.TURNOS)
+    }
+    return resumen
+
+
+def uso_por_camion():
+    """
+    Uso de cada camión en el plan activo, en una consulta.
+
+    Returns:
+        list[dict]: por camión (mayor capacidad primero) 'camion',
+            'veces_usado', 'carga_total', 'distancia_total' y
+            'utilizacion_promedio' (% de la capacidad por asignación)
+    """
+    del_plan_activo = Q(asignacionoptima__plan__activo=True)
+    camiones = Camion.objects.annotate(
+        veces_usado=Count('asignacionoptima', filter=del_plan_activo),
+        carga_asignada=Sum('asignacionoptima__carga_kg', filter=del_plan_activo),
+        distancia_asignada=Sum('asignacionoptima__costo_distancia_km', filter=del_plan_activo),
+    ).order_by('-capacidad_kg')
+
+    uso = []
+    for camion in camiones:
+        carga_total = camion.carga_asignada or 0
+        if camion.veces_usado > 0 and camion.capacidad_kg > 0:
+            utilizacion = round(
+                float(carga_total) / (float(camion.capacidad_kg) * camion.veces_usado) * 100, 2
+            )
+        else:
+            utilizacion = 0
+        uso.append({
+            'camion': camion,
+            'veces_usado': camion.veces_usado,
+            'carga_total': carga_total,
+            'distancia_total': camion.distancia_asignada or 0,
+            'utilizacion_promedio': utilizacion,
+        })
+    return uso
+
+
+def asignaciones_activas():
+    """
+    Asignaciones del plan activo listas para serializar, en una consulta.
+
+    Returns:
+        list[dict]: 'turno', 'camion' (placa), 'ruta' (zona de barrido),
+            'sector', 'distancia_km' y 'carga_kg', ordenadas por turno,
+            camión y ruta
+    """
+    orden_turno = {turno: k for k, turno in enumerate(AsignacionOptima.TURNOS)}
+    filas = AsignacionOptima.objects.values_list(
+        'turno', 'camion_asignado_id', 'ruta_asignada_id', 'ruta_asignada__id_sector',
+        'costo_distancia_km', 'carga_kg',
+    )
+    asignaciones = [
+        {
+            'turno': turno,
+            'camion': placa,
+            'ruta': ruta,
+            'sector': sector,
+            'distancia_km': float(distancia),
+            'carga_kg': float(carga),
+        }
+        for turno, placa, ruta, sector, distancia, carga in filas
+    ]
+    asignaciones.sort(key=lambda a: (orden_turno.get(a['turno'], len(orden_turno)), a['camion'], a['ruta']))
+    return asignaciones
+
+
+# Datos de los que depende cada consulta
+DEPENDENCIAS = {
+    'resumen_rutas': (versiones.DATOS,),
+    'resumen_camiones': (versiones.DATOS,),
+    'resumen_asignaciones': (versiones.PLAN,),
+    # El sector sale de la ruta
+    'asignaciones_activas': (versiones.DATOS, versiones.PLAN),
+}
+
+
+def cacheada(nombre):
+    """Resultado de la consulta `nombre` desde la caché del dashboard"""
+    return versiones.cacheado(nombre, globals()[nombre], DEPENDENCIAS[nombre])
@@ -0,0 +1,284 @@
+"""
+Dataset de operaciones (dataton_pueblo_libre.csv) normalizado y en caché.
+
+El CSV se parsea y normaliza una sola vez:
+
+    - texto mal codificado (UTF-8 leído como Windows-1252, p. ej. 'MAÃ‘ANA')
+      reparado y BOM descartado
+    - FECHA_CORTE y DIA_RECORRIDO como fechas
+    - turnos, placas, días de la semana y demás textos repetidos como
+      categóricas
+    - la segunda columna UNIDAD (unidad de medida) como UNIDAD_MEDIDA
+
+El resultado se guarda en un Parquet comprimido (zstd) en cache/ junto al CSV,
+con el SHA-256, el tamaño y la fecha de modificación del CSV en sus metadatos.
+Las lecturas siguientes abren el Parquet con memory-map y solo las columnas
+pedidas; si el CSV cambió, la caché se reconstruye en la misma pasada que lo
+lee. Sin pyarrow instalado se parsea el CSV en cada lectura (mismo resultado,
+sin caché).
+"""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+# Cambiar al modificar la normalización: invalida las cachés existentes
+VERSION_CACHE = '1'
+
+DIRECTORIO_CACHE = 'cache'
+TAMANO_BLOQUE = 50_000
+COMPRESION = 'zstd'
+
+# Bytes leídos por iteración al calcular el checksum de un archivo
+BLOQUE_CHECKSUM = 1024 * 1024
+
+COLUMNAS_FECHA = ['FECHA_CORTE', 'DIA_RECORRIDO']
+COLUMNAS_CATEGORICAS = [
+    'DEPARTAMENTO', 'PROVINCIA', 'DISTRITO', 'GOBIERNO_LOCAL', 'DIA_SEMANA_RECORRIDO',
+    'TURNO', 'CONDUCTOR', 'PLACA', 'UNIDAD_MEDIDA', 'RELLENO_SANITARIO',
+]
+RENOMBRES = {'UNIDAD.1': 'UNIDAD_MEDIDA'}
+
+if pa is not None:
+    _CATEGORICA = pa.dictionary(pa.int32(), pa.string())
+    ESQUEMA = pa.schema([
+        ('NRO_REGISTRO', pa.int64()),
+        ('FECHA_CORTE', pa.date32()),
+        ('DEPARTAMENTO', _CATEGORICA),
+        ('PROVINCIA', _CATEGORICA),
+        ('DISTRITO', _CATEGORICA),
+        ('GOBIERNO_LOCAL', _CATEGORICA),
+        ('UBIGEO', pa.int32()),
+        ('DIA_RECORRIDO', pa.date32()),
+        ('MES_RECORRIDO', pa.int32()),
+        ('SEMANA_RECORRIDO', pa.int32()),
+        ('DIA_SEMANA_RECORRIDO', _CATEGORICA),
+        ('TURNO', _CATEGORICA),
+        ('UNIDAD', pa.int32()),
+        ('CONDUCTOR', _CATEGORICA),
+        ('PLACA', _CATEGORICA),
+        ('NRO_BOLETA', pa.int64()),
+        ('UNIDAD_MEDIDA', _CATEGORICA),
+        ('CANTIDAD', pa.float64()),
+        ('RELLENO_SANITARIO', _CATEGORICA),
+    ])
+else:
+    ESQUEMA = None
+
+
+def checksum_archivo(ruta, tamano_prefijo=None):
+    """
+    SHA-256 del archivo en una sola lectura.
+
+    Args:
+        tamano_prefijo: calcular también el checksum de los primeros
+            `tamano_prefijo` bytes (para detectar filas agregadas al final)
+
+    Returns:
+        tuple: (checksum, checksum del prefijo o None, tamaño en bytes)
+    """
+    h = hashlib.sha256()
+    prefijo = None
+    tamano = 0
+    with open(ruta, 'rb') as archivo:
+        if tamano_prefijo is not None:
+            while tamano < tamano_prefijo:
+                datos = archivo.read(min(BLOQUE_CHECKSUM, tamano_prefijo - tamano))
+                if not datos:
+                    break
+                h.update(datos)
+                tamano += len(datos)
+            if tamano == tamano_prefijo:
+                prefijo = h.hexdigest()
+        while datos := archivo.read(BLOQUE_CHECKSUM):
+            h.update(datos)
+            tamano += len(datos)
+    return h.hexdigest(), prefijo, tamano
+
+
+def reparar_texto(texto):
+    """
+    Revierte el mojibake de UTF-8 leído como Windows-1252 ('MAÃ‘ANA' ->
+    'MAÑANA'). Los caracteres que Windows-1252 no define ('\\x81' en
+    'SÃ\\x81BADO') se toman como Latin-1. Un texto correcto se devuelve igual.
+    """
+    if not isinstance(texto, str) or texto.isascii():
+        return texto
+    try:
+        datos = bytearray()
+        for caracter in texto:
+            try:
+                datos += caracter.encode('cp1252')
+            except UnicodeEncodeError:
+                datos += caracter.encode('latin-1')
+        return datos.decode('utf-8')
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return texto
+
+
+def _a_categorica(serie):
+    serie = serie.astype('category')
+    reparadas = [reparar_texto(c) for c in serie.cat.categories]
+    if len(set(reparadas)) == len(reparadas):
+        return serie.cat.rename_categories(reparadas)
+    # Dos variantes de un mismo valor (correcta y mal codificada) se unifican
+    return serie.map(dict(zip(serie.cat.categories, reparadas))).astype('category')
+
+
+def normalizar_operaciones(df):
+    """
+    Normaliza un bloque del CSV crudo: nombres de columna, fechas,
+    categóricas y codificación del texto (solo las columnas presentes).
+    """
+    df = df.rename(columns=RENOMBRES)
+    for columna in COLUMNAS_FECHA:
+        if columna in df:
+            df[columna] = pd.to_datetime(df[columna], format='%Y%m%d')
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df:
+            df[columna] = _a_categorica(df[columna])
+    return df
+
+
+def _columnas_csv(columnas):
+    """Nombres de columna del CSV crudo para columnas normalizadas"""
+    if columnas is None:
+        return None
+    originales = {nuevo: viejo for viejo, nuevo in RENOMBRES.items()}
+    return [originales.get(c, c) for c in columnas]
+
+
+def leer_csv(ruta, columnas=None, tamano_bloque=TAMANO_BLOQUE):
+    """Itera el CSV crudo en bloques normalizados (sin usar la caché)"""
+    bloques = pd.read_csv(
+        ruta, encoding='utf-8-sig', usecols=_columnas_csv(columnas), chunksize=tamano_bloque,
+    )
+    for bloque in bloques:
+        bloque = normalizar_operaciones(bloque)
+        yield bloque[columnas] if columnas is not None else bloque
+
+
+def ruta_cache(ruta_csv):
+    ruta_csv = Path(ruta_csv)
+    return ruta_csv.parent / DIRECTORIO_CACHE / f'{ruta_csv.stem}.parquet'
+
+
+def metadatos_cache(ruta_csv):
+    """Metadatos del CSV guardados en la caché, o None si no existe"""
+    destino = ruta_cache(ruta_csv)
+    if pq is None or not destino.exists():
+        return None
+    try:
+        metadatos = pq.read_schema(destino).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    return {clave.decode(): valor.decode() for clave, valor in metadatos.items()
+            if clave.startswith(b'csv_') or clave == b'version'}
+
+
+def cache_vigente(ruta_csv):
+    """
+    Indica si la caché corresponde al CSV actual.
+
+    Si el tamaño y la fecha de modificación coinciden no se lee el CSV; si
+    solo cambió la fecha se compara el SHA-256.
+    """
+    metadatos = metadatos_cache(ruta_csv)
+    if metadatos is None or metadatos.get('version') != VERSION_CACHE:
+        return False
+    estado = os.stat(ruta_csv)
+    if str(estado.st_size) != metadatos.get('csv_tamano'):
+        return False
+    if str(estado.st_mtime_ns) == metadatos.get('csv_mtime_ns'):
+        return True
+    checksum, _, _ = checksum_archivo(ruta_csv)
+    return checksum == metadatos.get('csv_sha256')
+
+
+def _construir_e_iterar(ruta_csv, columnas, tamano_bloque):
+    """
+    Lee el CSV completo, escribe la caché y entrega los bloques normalizados.
+
+    El Parquet se escribe en un archivo temporal y se publica con
+    os.replace() al terminar: un lector nunca ve una caché a medio escribir y
+    si la iteración se interrumpe no queda caché.
+    """
+    ruta_csv = Path(ruta_csv)
+    estado = os.stat(ruta_csv)
+    checksum, _, _ = checksum_archivo(ruta_csv)
+    destino = ruta_cache(ruta_csv)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporal = destino.with_name(f'.{destino.name}.{os.getpid()}.tmp')
+
+    esquema = ESQUEMA.with_metadata({
+        'version': VERSION_CACHE,
+        'csv_sha256': checksum,
+        'csv_tamano': str(estado.st_size),
+        'csv_mtime_ns': str(estado.st_mtime_ns),
+    })
+    completo = False
+    filas = 0
+    try:
+        with pq.ParquetWriter(temporal, esquema, compression=COMPRESION) as escritor:
+            for bloque in leer_csv(ruta_csv, tamano_bloque=tamano_bloque):
+                escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+                filas += len(bloque)
+                yield bloque[columnas] if columnas is not None else bloque
+        os.replace(temporal, destino)
+        completo = True
+        logger.info(f"Caché de {ruta_csv.name} reconstruida: {filas} filas en {destino}")
+    finally:
+        if not completo:
+            temporal.unlink(missing_ok=True)
+
+
+def iterar_operaciones(ruta_csv, columnas=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Itera el dataset normalizado en bloques de a lo sumo `tamano_bloque` filas.
+
+    Usa la caché si está vigente; si no, lee el CSV y la reconstruye en la
+    misma pasada (con pyarrow instalado).
+
+    Args:
+        columnas: columnas normalizadas a leer (None = todas)
+    """
+    if pq is None:
+        yield from leer_csv(ruta_csv, columnas, tamano_bloque)
+    elif cache_vigente(ruta_csv):
+        archivo = pq.ParquetFile(ruta_cache(ruta_csv), memory_map=True)
+        for lote in archivo.iter_batches(batch_size=tamano_bloque, columns=columnas):
+            yield lote.to_pandas(date_as_object=False)
+    else:
+        yield from _construir_e_iterar(ruta_csv, columnas, tamano_bloque)
+
+
+def leer_operaciones(ruta_csv, columnas=None):
+    """
+    Dataset normalizado completo (o solo `columnas`) como DataFrame.
+
+    Con la caché vigente la lectura es memory-mapped y columnar: solo se
+    descomprimen las columnas pedidas.
+    """
+    if pq is not None and cache_vigente(ruta_csv):
+        tabla = pq.read_table(ruta_cache(ruta_csv), columns=columnas, memory_map=True)
+        return tabla.to_pandas(date_as_object=False)
+    bloques = list(iterar_operaciones(ruta_csv, columnas))
+    if not bloques:
+        return pd.DataFrame(columns=columnas)
+    df = pd.concat(bloques, ignore_index=True)
+    # concat pierde el tipo categórico si las categorías difieren entre bloques
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df and df[columna].dtype != 'category':
+            df[columna] = df[columna].astype('category')
+    return df
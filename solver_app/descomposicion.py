@@ -0,0 +1,297 @@
+"""
+Descomposición de la instancia por sector.
+
+Ruta.id_sector divide el distrito en zonas independientes: si cada slot
+(camión, turno) se reserva para un único sector, el problema se separa en un
+subproblema por sector que se resuelve en paralelo en un ProcessPoolExecutor.
+
+    1. particionar_flota: reparte los slots libres entre sectores con un
+       best-fit decreciente global (garantiza que cada sector tenga slots
+       suficientes) y distribuye el resto según la demanda de cada sector.
+    2. resolver_subproblema: presolve + MIP de un sector en un proceso aparte.
+       Los procesos se crean con 'forkserver' (o 'spawn'), nunca con fork:
+       quien resuelve puede ser un hilo del pool de trabajos o de gunicorn, y
+       un fork desde un proceso con varios hilos hereda locks tomados y las
+       conexiones abiertas a la base de datos.
+    3. verificar_asignaciones: comprueba el plan combinado contra las
+       restricciones globales (cobertura, capacidad y rutas por turno).
+
+El objetivo (distancia total) solo depende de qué rutas se cubren, por lo que
+una partición factible no pierde optimalidad: si todos los subproblemas son
+óptimos, el plan combinado también lo es.
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.conf import settings
+
+from solver_app.backends import obtener_backend
+from solver_app.instancia import Instancia, ConstructorModelo, InstanciaInfactible
+from solver_app.reducciones import presolver
+
+logger = logging.getLogger(__name__)
+
+
+class PlanInconsistente(Exception):
+    """El plan combinado de los sectores viola restricciones globales"""
+
+    def __init__(self, violaciones):
+        self.violaciones = violaciones
+        super().__init__(
+            f"El plan combinado de los sectores viola {len(violaciones)} restricciones "
+            f"globales, p. ej. {violaciones[0]}"
+        )
+
+
+def particionar_flota(instancia):
+    """
+    Asigna cada slot (camión, turno) con cupo libre a un sector.
+
+    Returns:
+        dict: sector -> matriz booleana (C, T) con los slots del sector
+
+    Raises:
+        InstanciaInfactible: si el best-fit no logra ubicar alguna ruta
+    """
+    pendientes = np.flatnonzero(instancia.rutas_pendientes)
+    sectores = np.unique(instancia.sectores[pendientes])
+
+    restante = instancia.capacidad_restante.copy()
+    cupo = instancia.cupo.copy()
+    duenio = np.full(cupo.shape, -1, dtype=np.int64)  # índice en `sectores`
+
+    # Best-fit decreciente: cada ruta va al slot compatible que quede más
+    # lleno; un slot pasa a ser del sector de la primera ruta que recibe
+    for j in pendientes[np.argsort(-instancia.residuos[pendientes], kind='stable')]:
+        s = int(np.searchsorted(sectores, instancia.sectores[j]))
+        candidatos = (
+            instancia.mascara[:, j, :]
+            & (cupo > 0)
+            & (restante >= instancia.residuos[j])
+            & ((duenio == -1) | (duenio == s))
+        )
+        if not candidatos.any():
+            raise InstanciaInfactible(
+                f"La partición por sectores no ubica la zona "
+                f"{instancia.rutas[j].id_zona_barrido} (sector {instancia.sectores[j]})"
+            )
+        holgura = np.where(candidatos, restante - instancia.residuos[j], np.inf)
+        i, t = np.unravel_index(np.argmin(holgura), holgura.shape)
+        duenio[i, t] = s
+        cupo[i, t] -= 1
+        restante[i, t] -= instancia.residuos[j]
+
+    # Los slots sobrantes se reparten dando cada uno al sector con menos
+    # capacidad asignada respecto de su demanda
+    demanda = np.array([
+        instancia.residuos[pendientes[instancia.sectores[pendientes] == sector]].sum()
+        for sector in sectores
+    ])
+    asignada = np.array([
+        instancia.capacidad_restante[duenio == s].sum() for s in range(len(sectores))
+    ])
+    libres = np.argwhere((duenio == -1) & (instancia.cupo > 0) & instancia.mascara.any(axis=1))
+    orden = np.argsort(-instancia.capacidad_restante[libres[:, 0], libres[:, 1]], kind='stable')
+    for i, t in libres[orden]:
+        s = int(np.argmin(asignada / np.maximum(demanda, 1e-9)))
+        duenio[i, t] = s
+        asignada[s] += instancia.capacidad_restante[i, t]
+
+    return {int(sector): duenio == s for s, sector in enumerate(sectores)}
+
+
+def crear_subinstancia(instancia, sector, slots):
+    """
+    Instancia de un sector: sus rutas pendientes y solo los slots reservados.
+
+    Returns:
+        tuple: (subinstancia, índices globales de sus rutas)
+    """
+    indices = np.flatnonzero(instancia.rutas_pendientes & (instancia.sectores == sector))
+    sub = Instancia(
+        [instancia.rutas[j] for j in indices],
+        instancia.camiones,
+        instancia.turnos,
+        instancia.rutas_por_turno,
+    )
+    sub.mascara = instancia.mascara[:, indices, :] & slots[:, np.newaxis, :]
+    sub.capacidad_restante = instancia.capacidad_restante.copy()
+    sub.cupo = instancia.cupo.copy()
+    sub.emitir_capacidad = instancia.emitir_capacidad.copy()
+    return sub, indices
+
+
+def contexto_procesos():
+    """Contexto de multiprocessing del pool: 'forkserver' si existe, si no 'spawn'"""
+    metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(metodo)
+
+
+def inicializar_worker():
+    """
+    Configura Django en cada proceso del pool (los argumentos traen
+    instancias de Ruta y Camion, que requieren las apps cargadas).
+
+    Los subproblemas no consultan la base de datos: cualquier conexión que
+    el proceso tuviera se cierra para no compartirla con el padre.
+    """
+    import django
+    from django.apps import apps
+    from django.db import connections
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def resolver_subproblema(sector, subinstancia, backend, limite_tiempo_s, gap_relativo=None,
+                         presolve=True):
+    """
+    Resuelve el MIP de un sector (se ejecuta en un proceso del pool).
+
+    Returns:
+        dict: 'sector', 'estado', 'asignaciones' (tuplas con índices de ruta
+            locales), 'solver' (ResultadoSolver.como_dict()), 'variables',
+            'restricciones' y 'tiempo'
+    """
+    inicio = time.perf_counter()
+    informe = {'sector': sector, 'asignaciones': [], 'solver': None, 'variables': 0, 'restricciones': 0}
+    try:
+        if presolve:
+            presolver(subinstancia)
+    except InstanciaInfactible:
+        informe.update(estado='Infeasible', tiempo=time.perf_counter() - inicio)
+        return informe
+
+    modelo = ConstructorModelo(subinstancia)
+    modelo.crear_variables()
+    modelo.agregar_funcion_objetivo()
+    modelo.agregar_restricciones()
+
+    # Un worker de búsqueda por subproblema: el paralelismo lo da el pool
+    resultado = obtener_backend(backend, hilos=1).resolver(
+        modelo.proto, limite_tiempo_s, gap_relativo=gap_relativo,
+    )
+    informe.update(
+        estado=resultado.estado,
+        solver=resultado.como_dict(),
+        variables=modelo.num_variables,
+        restricciones=modelo.num_restricciones,
+    )
+    if resultado.tiene_solucion:
+        camiones, rutas, turnos = modelo.interpretar_valores(resultado.valores)
+        informe['asignaciones'] = list(zip(camiones.tolist(), rutas.tolist(), turnos.tolist()))
+    informe['tiempo'] = time.perf_counter() - inicio
+    return informe
+
+
+def verificar_asignaciones(instancia, asignaciones):
+    """
+    Comprueba un plan completo contra las restricciones globales.
+
+    Args:
+        asignaciones: tuplas (camión, ruta, turno) con índices globales,
+            incluidas las rutas fijadas
+
+    Returns:
+        list: descripción de cada violación (vacía si el plan es válido)
+    """
+    violaciones = []
+    plan = np.array(asignaciones, dtype=np.int64).reshape(-1, 3)
+
+    coberturas = np.bincount(plan[:, 1], minlength=instancia.num_rutas)
+    for j in np.flatnonzero(coberturas != 1):
+        violaciones.append(
+            f"Zona {instancia.rutas[j].id_zona_barrido} cubierta {coberturas[j]} veces"
+        )
+
+    slots = plan[:, 0] * instancia.num_turnos + plan[:, 2]
+    num_slots = instancia.num_camiones * instancia.num_turnos
+    cargas = np.bincount(slots, weights=instancia.residuos[plan[:, 1]], minlength=num_slots)
+    rutas_slot = np.bincount(slots, minlength=num_slots)
+    capacidades = np.repeat(instancia.capacidades, instancia.num_turnos)
+    for s in np.flatnonzero((cargas > capacidades + 1e-6) | (rutas_slot > instancia.rutas_por_turno)):
+        i, t = divmod(int(s), instancia.num_turnos)
+        violaciones.append(
+            f"Camión {instancia.camiones[i].placa} excede su capacidad o cupo "
+            f"en el turno {instancia.turnos[t]}"
+        )
+    return violaciones
+
+
+def procesos_por_defecto():
+    """Procesos del pool de subproblemas (por defecto, todos los núcleos)"""
+    return getattr(settings, 'SOLVER_PROCESOS', None) or os.cpu_count() or 1
+
+
+def resolver_por_sectores(instancia, backend, limite_tiempo_s, gap_relativo=None, presolve=True,
+                          procesos=None):
+    """
+    Resuelve la instancia descompuesta por sector.
+
+    Args:
+        instancia: Instancia (no se modifica; puede traer rutas fijadas)
+        backend: backend del MIP de cada subproblema
+        limite_tiempo_s: límite de tiempo de cada subproblema
+        gap_relativo: gap relativo objetivo de cada subproblema
+        procesos: tamaño del pool (por defecto settings.SOLVER_PROCESOS)
+
+    Returns:
+        dict: 'estado', 'asignaciones' (tuplas globales, sin las fijas),
+            'subproblemas' (informe por sector) y 'tiempo_particion'
+
+    Raises:
+        InstanciaInfactible: si la partición o algún subproblema es infactible
+        PlanInconsistente: si el plan combinado no pasa verificar_asignaciones
+    """
+    inicio = time.perf_counter()
+    particion = particionar_flota(instancia)
+    subproblemas = [
+        (sector, *crear_subinstancia(instancia, sector, slots))
+        for sector, slots in particion.items()
+    ]
+    tiempo_particion = time.perf_counter() - inicio
+    logger.info(
+        f"Instancia dividida en {len(subproblemas)} sectores "
+        f"({tiempo_particion:.3f} s de partición)"
+    )
+
+    procesos = min(procesos or procesos_por_defecto(), len(subproblemas))
+    argumentos = [
+        (sector, sub, backend, limite_tiempo_s, gap_relativo, presolve)
+        for sector, sub, _ in subproblemas
+    ]
+    if procesos > 1:
+        with ProcessPoolExecutor(
+            max_workers=procesos, mp_context=contexto_procesos(), initializer=inicializar_worker,
+        ) as pool:
+            informes = list(pool.map(resolver_subproblema, *zip(*argumentos)))
+    else:
+        informes = [resolver_subproblema(*args) for args in argumentos]
+
+    asignaciones = []
+    for (sector, _, indices), informe in zip(subproblemas, informes):
+        if informe['estado'] not in ('Optimal', 'Feasible'):
+            raise InstanciaInfactible(
+                f"El subproblema del sector {sector} no tiene solución "
+                f"(estado: {informe['estado']})"
+            )
+        asignaciones.extend((i, int(indices[j]), t) for i, j, t in informe.pop('asignaciones'))
+        informe['rutas'] = len(indices)
+
+    violaciones = verificar_asignaciones(instancia, instancia.fijas + asignaciones)
+    if violaciones:
+        raise PlanInconsistente(violaciones)
+
+    estado = 'Optimal' if all(i['estado'] == 'Optimal' for i in informes) else 'Feasible'
+    return {
+        'estado': estado,
+        'asignaciones': asignaciones,
+        'subproblemas': informes,
+        'procesos': procesos,
+        'tiempo_particion': tiempo_particion,
+    }
@@ -0,0 +1,107 @@
+"""
+Exportación de planes de asignaciones en CSV y NDJSON.
+
+Las filas se leen por páginas con paginación por clave (id > último id
+leído, en orden de id) y cada página se recorre con iterator(chunk_size=...),
+que en PostgreSQL usa un cursor del lado del servidor. La memoria usada
+depende del tamaño de página y no del plan, así que el mismo generador sirve
+para la vista de descarga (StreamingHttpResponse) y para el comando
+exportar_plan.
+
+Un plan guardado no cambia (solver_app.planes crea uno nuevo por resolución),
+así que exportar por su id es consistente aunque otro plan se active a mitad
+de la descarga.
+"""
+
+import csv
+import json
+
+from solver_app.models import AsignacionOptima, PlanAsignacion
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+CAMPOS = ['plan', 'turno', 'camion', 'ruta', 'sector', 'distancia_km', 'carga_kg']
+
+TAMANO_PAGINA = 5_000
+
+
+def buscar_plan(plan_id=None, ejecucion_id=None):
+    """
+    Plan a exportar: el de `plan_id`, el generado por la ejecución
+    (SolverRun) `ejecucion_id` o, sin argumentos, el plan activo.
+
+    Returns:
+        PlanAsignacion | None: None si no existe (o ya fue podado)
+    """
+    planes = PlanAsignacion.objects.all()
+    if plan_id is not None:
+        return planes.filter(pk=plan_id).first()
+    if ejecucion_id is not None:
+        return planes.filter(ejecucion_id=ejecucion_id).first()
+    return planes.filter(activo=True).first()
+
+
+def filas(plan, tamano_pagina=TAMANO_PAGINA):
+    """
+    Asignaciones de `plan` como tuplas en el orden de CAMPOS.
+
+    Args:
+        plan: PlanAsignacion
+        tamano_pagina: filas por consulta
+    """
+    consulta = (
+        AsignacionOptima.todas.filter(plan=plan)
+        .order_by('id')
+        .values_list(
+            'id', 'turno', 'camion_asignado_id', 'ruta_asignada_id', 'ruta_asignada__id_sector',
+            'costo_distancia_km', 'carga_kg',
+        )
+    )
+    ultimo = 0
+    while True:
+        leidas = 0
+        for id_fila, turno, camion, ruta, sector, distancia, carga in (
+            consulta.filter(id__gt=ultimo)[:tamano_pagina].iterator(chunk_size=tamano_pagina)
+        ):
+            leidas += 1
+            ultimo = id_fila
+            yield (plan.pk, turno, camion, ruta, sector, float(distancia), float(carga))
+        if leidas < tamano_pagina:
+            return
+
+
+class _Eco:
+    """Archivo mínimo para csv.writer: devuelve lo escrito en lugar de guardarlo"""
+
+    def write(self, valor):
+        return valor
+
+
+def como_csv(filas_plan):
+    """Líneas CSV (con encabezado) de las tuplas de filas()"""
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(CAMPOS)
+    for fila in filas_plan:
+        yield escritor.writerow(fila)
+
+
+def como_ndjson(filas_plan):
+    """Un objeto JSON por línea para cada tupla de filas()"""
+    for fila in filas_plan:
+        yield json.dumps(dict(zip(CAMPOS, fila)), ensure_ascii=False) + '\n'
+
+
+def exportar(plan, formato, tamano_pagina=TAMANO_PAGINA):
+    """
+    Generador de líneas de texto del plan en `formato` ('csv' o 'ndjson').
+
+    Raises:
+        Exception: si el formato no es válido
+    """
+    if formato not in FORMATOS:
+        raise Exception(f"Formato inválido: {formato}. Use uno de: {', '.join(FORMATOS)}")
+    serializar = como_csv if formato == 'csv' else como_ndjson
+    return serializar(filas(plan, tamano_pagina))
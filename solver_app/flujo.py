@@ -0,0 +1,141 @@
+"""
+Motor de asignación por flujo de costo mínimo.
+
+Con a lo sumo una ruta por camión y turno, el modelo de SolverRutasLimpieza es
+un problema de asignación bipartita: cada ruta se asigna a un slot
+(camión, turno) compatible, es decir, con residuos_kg <= capacidad_kg. La
+distancia total es la misma para cualquier asignación factible (la suma de
+distancias de todas las rutas), así que basta con encontrar un emparejamiento
+que cubra todas las rutas. Se resuelve en tiempo polinomial con
+SimpleMinCostFlow de OR-Tools, sin pasar por un MIP:
+
+    origen -> ruta -> slot (camión, turno) [-> camión] -> sumidero
+
+Los costos del flujo se usan para un objetivo secundario opcional:
+    - 'utilizacion': prefiere el camión con menor capacidad sobrante
+      (best-fit), maximizando la utilización de cada viaje.
+    - 'balance': costo convexo por uso de cada camión, de modo que los viajes
+      se reparten entre la flota en lugar de concentrarse en pocos camiones.
+"""
+
+import numpy as np
+from ortools.graph.python import min_cost_flow
+
+OBJETIVOS_SECUNDARIOS = (None, 'utilizacion', 'balance')
+
+# Los costos de SimpleMinCostFlow son enteros
+ESCALA_COSTO = 1000
+
+
+def resolver_asignacion(capacidades, residuos, num_turnos, objetivo_secundario=None,
+                        mascara=None, rutas_pendientes=None):
+    """
+    Asigna cada ruta a un slot (camión, turno) compatible.
+
+    Args:
+        capacidades: capacidad en kg de cada camión (secuencia de floats)
+        residuos: residuos en kg de cada ruta (secuencia de floats)
+        num_turnos: número de turnos por camión
+        objetivo_secundario: None, 'utilizacion' o 'balance'
+        mascara: arreglo booleano opcional (camión, ruta, turno) con los pares
+            permitidos (ver Instancia.mascara)
+        rutas_pendientes: arreglo booleano opcional con las rutas a cubrir; las
+            demás ya están asignadas fuera del flujo
+
+    Returns:
+        dict: 'factible', 'asignaciones' (lista de tuplas
+            (indice_camion, indice_ruta, indice_turno)), 'rutas_sin_cubrir'
+            y 'costo_secundario'
+    """
+    if objetivo_secundario not in OBJETIVOS_SECUNDARIOS:
+        raise ValueError(f"Objetivo secundario desconocido: {objetivo_secundario}")
+
+    capacidades = np.asarray(capacidades, dtype=np.float64)
+    residuos = np.asarray(residuos, dtype=np.float64)
+    num_camiones, num_rutas = len(capacidades), len(residuos)
+    num_slots = num_camiones * num_turnos
+    if rutas_pendientes is None:
+        pendientes = np.arange(num_rutas)
+    else:
+        pendientes = np.flatnonzero(rutas_pendientes)
+    demanda = len(pendientes)
+
+    # Numeración de nodos
+    origen = 0
+    primer_ruta = 1
+    primer_slot = primer_ruta + num_rutas
+    primer_camion = primer_slot + num_slots
+    balance = objetivo_secundario == 'balance'
+    sumidero = primer_camion + (num_camiones if balance else 0)
+
+    colas, cabezas, costos = [], [], []
+
+    # origen -> ruta
+    colas.append(np.full(demanda, origen))
+    cabezas.append(primer_ruta + pendientes)
+    costos.append(np.zeros(demanda, dtype=np.int64))
+
+    # ruta -> slot, solo para pares compatibles por capacidad
+    compatibles = residuos[np.newaxis, :] <= capacidades[:, np.newaxis]
+    if mascara is None:
+        permitidos = np.repeat(compatibles[:, :, np.newaxis], num_turnos, axis=2)
+    else:
+        permitidos = np.asarray(mascara, dtype=bool) & compatibles[:, :, np.newaxis]
+    camion_idx, ruta_idx, turno_idx = np.nonzero(permitidos)
+    if objetivo_secundario == 'utilizacion':
+        capacidad_par = capacidades[camion_idx]
+        holgura = np.divide(
+            capacidad_par - residuos[ruta_idx], capacidad_par,
+            out=np.zeros_like(capacidad_par), where=capacidad_par > 0,
+        )
+        costos.append(np.rint(holgura * ESCALA_COSTO).astype(np.int64))
+    else:
+        costos.append(np.zeros(len(camion_idx), dtype=np.int64))
+    colas.append(primer_ruta + ruta_idx)
+    cabezas.append(primer_slot + camion_idx * num_turnos + turno_idx)
+
+    slots = np.arange(num_slots)
+    if balance:
+        # slot -> camión -> sumidero; el k-ésimo uso de un camión cuesta k
+        colas.append(primer_slot + slots)
+        cabezas.append(primer_camion + slots // num_turnos)
+        costos.append(np.zeros(num_slots, dtype=np.int64))
+        for uso in range(num_turnos):
+            colas.append(primer_camion + np.arange(num_camiones))
+            cabezas.append(np.full(num_camiones, sumidero))
+            costos.append(np.full(num_camiones, uso * ESCALA_COSTO, dtype=np.int64))
+    else:
+        colas.append(primer_slot + slots)
+        cabezas.append(np.full(num_slots, sumidero))
+        costos.append(np.zeros(num_slots, dtype=np.int64))
+
+    colas = np.concatenate(colas).astype(np.int32)
+    cabezas = np.concatenate(cabezas).astype(np.int32)
+    costos = np.concatenate(costos)
+
+    smcf = min_cost_flow.SimpleMinCostFlow()
+    arcos = smcf.add_arcs_with_capacity_and_unit_cost(
+        colas, cabezas, np.ones(len(colas), dtype=np.int64), costos
+    )
+    smcf.set_node_supply(origen, demanda)
+    smcf.set_node_supply(sumidero, -demanda)
+
+    status = smcf.solve_max_flow_with_min_cost()
+    if status != smcf.OPTIMAL:
+        raise Exception(f"El flujo de costo mínimo terminó con estado {status}")
+
+    # Extraer los arcos ruta -> slot con flujo
+    flujos = smcf.flows(arcos)
+    usados = (flujos > 0) & (colas >= primer_ruta) & (colas < primer_slot) & \
+        (cabezas >= primer_slot) & (cabezas < primer_camion)
+    asignaciones = [
+        (int(slot // num_turnos), int(ruta), int(slot % num_turnos))
+        for ruta, slot in zip(colas[usados] - primer_ruta, cabezas[usados] - primer_slot)
+    ]
+
+    return {
+        'factible': smcf.maximum_flow() == demanda,
+        'asignaciones': asignaciones,
+        'rutas_sin_cubrir': demanda - int(smcf.maximum_flow()),
+        'costo_secundario': int(smcf.optimal_cost()),
+    }
@@ -0,0 +1,244 @@
+"""
+Heurística constructiva + búsqueda local.
+
+Produce en milisegundos un plan factible para el botón "Plan rápido" del
+dashboard y como solución inicial (pista) del MIP:
+
+    1. best_fit_decreciente: ordena las rutas por residuos_kg de mayor a
+       menor y asigna cada una al slot (camión, turno) compatible que quede
+       más lleno, prefiriendo camiones ya en uso.
+    2. busqueda_local: movimientos de reubicación (una ruta a otro slot) e
+       intercambio (dos rutas de slots distintos) que mejoran los objetivos
+       secundarios: primero el número de camiones usados y luego el balance
+       de utilización entre los slots usados.
+
+La distancia total solo depende de qué rutas se cubren, así que ningún
+movimiento la cambia: la búsqueda local trabaja solo sobre la calidad
+operativa del plan.
+"""
+
+import logging
+import time
+
+import numpy as np
+
+from solver_app.instancia import InstanciaInfactible
+
+logger = logging.getLogger(__name__)
+
+# Peso de un camión usado frente a la suma de utilizaciones al cuadrado (una
+# utilización está en [0, 1], así que un camión menos siempre compensa)
+PESO_CAMION = 1000.0
+
+
+class PlanHeuristico:
+    """
+    Estado de un plan sobre los slots libres de una Instancia.
+
+    Atributos:
+        slot_de_ruta: slot (camión * T + turno) de cada ruta pendiente, o -1
+        carga: carga asignada a cada slot, shape (C * T,)
+        rutas_slot: rutas asignadas a cada slot, shape (C * T,)
+        rutas_camion: rutas asignadas a cada camión en todos los turnos
+    """
+
+    def __init__(self, instancia):
+        self.inst = instancia
+        self.num_turnos = instancia.num_turnos
+        self.capacidad = instancia.capacidad_restante.reshape(-1).astype(np.float64)
+        self.cupo = instancia.cupo.reshape(-1)
+        self.capacidad_total = np.repeat(instancia.capacidades, instancia.num_turnos)
+        # Carga ya comprometida por las rutas fijadas
+        self.carga_fija = self.capacidad_total - self.capacidad
+        self.permitidos = instancia.mascara.transpose(1, 0, 2).reshape(instancia.num_rutas, -1)
+
+        self.slot_de_ruta = np.full(instancia.num_rutas, -1, dtype=np.int64)
+        self.carga = np.zeros(len(self.capacidad))
+        self.rutas_slot = np.zeros(len(self.capacidad), dtype=np.int64)
+        self.rutas_camion = np.zeros(instancia.num_camiones, dtype=np.int64)
+        for i, _, _ in instancia.fijas:
+            self.rutas_camion[i] += 1
+
+    def asignar(self, j, s):
+        self.slot_de_ruta[j] = s
+        self.carga[s] += self.inst.residuos[j]
+        self.rutas_slot[s] += 1
+        self.rutas_camion[s // self.num_turnos] += 1
+
+    def retirar(self, j):
+        s = self.slot_de_ruta[j]
+        self.slot_de_ruta[j] = -1
+        self.carga[s] -= self.inst.residuos[j]
+        self.rutas_slot[s] -= 1
+        self.rutas_camion[s // self.num_turnos] -= 1
+
+    def utilizacion(self, carga):
+        """Utilización de cada slot incluyendo la carga fijada"""
+        return (self.carga_fija + carga) / np.maximum(self.capacidad_total, 1e-9)
+
+    def costo(self):
+        """Camiones usados (ponderados) + suma de utilizaciones al cuadrado"""
+        return PESO_CAMION * np.count_nonzero(self.rutas_camion) + \
+            float(np.sum(self.utilizacion(self.carga) ** 2))
+
+    def asignaciones(self):
+        """Tuplas (camión, ruta, turno) de las rutas asignadas por el plan"""
+        return [
+            (int(s // self.num_turnos), int(j), int(s % self.num_turnos))
+            for j, s in enumerate(self.slot_de_ruta) if s >= 0
+        ]
+
+
+def best_fit_decreciente(instancia):
+    """
+    Asigna las rutas pendientes de mayor a menor residuos_kg.
+
+    Returns:
+        PlanHeuristico: plan con todas las rutas pendientes asignadas
+
+    Raises:
+        InstanciaInfactible: si alguna ruta no cabe en ningún slot libre
+    """
+    plan = PlanHeuristico(instancia)
+    pendientes = np.flatnonzero(instancia.rutas_pendientes)
+    for j in pendientes[np.argsort(-instancia.residuos[pendientes], kind='stable')]:
+        holgura = plan.capacidad - plan.carga - instancia.residuos[j]
+        candidatos = plan.permitidos[j] & (plan.rutas_slot < plan.cupo) & (holgura >= 0)
+        if not candidatos.any():
+            raise InstanciaInfactible(
+                f"La heurística no encontró un slot para la zona {instancia.rutas[j].id_zona_barrido}"
+            )
+        # Preferir camiones ya en uso y, entre ellos, el slot más ajustado
+        en_uso = np.repeat(plan.rutas_camion > 0, instancia.num_turnos)
+        criterio = np.where(candidatos, holgura - PESO_CAMION * en_uso, np.inf)
+        plan.asignar(j, int(np.argmin(criterio)))
+    return plan
+
+
+def _mejor_reubicacion(plan, j):
+    """Mejor slot destino para la ruta j y la variación de costo que produce"""
+    inst = plan.inst
+    origen = plan.slot_de_ruta[j]
+    residuo = inst.residuos[j]
+
+    destinos = plan.permitidos[j] & (plan.rutas_slot < plan.cupo) & \
+        (plan.carga + residuo <= plan.capacidad + 1e-9)
+    destinos[origen] = False
+    if not destinos.any():
+        return None, 0.0
+
+    util = plan.utilizacion(plan.carga)
+    util_destino = plan.utilizacion(plan.carga + residuo)
+    delta = util_destino ** 2 - util ** 2
+    util_origen = plan.utilizacion(plan.carga[origen] - residuo)[origen]
+    delta += util_origen ** 2 - util[origen] ** 2
+
+    # Camiones usados: el destino puede estrenar un camión y el origen liberarlo
+    camion_destino = np.arange(len(plan.carga)) // plan.num_turnos
+    camion_origen = origen // plan.num_turnos
+    estrena = plan.rutas_camion[camion_destino] == 0
+    libera = (plan.rutas_camion[camion_origen] == 1) & (camion_destino != camion_origen)
+    delta += PESO_CAMION * (estrena.astype(np.float64) - libera)
+
+    delta = np.where(destinos, delta, np.inf)
+    destino = int(np.argmin(delta))
+    return destino, float(delta[destino])
+
+
+def _mejor_intercambio(plan, j, rutas):
+    """Mejor ruta con la que intercambiar slot a j y la variación de costo"""
+    inst = plan.inst
+    a = plan.slot_de_ruta[j]
+    otros = rutas[plan.slot_de_ruta[rutas] != a]
+    if not len(otros):
+        return None, 0.0
+    b = plan.slot_de_ruta[otros]
+    diferencia = inst.residuos[otros] - inst.residuos[j]  # carga que gana a
+
+    factibles = (
+        plan.permitidos[j, b] & plan.permitidos[otros, a]
+        & (plan.carga[a] + diferencia <= plan.capacidad[a] + 1e-9)
+        & (plan.carga[b] - diferencia <= plan.capacidad[b] + 1e-9)
+    )
+    if not factibles.any():
+        return None, 0.0
+
+    capacidad_a = max(plan.capacidad_total[a], 1e-9)
+    util_a = (plan.carga_fija[a] + plan.carga[a]) / capacidad_a
+    util_a_nueva = util_a + diferencia / capacidad_a
+    util_b = plan.utilizacion(plan.carga)[b]
+    util_b_nueva = util_b - diferencia / np.maximum(plan.capacidad_total[b], 1e-9)
+    delta = util_a_nueva ** 2 - util_a ** 2 + util_b_nueva ** 2 - util_b ** 2
+
+    delta = np.where(factibles, delta, np.inf)
+    k = int(np.argmin(delta))
+    return int(otros[k]), float(delta[k])
+
+
+def busqueda_local(plan, tiempo_max_s=0.2, max_pasadas=20):
+    """
+    Aplica reubicaciones e intercambios que mejoran el costo hasta un óptimo
+    local, el límite de pasadas o el presupuesto de tiempo.
+
+    Returns:
+        dict: 'camiones_usados', 'movimientos', 'pasadas', 'costo_inicial'
+            y 'costo_final'
+    """
+    inicio = time.perf_counter()
+    costo_inicial = plan.costo()
+    rutas = np.flatnonzero(plan.slot_de_ruta >= 0)
+    # Primero las rutas de los camiones con menos carga (candidatos a liberar)
+    movimientos = pasadas = 0
+
+    while pasadas < max_pasadas and time.perf_counter() - inicio < tiempo_max_s:
+        pasadas += 1
+        mejoras = 0
+        orden = rutas[np.argsort(plan.rutas_camion[plan.slot_de_ruta[rutas] // plan.num_turnos], kind='stable')]
+        for j in orden:
+            if time.perf_counter() - inicio >= tiempo_max_s:
+                break
+            destino, delta = _mejor_reubicacion(plan, j)
+            if destino is not None and delta < -1e-9:
+                plan.retirar(j)
+                plan.asignar(j, destino)
+                mejoras += 1
+                continue
+            otra, delta = _mejor_intercambio(plan, j, rutas)
+            if otra is not None and delta < -1e-9:
+                a, b = plan.slot_de_ruta[j], plan.slot_de_ruta[otra]
+                plan.retirar(j)
+                plan.retirar(otra)
+                plan.asignar(j, b)
+                plan.asignar(otra, a)
+                mejoras += 1
+        movimientos += mejoras
+        if not mejoras:
+            break
+
+    return {
+        'camiones_usados': int(np.count_nonzero(plan.rutas_camion)),
+        'movimientos': movimientos,
+        'pasadas': pasadas,
+        'costo_inicial': float(costo_inicial),
+        'costo_final': float(plan.costo()),
+    }
+
+
+def resolver_heuristica(instancia, tiempo_max_s=0.2):
+    """
+    Plan factible rápido para las rutas pendientes de la instancia.
+
+    Returns:
+        tuple: (asignaciones (camión, ruta, turno) sin las fijas, informe de
+            la búsqueda local)
+
+    Raises:
+        InstanciaInfactible: si el best-fit no logra ubicar todas las rutas
+    """
+    plan = best_fit_decreciente(instancia)
+    informe = busqueda_local(plan, tiempo_max_s=tiempo_max_s)
+    logger.info(
+        f"Heurística: {informe['movimientos']} movimientos en {informe['pasadas']} pasadas, "
+        f"{informe['camiones_usados']} camiones usados"
+    )
+    return plan.asignaciones(), informe
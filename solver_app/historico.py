@@ -0,0 +1,314 @@
+"""
+Histórico de operaciones del dataton y sus resúmenes materializados.
+
+load_data guarda cada viaje en OperacionHistorica y mantiene tres resúmenes:
+
+    - ResumenPlacaTurnoDia: viajes, toneladas y carga máxima por placa,
+      turno y día
+    - ResumenPlacaSemana: lo mismo por placa y semana
+    - ResumenTurnoDiaSemana: lo mismo por turno y día de la semana, con los
+      días distintos observados (para promedios diarios)
+
+En una carga completa los resúmenes se recalculan con GROUP BY en la base de
+datos (ResumenPlacaTurnoDia desde el histórico y los otros dos desde ese
+resumen). En la ingesta incremental cada bloque de filas nuevas se agrega con
+pandas y se suma a las filas de resumen existentes. Las consultas de
+capacidad (la flota de load_data), demanda por turno y uso de la flota (la
+página de camiones) leen solo los resúmenes: su costo no depende del tamaño
+del histórico.
+"""
+
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Sum, Value
+from django.db.models.functions import ExtractIsoWeekDay, TruncWeek
+
+from solver_app.models import (
+    OperacionHistorica, ResumenPlacaSemana, ResumenPlacaTurnoDia, ResumenTurnoDiaSemana,
+)
+
+logger = logging.getLogger(__name__)
+
+# Columnas normalizadas del dataton (solver_app.dataset) que se guardan
+COLUMNAS = [
+    'NRO_REGISTRO', 'FECHA_CORTE', 'DIA_RECORRIDO', 'SEMANA_RECORRIDO', 'TURNO',
+    'CONDUCTOR', 'PLACA', 'NRO_BOLETA', 'CANTIDAD',
+]
+
+CAMPOS_RESUMEN = ['viajes', 'toneladas', 'max_toneladas']
+
+TAMANO_LOTE = 2_000
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+def _sql_insercion():
+    """
+    INSERT ... ON CONFLICT DO UPDATE de OperacionHistorica (misma sintaxis en
+    SQLite y PostgreSQL).
+    """
+    opciones = OperacionHistorica._meta
+    q = connection.ops.quote_name
+    columnas = [campo.column for campo in opciones.fields]
+    clave = opciones.pk.column
+    actualizar = ', '.join(f'{q(c)} = excluded.{q(c)}' for c in columnas if c != clave)
+    return (
+        f"INSERT INTO {q(opciones.db_table)} ({', '.join(q(c) for c in columnas)}) "
+        f"VALUES ({', '.join(['%s'] * len(columnas))}) "
+        f"ON CONFLICT ({q(clave)}) DO UPDATE SET {actualizar}"
+    )
+
+
+def guardar_operaciones(bloque, tamano_lote=TAMANO_LOTE):
+    """
+    Inserta (o actualiza por NRO_REGISTRO) un bloque normalizado del dataton.
+
+    Se usa executemany en lugar de bulk_create: con millones de filas el
+    costo de armar una instancia y compilar su INSERT por fila domina la
+    carga.
+
+    Returns:
+        int: filas escritas
+    """
+    boletas = bloque['NRO_BOLETA']
+    columnas = {
+        'nro_registro': bloque['NRO_REGISTRO'].tolist(),
+        'fecha_corte': bloque['FECHA_CORTE'].dt.strftime('%Y-%m-%d').tolist(),
+        'dia_recorrido': bloque['DIA_RECORRIDO'].dt.strftime('%Y-%m-%d').tolist(),
+        'semana_recorrido': bloque['SEMANA_RECORRIDO'].tolist(),
+        'turno': bloque['TURNO'].astype(str).tolist(),
+        'placa': bloque['PLACA'].astype(str).tolist(),
+        'conductor': bloque['CONDUCTOR'].astype(object).where(bloque['CONDUCTOR'].notna(), '').tolist(),
+        'nro_boleta': boletas.astype(object).where(boletas.notna(), None).tolist(),
+        'cantidad_t': bloque['CANTIDAD'].tolist(),
+    }
+    filas = list(zip(*(columnas[campo.name] for campo in OperacionHistorica._meta.fields)))
+    sql = _sql_insercion()
+    with transaction.atomic(), connection.cursor() as cursor:
+        for inicio in range(0, len(filas), tamano_lote):
+            cursor.executemany(sql, filas[inicio:inicio + tamano_lote])
+    return len(filas)
+
+
+def registrar(bloques, tamano_lote=TAMANO_LOTE, acumular=False):
+    """
+    Guarda en el histórico cada bloque mientras se itera.
+
+    Args:
+        bloques: DataFrames normalizados con las COLUMNAS
+        acumular: sumar cada bloque a los resúmenes (ingesta incremental)
+    """
+    for bloque in bloques:
+        guardar_operaciones(bloque, tamano_lote)
+        if acumular:
+            acumular_resumenes(bloque)
+        yield bloque
+
+
+def vaciar():
+    """Elimina el histórico y los resúmenes (antes de una carga completa)"""
+    with transaction.atomic():
+        for modelo in (OperacionHistorica, ResumenPlacaTurnoDia, ResumenPlacaSemana, ResumenTurnoDiaSemana):
+            modelo.objects.all().delete()
+
+
+def _agregar(df, claves):
+    return (
+        df.groupby(claves, observed=True)['CANTIDAD']
+        .agg(viajes='size', toneladas='sum', max_toneladas='max')
+        .reset_index()
+    )
+
+
+def _sumar(modelo, claves, agregado, dias_nuevos=None):
+    """
+    Suma un agregado de pandas a las filas de resumen existentes.
+
+    Args:
+        claves: campos que identifican la fila (columnas de `agregado`)
+        dias_nuevos: Counter clave -> días no vistos antes (solo para
+            ResumenTurnoDiaSemana)
+    """
+    filtro = {f'{clave}__in': set(agregado[clave].tolist()) for clave in claves}
+    existentes = {
+        tuple(getattr(fila, clave) for clave in claves): fila
+        for fila in modelo.objects.filter(**filtro)
+    }
+    filas = []
+    for registro in agregado.itertuples(index=False):
+        clave = tuple(getattr(registro, c) for c in claves)
+        fila = existentes.get(clave) or modelo(**dict(zip(claves, clave)))
+        fila.viajes += int(registro.viajes)
+        fila.toneladas += float(registro.toneladas)
+        fila.max_toneladas = max(fila.max_toneladas, float(registro.max_toneladas))
+        if dias_nuevos is not None:
+            fila.dias += dias_nuevos[clave]
+        filas.append(fila)
+    campos = CAMPOS_RESUMEN + (['dias'] if dias_nuevos is not None else [])
+    modelo.objects.bulk_create(
+        filas, update_conflicts=True, unique_fields=claves, update_fields=campos,
+    )
+
+
+def acumular_resumenes(bloque):
+    """Suma un bloque de operaciones nuevas a los tres resúmenes"""
+    # pandas se importa aquí: las vistas usan las consultas de este módulo y
+    # los procesos web no deben cargarlo (ver solver_app.motores)
+    import pandas as pd
+
+    if not len(bloque):
+        return
+    fechas = bloque['DIA_RECORRIDO']
+    df = pd.DataFrame({
+        'placa': bloque['PLACA'].astype(str),
+        'turno': bloque['TURNO'].astype(str),
+        'dia': fechas.dt.date,
+        'semana': (fechas - pd.to_timedelta(fechas.dt.dayofweek, unit='D')).dt.date,
+        'dia_semana': fechas.dt.dayofweek,
+        'CANTIDAD': bloque['CANTIDAD'],
+    })
+
+    with transaction.atomic():
+        # Días que un turno aún no tenía: se cuentan antes de actualizar el
+        # resumen diario, que es donde quedan registrados
+        pares = set(zip(df['turno'], df['dia']))
+        conocidos = set(
+            ResumenPlacaTurnoDia.objects
+            .filter(dia__in={dia for _, dia in pares})
+            .values_list('turno', 'dia').distinct()
+        )
+        dias_nuevos = Counter((turno, dia.weekday()) for turno, dia in pares - conocidos)
+
+        _sumar(ResumenPlacaTurnoDia, ['placa', 'turno', 'dia'], _agregar(df, ['placa', 'turno', 'dia']))
+        _sumar(ResumenPlacaSemana, ['placa', 'semana'], _agregar(df, ['placa', 'semana']))
+        _sumar(ResumenTurnoDiaSemana, ['turno', 'dia_semana'], _agregar(df, ['turno', 'dia_semana']), dias_nuevos)
+
+
+def reconstruir_resumenes(tamano_lote=TAMANO_LOTE):
+    """
+    Recalcula los tres resúmenes desde el histórico con GROUP BY.
+
+    Returns:
+        dict: filas de cada resumen
+    """
+    with transaction.atomic():
+        for modelo in (ResumenPlacaTurnoDia, ResumenPlacaSemana, ResumenTurnoDiaSemana):
+            modelo.objects.all().delete()
+
+        diario = (
+            OperacionHistorica.objects
+            .values('placa', 'turno', 'dia_recorrido')
+            .annotate(viajes=Count('pk'), toneladas=Sum('cantidad_t'), max_toneladas=Max('cantidad_t'))
+            .order_by()
+        )
+        ResumenPlacaTurnoDia.objects.bulk_create(
+            (
+                ResumenPlacaTurnoDia(
+                    placa=fila['placa'], turno=fila['turno'], dia=fila['dia_recorrido'],
+                    viajes=fila['viajes'], toneladas=fila['toneladas'],
+                    max_toneladas=fila['max_toneladas'],
+                )
+                for fila in diario.iterator(chunk_size=tamano_lote)
+            ),
+            batch_size=tamano_lote,
+        )
+
+        # Los otros dos resúmenes se derivan del diario, mucho más chico
+        totales = {
+            'viajes': Sum('viajes'), 'toneladas': Sum('toneladas'), 'max_toneladas': Max('max_toneladas'),
+        }
+        semanal = (
+            ResumenPlacaTurnoDia.objects
+            .values('placa', semana=TruncWeek('dia'))
+            .annotate(**totales)
+            .order_by()
+        )
+        ResumenPlacaSemana.objects.bulk_create(
+            (ResumenPlacaSemana(**fila) for fila in semanal.iterator(chunk_size=tamano_lote)),
+            batch_size=tamano_lote,
+        )
+        por_dia_semana = (
+            ResumenPlacaTurnoDia.objects
+            .values('turno', dia_semana=ExtractIsoWeekDay('dia') - Value(1))
+            .annotate(dias=Count('dia', distinct=True), **totales)
+            .order_by()
+        )
+        ResumenTurnoDiaSemana.objects.bulk_create(
+            (ResumenTurnoDiaSemana(**fila) for fila in por_dia_semana),
+            batch_size=tamano_lote,
+        )
+
+    conteos = {
+        'placa_turno_dia': ResumenPlacaTurnoDia.objects.count(),
+        'placa_semana': ResumenPlacaSemana.objects.count(),
+        'turno_dia_semana': ResumenTurnoDiaSemana.objects.count(),
+    }
+    logger.info(f"Resúmenes del histórico reconstruidos: {conteos}")
+    return conteos
+
+
+# --- Consultas ---
+
+def capacidades_estimadas():
+    """dict placa -> carga máxima registrada, en toneladas"""
+    return dict(
+        ResumenPlacaSemana.objects.values('placa')
+        .annotate(maximo=Max('max_toneladas'))
+        .order_by()
+        .values_list('placa', 'maximo')
+    )
+
+
+def perfil_demanda():
+    """
+    Demanda por turno y día de la semana.
+
+    Returns:
+        list[dict]: 'turno', 'dia_semana' (0 = lunes), 'nombre_dia', 'viajes',
+            'toneladas', 'dias' y 'toneladas_por_dia'
+    """
+    return [
+        {
+            'turno': fila.turno,
+            'dia_semana': fila.dia_semana,
+            'nombre_dia': DIAS_SEMANA[fila.dia_semana],
+            'viajes': fila.viajes,
+            'toneladas': fila.toneladas,
+            'dias': fila.dias,
+            'toneladas_por_dia': fila.toneladas / fila.dias if fila.dias else 0.0,
+        }
+        for fila in ResumenTurnoDiaSemana.objects.order_by('dia_semana', 'turno')
+    ]
+
+
+def uso_flota(desde=None, hasta=None):
+    """
+    Camiones activos, viajes y toneladas por día.
+
+    Args:
+        desde, hasta: rango de fechas (inclusive) opcional
+
+    Returns:
+        list[dict]: 'dia', 'camiones', 'viajes' y 'toneladas'
+    """
+    filas = ResumenPlacaTurnoDia.objects.all()
+    if desde is not None:
+        filas = filas.filter(dia__gte=desde)
+    if hasta is not None:
+        filas = filas.filter(dia__lte=hasta)
+    return list(
+        filas.values('dia')
+        .annotate(camiones=Count('placa', distinct=True), viajes=Sum('viajes'), toneladas=Sum('toneladas'))
+        .order_by('dia')
+    )
+
+
+def uso_flota_reciente(dias=14):
+    """uso_flota() de los últimos `dias` días con operaciones registradas"""
+    ultimo = ResumenPlacaTurnoDia.objects.aggregate(ultimo=Max('dia'))['ultimo']
+    if ultimo is None:
+        return []
+    return uso_flota(desde=ultimo - timedelta(days=dias - 1))
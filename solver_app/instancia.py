@@ -0,0 +1,539 @@
+"""
+Representación vectorizada de una instancia del problema de asignación.
+
+Los datos de Ruta y Camion se cargan una sola vez en arreglos NumPy
+(capacidades, residuos, distancias y una máscara de pares permitidos) y el
+modelo MIP se emite directamente desde esos arreglos como un MPModelProto,
+sin bucles anidados camión × ruta × turno ni diccionarios indexados por
+(placa, id_zona_barrido, turno). Variables y restricciones se codifican en
+bloque en el formato binario del proto, sin una llamada de Python por
+variable ni por término. Si la versión instalada de OR-Tools cambia el
+esquema de los campos que se codifican a mano, el modelo se arma con la API
+de protobuf (más lento, mismo modelo).
+"""
+
+import logging
+
+import numpy as np
+from google.protobuf.descriptor import FieldDescriptor
+from ortools.linear_solver import linear_solver_pb2
+
+logger = logging.getLogger(__name__)
+
+
+class InstanciaInfactible(Exception):
+    """La instancia no admite ninguna asignación que cubra todas las rutas"""
+
+
+class Instancia:
+    """
+    Datos de una instancia en arreglos NumPy.
+
+    Atributos:
+        capacidades: capacidad_kg por camión, shape (C,)
+        residuos: residuos_kg por ruta, shape (R,)
+        distancias: distancia_km por ruta, shape (R,)
+        sectores: id_sector por ruta, shape (R,)
+        mascara: pares (camión, ruta, turno) que pueden asignarse,
+            shape (C, R, T). Las etapas previas al modelo la restringen.
+        capacidad_restante: capacidad libre de cada slot (camión, turno),
+            shape (C, T)
+        cupo: rutas que aún admite cada slot (camión, turno), shape (C, T)
+        emitir_capacidad: slots cuya restricción de capacidad sigue siendo
+            necesaria en el modelo, shape (C, T)
+        rutas_pendientes: rutas que el modelo todavía debe cubrir, shape (R,)
+        fijas: asignaciones (camión, ruta, turno) ya decididas fuera del modelo
+        cadenas_simetria: lista de (turno, [camiones...]) con slots idénticos
+            cuyo uso se ordena para romper simetrías
+    """
+
+    def __init__(self, rutas, camiones, turnos, rutas_por_turno=1):
+        self.rutas = list(rutas)
+        self.camiones = list(camiones)
+        self.turnos = list(turnos)
+        self.rutas_por_turno = rutas_por_turno
+
+        self.capacidades = np.array([float(c.capacidad_kg) for c in self.camiones], dtype=np.float64)
+        self.residuos = np.array([float(r.residuos_kg) for r in self.rutas], dtype=np.float64)
+        self.distancias = np.array([float(r.distancia_km) for r in self.rutas], dtype=np.float64)
+        self.sectores = np.array([r.id_sector for r in self.rutas], dtype=np.int64)
+        self.mascara = np.ones((self.num_camiones, self.num_rutas, self.num_turnos), dtype=bool)
+
+        self.capacidad_restante = np.repeat(self.capacidades[:, np.newaxis], self.num_turnos, axis=1)
+        self.cupo = np.full((self.num_camiones, self.num_turnos), rutas_por_turno, dtype=np.int64)
+        self.emitir_capacidad = np.ones((self.num_camiones, self.num_turnos), dtype=bool)
+        self.rutas_pendientes = np.ones(self.num_rutas, dtype=bool)
+        self.fijas = []
+        self.cadenas_simetria = []
+
+    @property
+    def num_camiones(self):
+        return len(self.camiones)
+
+    @property
+    def num_rutas(self):
+        return len(self.rutas)
+
+    @property
+    def num_turnos(self):
+        return len(self.turnos)
+
+    def compatibilidad_capacidad(self):
+        """Matriz (C, R): True si la ruta cabe en el camión en un solo viaje"""
+        return self.residuos[np.newaxis, :] <= self.capacidades[:, np.newaxis]
+
+    def fijar(self, i, j, t):
+        """
+        Decide la asignación (camión i, ruta j, turno t) fuera del modelo y
+        actualiza la capacidad y el cupo del slot.
+        """
+        self.fijas.append((i, j, t))
+        self.rutas_pendientes[j] = False
+        self.mascara[:, j, :] = False
+        self.cupo[i, t] -= 1
+        self.capacidad_restante[i, t] -= self.residuos[j]
+        if self.cupo[i, t] <= 0:
+            self.mascara[i, :, t] = False
+        else:
+            self.mascara[i, self.residuos > self.capacidad_restante[i, t], t] = False
+
+
+def dimensiones_modelo(instancia):
+    """
+    Número de variables y restricciones que ConstructorModelo emitiría para
+    la instancia en su estado actual, sin construir el modelo.
+
+    Returns:
+        dict: 'variables' y 'restricciones'
+    """
+    ocupados = instancia.mascara.any(axis=1)  # slots (C, T) con algún par
+    simetria = sum(len(camiones) - 1 for _, camiones in instancia.cadenas_simetria)
+    return {
+        'variables': int(instancia.mascara.sum()),
+        'restricciones': int(
+            instancia.rutas_pendientes.sum()
+            + (ocupados & instancia.emitir_capacidad).sum()
+            + ocupados.sum()
+            + simetria
+        ),
+    }
+
+
+def _agrupar(claves, num_grupos):
+    """
+    Agrupa índices de variables por clave.
+
+    Returns:
+        tuple: (orden, limites) tal que orden[limites[g]:limites[g + 1]] son
+            los índices de variables con clave g
+    """
+    orden = np.argsort(claves, kind='stable')
+    limites = np.concatenate(([0], np.cumsum(np.bincount(claves, minlength=num_grupos))))
+    return orden, limites
+
+
+# --- Codificación del MPModelProto ---
+#
+# Variables y filas de restricciones se escriben directamente en el formato
+# binario de protobuf desde los arreglos y se cargan con MergeFromString:
+# agregarlas una por una con .add() cuesta una llamada de Python por
+# variable, que domina la construcción en instancias grandes.
+
+# Variables o términos de restricciones codificados por llamada a MergeFromString
+TERMINOS_POR_BLOQUE = 500_000
+
+# Tipos de campo del formato binario de protobuf
+_VARINT, _I64, _LEN = 0, 1, 2
+
+# Campos que se escriben a mano: (mensaje, campo, número, tipo, repetido).
+# Todos los números son menores a 16, así que cada etiqueta ocupa un byte, y
+# var_index y coefficient se escriben empaquetados
+_ESQUEMA = (
+    (linear_solver_pb2.MPModelProto, 'variable', 3, FieldDescriptor.TYPE_MESSAGE, True),
+    (linear_solver_pb2.MPModelProto, 'constraint', 4, FieldDescriptor.TYPE_MESSAGE, True),
+    (linear_solver_pb2.MPVariableProto, 'lower_bound', 1, FieldDescriptor.TYPE_DOUBLE, False),
+    (linear_solver_pb2.MPVariableProto, 'upper_bound', 2, FieldDescriptor.TYPE_DOUBLE, False),
+    (linear_solver_pb2.MPVariableProto, 'objective_coefficient', 3, FieldDescriptor.TYPE_DOUBLE, False),
+    (linear_solver_pb2.MPVariableProto, 'is_integer', 4, FieldDescriptor.TYPE_BOOL, False),
+    (linear_solver_pb2.MPConstraintProto, 'lower_bound', 2, FieldDescriptor.TYPE_DOUBLE, False),
+    (linear_solver_pb2.MPConstraintProto, 'upper_bound', 3, FieldDescriptor.TYPE_DOUBLE, False),
+    (linear_solver_pb2.MPConstraintProto, 'name', 4, FieldDescriptor.TYPE_STRING, False),
+    (linear_solver_pb2.MPConstraintProto, 'var_index', 6, FieldDescriptor.TYPE_INT32, True),
+    (linear_solver_pb2.MPConstraintProto, 'coefficient', 7, FieldDescriptor.TYPE_DOUBLE, True),
+)
+
+
+def _repetido(campo):
+    if hasattr(campo, 'is_repeated'):
+        return campo.is_repeated
+    return campo.label == FieldDescriptor.LABEL_REPEATED
+
+
+def esquema_compatible(esquema=_ESQUEMA):
+    """
+    Indica si los descriptores del MPModelProto instalado coinciden con los
+    campos que codifica este módulo (número, tipo, cardinalidad y, para los
+    repetidos numéricos, empaquetado).
+    """
+    for mensaje, nombre, numero, tipo, repetido in esquema:
+        campo = mensaje.DESCRIPTOR.fields_by_name.get(nombre)
+        if campo is None or campo.number != numero or campo.type != tipo or _repetido(campo) != repetido:
+            return False
+        if repetido and tipo != FieldDescriptor.TYPE_MESSAGE and not getattr(campo, 'is_packed', True):
+            return False
+    return True
+
+
+CODIFICACION_BINARIA = esquema_compatible()
+if not CODIFICACION_BINARIA:
+    logger.warning(
+        "El esquema de MPModelProto de esta versión de OR-Tools no coincide con la codificación "
+        "binaria; el modelo se construye con la API de protobuf"
+    )
+
+
+def _etiqueta(numero, tipo):
+    """Byte de etiqueta de un campo con número menor a 16"""
+    return bytes([numero << 3 | tipo])
+
+
+_VARIABLE = _etiqueta(3, _LEN)
+_RESTRICCION = _etiqueta(4, _LEN)
+_VAR_INFERIOR = _etiqueta(1, _I64)
+_VAR_SUPERIOR = _etiqueta(2, _I64)
+_VAR_OBJETIVO = _etiqueta(3, _I64)
+_VAR_ENTERA = _etiqueta(4, _VARINT)
+_RES_INFERIOR = _etiqueta(2, _I64)
+_RES_SUPERIOR = _etiqueta(3, _I64)
+_RES_NOMBRE = _etiqueta(4, _LEN)
+_RES_INDICES = _etiqueta(6, _LEN)
+_RES_COEFICIENTES = _etiqueta(7, _LEN)
+
+# Registro de una variable binaria: etiqueta y largo del mensaje, cotas 0-1,
+# costo e integralidad (29 bytes, así que el largo ocupa un byte)
+_REGISTRO_VARIABLE = np.dtype([
+    ('etiqueta', 'u1'), ('largo', 'u1'),
+    ('e_inferior', 'u1'), ('inferior', '<f8'),
+    ('e_superior', 'u1'), ('superior', '<f8'),
+    ('e_objetivo', 'u1'), ('objetivo', '<f8'),
+    ('e_entera', 'u1'), ('entera', 'u1'),
+])
+
+
+# Bits de continuación y bytes usados por un varint de 1 a 4 bytes
+_CONTINUACION = np.array([0, 0x80, 0x8080, 0x808080], dtype=np.uint32)
+_BYTES_USADOS = np.arange(4) < np.arange(1, 5)[:, np.newaxis]
+
+
+def _varint(numero):
+    """Entero no negativo en formato varint"""
+    salida = bytearray()
+    while numero > 0x7F:
+        salida.append(numero & 0x7F | 0x80)
+        numero >>= 7
+    salida.append(numero)
+    return bytes(salida)
+
+
+def _varints(valores):
+    """
+    Codifica índices de variables (enteros de 0 a 2^28 - 1, hasta 4 bytes
+    cada uno) como varints, vectorizado.
+
+    Returns:
+        tuple: (bytes uint8 concatenados, posición inicial de cada valor,
+            con una posición final extra)
+    """
+    valores = np.asarray(valores, dtype=np.uint32)
+    if len(valores) and valores.max() >= 1 << 28:
+        raise OverflowError("El modelo supera el máximo de 2^28 variables")
+    largos = 1 + (valores >= 1 << 7).astype(np.int64) + (valores >= 1 << 14) + (valores >= 1 << 21)
+    # Los grupos de 7 bits de cada valor pasan a un byte cada uno (en orden
+    # little-endian), con el bit de continuación en todos salvo el último
+    grupos = (
+        (valores & 0x7F) | ((valores << 1) & 0x7F00)
+        | ((valores << 2) & 0x7F0000) | ((valores << 3) & 0x7F000000)
+    )
+    grupos |= _CONTINUACION[largos - 1]
+    bytes_valor = grupos.astype('<u4', copy=False).view(np.uint8).reshape(-1, 4)
+    return bytes_valor[_BYTES_USADOS[largos - 1]], np.concatenate(([0], np.cumsum(largos)))
+
+
+def _codificar_variables(costos):
+    """Variables binarias con coeficiente de objetivo `costos`, como bytes de MPModelProto"""
+    registros = np.empty(len(costos), dtype=_REGISTRO_VARIABLE)
+    registros['etiqueta'] = _VARIABLE[0]
+    registros['largo'] = _REGISTRO_VARIABLE.itemsize - 2
+    registros['e_inferior'], registros['inferior'] = _VAR_INFERIOR[0], 0.0
+    registros['e_superior'], registros['superior'] = _VAR_SUPERIOR[0], 1.0
+    registros['e_objetivo'], registros['objetivo'] = _VAR_OBJETIVO[0], costos
+    registros['e_entera'], registros['entera'] = _VAR_ENTERA[0], 1
+    return registros.tobytes()
+
+
+def _codificar_filas(grupos, coeficientes, inferiores, superiores, nombres=None):
+    """
+    Restricciones lineales como bytes de MPModelProto.
+
+    Índices y coeficientes de toda la familia se codifican juntos; cada fila
+    solo agrega su encabezado (cotas y largos).
+
+    Args:
+        grupos: lista de arreglos con los índices de variables de cada fila
+        coeficientes: arreglo con el coeficiente de cada variable (indexado
+            por variable, el mismo en todas las filas) o lista con los
+            coeficientes de cada fila, alineada con grupos
+        inferiores, superiores: cotas de cada fila
+        nombres: lista opcional con el nombre de cada fila
+    """
+    if not grupos:
+        return b''
+    variables = np.concatenate(grupos)
+    if isinstance(coeficientes, np.ndarray):
+        coeficientes = coeficientes[variables]
+    else:
+        coeficientes = np.concatenate(coeficientes)
+    coeficientes = coeficientes.astype('<f8').tobytes()
+    indices, posiciones = _varints(variables)
+    indices = indices.tobytes()
+    limites = np.concatenate(([0], np.cumsum([len(g) for g in grupos])))
+    desde_indices = posiciones[limites].tolist()
+    desde_coeficientes = (limites * 8).tolist()
+    cotas = np.column_stack((inferiores, superiores)).astype('<f8')
+
+    filas = []
+    for k, (inferior, superior) in enumerate(cotas):
+        fila_indices = indices[desde_indices[k]:desde_indices[k + 1]]
+        fila_coeficientes = coeficientes[desde_coeficientes[k]:desde_coeficientes[k + 1]]
+        cuerpo = b''.join((
+            _RES_INFERIOR, inferior.tobytes(), _RES_SUPERIOR, superior.tobytes(),
+            _RES_INDICES, _varint(len(fila_indices)), fila_indices,
+            _RES_COEFICIENTES, _varint(len(fila_coeficientes)), fila_coeficientes,
+        ))
+        if nombres is not None:
+            nombre = nombres[k].encode()
+            cuerpo += _RES_NOMBRE + _varint(len(nombre)) + nombre
+        filas.append(_RESTRICCION + _varint(len(cuerpo)) + cuerpo)
+    return b''.join(filas)
+
+
+def _agregar_variables(proto, costos):
+    """Variables binarias con la API de protobuf (sin codificación binaria)"""
+    for costo in costos.tolist():
+        proto.variable.add(lower_bound=0.0, upper_bound=1.0, objective_coefficient=costo, is_integer=True)
+
+
+def _agregar_filas(proto, grupos, coeficientes, inferiores, superiores, nombres=None):
+    """Restricciones con la API de protobuf; mismos argumentos que _codificar_filas"""
+    for k, grupo in enumerate(grupos):
+        fila = proto.constraint.add(lower_bound=float(inferiores[k]), upper_bound=float(superiores[k]))
+        fila.var_index.extend(grupo.tolist())
+        valores = coeficientes[grupo] if isinstance(coeficientes, np.ndarray) else coeficientes[k]
+        fila.coefficient.extend(np.asarray(valores, dtype=np.float64).tolist())
+        if nombres is not None:
+            fila.name = nombres[k]
+
+
+class ConstructorModelo:
+    """
+    Emite el modelo MIP de una Instancia como MPModelProto.
+
+    Cada variable binaria x[i, j, t] corresponde a un par permitido de la
+    máscara; sus índices quedan en var_camion, var_ruta y var_turno, de modo
+    que la solución se interpreta con indexación de arreglos. Variables y
+    familias de restricciones se codifican en bloque desde esos arreglos
+    (ver _codificar_variables y _codificar_filas).
+    """
+
+    def __init__(self, instancia, con_nombres=False):
+        self.instancia = instancia
+        self.con_nombres = con_nombres
+        self.proto = linear_solver_pb2.MPModelProto()
+        self.var_camion = self.var_ruta = self.var_turno = None
+
+    @property
+    def num_variables(self):
+        return len(self.proto.variable)
+
+    @property
+    def num_restricciones(self):
+        return len(self.proto.constraint)
+
+    def crear_variables(self):
+        """
+        Una variable binaria por cada par (camión, ruta, turno) permitido.
+
+        El coeficiente de cada variable en el objetivo (distancia_km de la
+        ruta) va en el mismo registro, así que se emite aquí.
+        """
+        inst = self.instancia
+        self.var_camion, self.var_ruta, self.var_turno = np.nonzero(inst.mascara)
+        costos = inst.distancias[self.var_ruta]
+        if CODIFICACION_BINARIA:
+            for inicio in range(0, len(costos), TERMINOS_POR_BLOQUE):
+                self.proto.MergeFromString(_codificar_variables(costos[inicio:inicio + TERMINOS_POR_BLOQUE]))
+        else:
+            _agregar_variables(self.proto, costos)
+
+        if self.con_nombres:
+            for variable, i, j, t in zip(self.proto.variable, self.var_camion, self.var_ruta, self.var_turno):
+                variable.name = f"x_{inst.camiones[i].placa}_{inst.rutas[j].id_zona_barrido}_{inst.turnos[t]}"
+
+    def agregar_funcion_objetivo(self):
+        """
+        Minimizar la distancia total: c_x = distancia_km de la ruta (ya
+        emitido con las variables) más la constante de las rutas fijadas
+        """
+        inst = self.instancia
+        self.proto.objective_offset = float(sum(inst.distancias[j] for _, j, _ in inst.fijas))
+        self.proto.maximize = False
+
+    def agregar_restricciones(self):
+        """
+        Emite las familias de restricciones a partir de los arreglos.
+
+        Returns:
+            dict: número de restricciones agregadas por familia
+        """
+        inst = self.instancia
+        num_variables = len(self.var_ruta)
+        unos = np.broadcast_to(1.0, num_variables)  # Sin reservar memoria
+        nombres = self.con_nombres
+
+        # Restricción 1: cada ruta pendiente cubierta exactamente una vez
+        orden, limites = _agrupar(self.var_ruta, inst.num_rutas)
+        pendientes = np.flatnonzero(inst.rutas_pendientes)
+        grupos = [orden[limites[j]:limites[j + 1]] for j in pendientes]
+        self._agregar_familia(
+            grupos, unos, np.ones(len(grupos)), np.ones(len(grupos)),
+            [f"cobertura_{inst.rutas[j].id_zona_barrido}" for j in pendientes] if nombres else None,
+        )
+
+        # Restricciones 2 y 3 se indexan por slot (camión, turno); los slots
+        # sin variables no necesitan restricciones
+        slots = self.var_camion * inst.num_turnos + self.var_turno
+        orden, limites = _agrupar(slots, inst.num_camiones * inst.num_turnos)
+        ocupados = np.flatnonzero(np.diff(limites))
+        grupos = {s: orden[limites[s]:limites[s + 1]] for s in ocupados.tolist()}
+        slot_camion, slot_turno = np.divmod(ocupados, inst.num_turnos)
+        cargas = inst.residuos[self.var_ruta]
+
+        def nombres_slot(prefijo, seleccion):
+            if not nombres:
+                return None
+            return [
+                f"{prefijo}_{inst.camiones[i].placa}_{inst.turnos[t]}"
+                for i, t in zip(slot_camion[seleccion], slot_turno[seleccion])
+            ]
+
+        # Restricción 2: capacidad de cada camión por turno
+        con_capacidad = inst.emitir_capacidad[slot_camion, slot_turno]
+        filas = [grupos[s] for s in ocupados[con_capacidad].tolist()]
+        capacidad = self._agregar_familia(
+            filas, cargas, np.full(len(filas), -np.inf),
+            inst.capacidad_restante[slot_camion, slot_turno][con_capacidad],
+            nombres_slot('capacidad', con_capacidad),
+        )
+
+        # Restricción 3: máximo de rutas por camión y turno
+        filas = list(grupos.values())
+        todos = np.ones(len(filas), dtype=bool)
+        self._agregar_familia(
+            filas, unos, np.full(len(filas), -np.inf),
+            inst.cupo[slot_camion, slot_turno], nombres_slot('simultaneidad', todos),
+        )
+
+        # Restricción 4: ruptura de simetría entre slots idénticos
+        # (uso del camión k >= uso del camión k + 1 en el mismo turno)
+        vacio = np.arange(num_variables)[:0]
+        filas, coeficientes, nombres_simetria = [], [], []
+        for t, camiones in inst.cadenas_simetria:
+            for a, b in zip(camiones, camiones[1:]):
+                grupo_a = grupos.get(a * inst.num_turnos + t, vacio)
+                grupo_b = grupos.get(b * inst.num_turnos + t, vacio)
+                filas.append(np.concatenate((grupo_a, grupo_b)))
+                coeficientes.append(np.concatenate((np.ones(len(grupo_a)), -np.ones(len(grupo_b)))))
+                nombres_simetria.append(
+                    f"simetria_{inst.camiones[a].placa}_{inst.camiones[b].placa}_{inst.turnos[t]}"
+                )
+        simetria = self._agregar_familia(
+            filas, coeficientes, np.zeros(len(filas)), np.full(len(filas), np.inf),
+            nombres_simetria if nombres else None,
+        )
+
+        return {
+            'cobertura': len(pendientes),
+            'capacidad': capacidad,
+            'simultaneidad': len(grupos),
+            'simetria': simetria,
+        }
+
+    def _agregar_familia(self, grupos, coeficientes, inferiores, superiores, nombres=None):
+        """
+        Agrega una familia de filas al modelo, en bloques de unos
+        TERMINOS_POR_BLOQUE términos para acotar la memoria intermedia.
+
+        Returns:
+            int: filas agregadas
+        """
+        if not CODIFICACION_BINARIA:
+            _agregar_filas(self.proto, grupos, coeficientes, inferiores, superiores, nombres)
+            return len(grupos)
+        terminos = np.cumsum([len(g) for g in grupos])
+        inicio = 0
+        while inicio < len(grupos):
+            previos = terminos[inicio - 1] if inicio else 0
+            fin = max(int(np.searchsorted(terminos, previos + TERMINOS_POR_BLOQUE, side='right')), inicio + 1)
+            self.proto.MergeFromString(_codificar_filas(
+                grupos[inicio:fin],
+                coeficientes if isinstance(coeficientes, np.ndarray) else coeficientes[inicio:fin],
+                inferiores[inicio:fin], superiores[inicio:fin],
+                nombres[inicio:fin] if nombres is not None else None,
+            ))
+            inicio = fin
+        return len(grupos)
+
+    def interpretar_valores(self, valores):
+        """
+        Convierte el vector de valores de la solución en índices de asignación.
+
+        Returns:
+            tuple: arreglos (camion, ruta, turno) de las variables con valor 1,
+                incluyendo las asignaciones fijadas antes de construir el modelo
+        """
+        seleccion = np.asarray(valores) > 0.5
+        fijas = np.array(self.instancia.fijas, dtype=np.int64).reshape(-1, 3)
+        return (
+            np.concatenate((fijas[:, 0], self.var_camion[seleccion])),
+            np.concatenate((fijas[:, 1], self.var_ruta[seleccion])),
+            np.concatenate((fijas[:, 2], self.var_turno[seleccion])),
+        )
+
+    def agregar_pista(self, asignaciones, completa=False):
+        """
+        Sugiere al solver una solución inicial (warm start).
+
+        Args:
+            asignaciones: iterable de tuplas (camión, ruta, turno); las que no
+                tengan variable en el modelo se ignoran
+            completa: las asignaciones forman un plan completo; el resto de
+                variables se sugieren en 0 (el solver no tiene que completar
+                la pista)
+        """
+        inst = self.instancia
+        claves = (self.var_camion * inst.num_rutas + self.var_ruta) * inst.num_turnos + self.var_turno
+        posicion = {int(clave): k for k, clave in enumerate(claves)}
+        indices = [
+            posicion[(i * inst.num_rutas + j) * inst.num_turnos + t]
+            for i, j, t in asignaciones
+            if (i * inst.num_rutas + j) * inst.num_turnos + t in posicion
+        ]
+        if completa:
+            valores = np.zeros(len(claves))
+            valores[indices] = 1.0
+            self.proto.solution_hint.var_index.extend(range(len(claves)))
+            self.proto.solution_hint.var_value.extend(valores.tolist())
+        else:
+            self.proto.solution_hint.var_index.extend(indices)
+            self.proto.solution_hint.var_value.extend([1.0] * len(indices))
+        return len(indices)
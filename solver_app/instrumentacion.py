@@ -0,0 +1,148 @@
+"""
+Instrumentación del solver.
+
+    - medir: acumula el tiempo de una fase en el dict `tiempos` del solver
+    - reiniciar_pico_memoria / memoria_pico_mb: RSS máximo de una ejecución
+    - registrar_ejecucion: guarda las métricas de una resolución en SolverRun
+    - tendencias: promedios diarios por fase para el admin y la API
+
+En Linux el pico de RSS del proceso se reinicia antes de cada ejecución
+(/proc/self/clear_refs), de modo que VmHWM mide solo esa resolución. En otras
+plataformas se usa ru_maxrss, que es el máximo desde el inicio del proceso.
+Con varios trabajos simultáneos en el mismo proceso el pico es compartido.
+"""
+
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db.models import Avg, Count, Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from solver_app.models import SolverRun
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def medir(tiempos, fase):
+    """Suma a tiempos[fase] la duración del bloque, en segundos"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tiempos[fase] = tiempos.get(fase, 0.0) + time.perf_counter() - inicio
+
+
+def reiniciar_pico_memoria():
+    """Reinicia el pico de RSS del proceso (solo Linux)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as archivo:
+            archivo.write('5')
+    except OSError:
+        pass
+
+
+def memoria_pico_mb(incluir_hijos=False):
+    """
+    RSS máximo del proceso en MB (None si no se puede medir).
+
+    Args:
+        incluir_hijos: considerar también los procesos hijos ya terminados
+            (p. ej. el pool del motor 'sectores')
+    """
+    pico_kb = None
+    try:
+        with open('/proc/self/status') as archivo:
+            for linea in archivo:
+                if linea.startswith('VmHWM:'):
+                    pico_kb = int(linea.split()[1])
+                    break
+    except OSError:
+        pass
+
+    if resource is not None:
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        divisor = 1024 if sys.platform == 'darwin' else 1
+        if pico_kb is None:
+            pico_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+        if incluir_hijos:
+            pico_kb = max(pico_kb, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor)
+
+    return None if pico_kb is None else round(pico_kb / 1024, 1)
+
+
+def registrar_ejecucion(solver, parametros, resultados=None, error='', tiempo_total=0.0):
+    """
+    Guarda las métricas de una resolución en SolverRun.
+
+    Un fallo al registrar no debe interrumpir la optimización: se registra
+    en el log y se devuelve None.
+    """
+    try:
+        variables, restricciones = solver.dimensiones_modelo()
+        datos_solver = resultados['solver'] if resultados else None
+        return SolverRun.objects.create(
+            motor=resultados['motor'] if resultados else solver.motor,
+            backend=solver.backend,
+            parametros=parametros,
+            estado=resultados['estado'] if resultados else 'Error',
+            mensaje=error[:255],
+            num_rutas=len(solver.rutas),
+            num_camiones=len(solver.camiones),
+            variables=variables,
+            restricciones=restricciones,
+            objetivo=resultados['distancia_total'] if resultados else None,
+            gap=datos_solver['gap'] if datos_solver else None,
+            tiempo_total=tiempo_total,
+            memoria_pico_mb=memoria_pico_mb(incluir_hijos=True),
+            **{
+                f'tiempo_{fase}': solver.tiempos[fase]
+                for fase in SolverRun.FASES if fase in solver.tiempos
+            },
+        )
+    except Exception as e:
+        logger.warning(f"No se pudo registrar la ejecución del solver: {str(e)}")
+        return None
+
+
+def tendencias(dias=30):
+    """
+    Promedios diarios de las ejecuciones de los últimos `dias` días.
+
+    Returns:
+        list: un dict por día con 'fecha', 'ejecuciones', 'tiempos' (promedio
+            de cada fase), 'tiempo_promedio', 'memoria_max_mb',
+            'variables_promedio' y 'rutas_promedio'
+    """
+    desde = timezone.now() - timedelta(days=dias)
+    # Los alias no pueden coincidir con los campos del modelo
+    promedios = {f'fase_{fase}': Avg(f'tiempo_{fase}') for fase in SolverRun.FASES}
+    filas = (
+        SolverRun.objects.filter(creado_en__gte=desde)
+        .annotate(fecha=TruncDate('creado_en'))
+        .values('fecha')
+        .annotate(
+            ejecuciones=Count('id'),
+            tiempo_promedio=Avg('tiempo_total'),
+            memoria_max_mb=Max('memoria_pico_mb'),
+            variables_promedio=Avg('variables'),
+            rutas_promedio=Avg('num_rutas'),
+            **promedios,
+        )
+        .order_by('fecha')
+    )
+    resultado = []
+    for fila in filas:
+        fila['tiempos'] = {fase: fila.pop(f'fase_{fase}') for fase in SolverRun.FASES}
+        fila['fecha'] = fila['fecha'].isoformat()
+        resultado.append(fila)
+    return resultado
@@ -0,0 +1,401 @@
+"""
+Ejecución de optimizaciones en segundo plano.
+
+Las vistas no resuelven el modelo dentro de la petición: crean un SolverJob y
+lo encolan en un pool local de hilos (sin broker externo). El worker de
+gunicorn queda libre de inmediato y el dashboard consulta el estado del
+trabajo por JSON hasta que termina.
+
+OR-Tools libera el GIL mientras resuelve, por lo que un pool de hilos basta
+para no bloquear al resto de peticiones del proceso.
+
+Con SOLVER_EJECUTOR = 'worker' los procesos web no resuelven: solo insertan
+el SolverJob, y un proceso dedicado (manage.py solver_worker) que carga
+OR-Tools una vez al arrancar toma los trabajos pendientes de esa tabla
+(atender_cola). Así los workers de gunicorn no importan el stack del solver
+(OR-Tools, NumPy, pandas), arrancan antes y ocupan menos memoria.
+
+Durante la resolución un MonitorJob sincroniza el trabajo con la base de
+datos: publica las soluciones incumbentes que informa el solver (las
+consumen el endpoint de estado y el stream de eventos), traslada al solver
+el pedido de aceptar la solución actual (SolverJob.detener_solicitado) y
+registra un latido (SolverJob.latido_en). Un trabajo activo sin latido
+durante SOLVER_LATIDO_VENCIDO_S segundos quedó sin proceso que lo ejecute
+(proceso web reiniciado, worker caído, envío al pool perdido) y
+recuperar_abandonados() lo marca como fallido, para que no bloquee nuevas
+optimizaciones.
+"""
+
+import logging
+import resource
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from solver_app.models import SolverJob
+
+logger = logging.getLogger(__name__)
+
+# Cada cuántos segundos MonitorJob registra el latido del trabajo (muy por
+# debajo de SOLVER_LATIDO_VENCIDO_S)
+INTERVALO_LATIDO_S = 5
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obtener_pool():
+    """Devuelve (creándolo la primera vez) el pool de workers del proceso"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'SOLVER_WORKERS', 1),
+                thread_name_prefix='solver-job',
+            )
+    return _pool
+
+
+class MonitorJob:
+    """
+    Hilo que sincroniza un trabajo en ejecución con la base de datos.
+    
+    El solver informa incumbentes desde sus propios hilos de búsqueda, donde
+    no conviene abrir conexiones: registrar_incumbente() solo los acumula en
+    memoria y este hilo los escribe cada `intervalo` segundos, a la vez que
+    consulta si se pidió detener la búsqueda y, cada INTERVALO_LATIDO_S,
+    registra el latido del trabajo.
+    """
+
+    def __init__(self, job_id, intervalo=0.5):
+        self.job_id = job_id
+        self.intervalo = intervalo
+        self.detener = threading.Event()
+        self._pendientes = []
+        self._numero = 0
+        self._ultimo_latido = time.monotonic()
+        self._lock = threading.Lock()
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, name=f'solver-monitor-{job_id}', daemon=True)
+
+    def registrar_incumbente(self, incumbente):
+        with self._lock:
+            self._numero += 1
+            self._pendientes.append({'n': self._numero, **incumbente})
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def finalizar(self):
+        self._fin.set()
+        self._hilo.join()
+
+    def _ejecutar(self):
+        try:
+            while not self._fin.wait(self.intervalo):
+                self._sincronizar_o_registrar()
+            self._sincronizar_o_registrar()
+        finally:
+            connection.close()
+
+    def _sincronizar_o_registrar(self):
+        # Un error pasajero de la base de datos no debe terminar el hilo: sin
+        # él el trabajo deja de latir y se daría por abandonado
+        try:
+            self.sincronizar()
+        except Exception as e:
+            logger.warning(f"No se pudo sincronizar el trabajo #{self.job_id}: {str(e)}")
+
+    def sincronizar(self):
+        with self._lock:
+            nuevos, self._pendientes = self._pendientes, []
+
+        try:
+            job = SolverJob.objects.only('incumbentes', 'detener_solicitado').get(pk=self.job_id)
+            if job.detener_solicitado:
+                self.detener.set()
+            cambios = {}
+            if nuevos:
+                ultimo = nuevos[-1]
+                gap = f", gap {ultimo['gap'] * 100:.2f}%" if ultimo['gap'] is not None else ''
+                cambios['incumbentes'] = (job.incumbentes + nuevos)[-SolverJob.MAX_INCUMBENTES:]
+                cambios['mensaje'] = f"Mejor solución: {ultimo['objetivo']:.2f} km{gap}"
+            if nuevos or time.monotonic() - self._ultimo_latido >= INTERVALO_LATIDO_S:
+                cambios['latido_en'] = timezone.now()
+            if cambios:
+                SolverJob.objects.filter(pk=self.job_id).update(**cambios)
+                self._ultimo_latido = time.monotonic()
+        except Exception:
+            # Los incumbentes no escritos se reintentan en la próxima vuelta
+            with self._lock:
+                self._pendientes = nuevos + self._pendientes
+            raise
+
+
+def usa_worker_dedicado():
+    """Indica si los trabajos los ejecuta el proceso solver_worker"""
+    return getattr(settings, 'SOLVER_EJECUTOR', 'local') == 'worker'
+
+
+def encolar_optimizacion(**opciones):
+    """
+    Crea un SolverJob pendiente y lo envía al pool (o lo deja en la tabla
+    para el worker dedicado).
+
+    Args:
+        **opciones: argumentos de ejecutar_optimizacion() (p. ej. forzar=True)
+
+    Returns:
+        SolverJob: el trabajo recién creado (su id se devuelve al cliente)
+    """
+    job = SolverJob.objects.create(mensaje='En cola', parametros=opciones)
+    if not usa_worker_dedicado():
+        # Encolar solo cuando el registro sea visible para el hilo del worker
+        transaction.on_commit(lambda: obtener_pool().submit(ejecutar_job, job.pk))
+    logger.info(f"Trabajo de optimización #{job.pk} encolado")
+    return job
+
+
+def ejecutar_job(job_id):
+    """Cuerpo del worker: ejecuta la optimización y registra el resultado"""
+    from solver_app.solver_logic import ejecutar_optimizacion, serializar_resultados
+
+    close_old_connections()
+    monitor = MonitorJob(job_id)
+    try:
+        opciones = SolverJob.objects.values_list('parametros', flat=True).get(pk=job_id)
+        ahora = timezone.now()
+        # Condicional: recuperar_abandonados() pudo descartarlo mientras
+        # esperaba en el pool
+        iniciado = SolverJob.objects.filter(pk=job_id, estado__in=SolverJob.ESTADOS_ACTIVOS).update(
+            estado=SolverJob.Estado.EJECUTANDO,
+            iniciado_en=ahora,
+            latido_en=ahora,
+            progreso=5,
+            mensaje='Cargando datos',
+        )
+        if not iniciado:
+            logger.warning(f"El trabajo #{job_id} ya no está activo; no se ejecuta")
+            return
+
+        def progreso(porcentaje, mensaje):
+            SolverJob.objects.filter(pk=job_id).update(progreso=porcentaje, mensaje=mensaje)
+
+        monitor.iniciar()
+        try:
+            resultado = ejecutar_optimizacion(
+                progreso=progreso,
+                al_mejorar=monitor.registrar_incumbente,
+                detener=monitor.detener,
+                **opciones
+            )
+        finally:
+            monitor.finalizar()
+
+        SolverJob.objects.filter(pk=job_id).update(
+            estado=SolverJob.Estado.COMPLETADO if resultado['exito'] else SolverJob.Estado.FALLIDO,
+            progreso=100,
+            mensaje=resultado['mensaje'][:255],
+            resultado=serializar_resultados(resultado['resultados']),
+            finalizado_en=timezone.now(),
+        )
+    except Exception as e:
+        logger.error(f"Error en el trabajo #{job_id}: {str(e)}", exc_info=True)
+        SolverJob.objects.filter(pk=job_id).update(
+            estado=SolverJob.Estado.FALLIDO,
+            mensaje=f'Error: {str(e)}'[:255],
+            finalizado_en=timezone.now(),
+        )
+    finally:
+        # Cada hilo abre su propia conexión; cerrarla evita fugas en el pool
+        connection.close()
+
+
+def solicitar_detencion(job_id):
+    """
+    Pide aceptar la mejor solución encontrada y detener la búsqueda.
+    
+    Returns:
+        bool: False si el trabajo ya no está activo
+    """
+    actualizados = SolverJob.objects.filter(
+        pk=job_id, estado__in=SolverJob.ESTADOS_ACTIVOS
+    ).update(detener_solicitado=True)
+    if actualizados:
+        logger.info(f"Detención solicitada para el trabajo #{job_id}")
+    return bool(actualizados)
+
+
+def _vencimiento_latido():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'SOLVER_LATIDO_VENCIDO_S', 60))
+
+
+def _sin_latido(job, vencimiento):
+    """Un trabajo pendiente nunca latió: cuenta desde su creación"""
+    return (job.latido_en or job.creado_en) < vencimiento
+
+
+def recuperar_abandonados():
+    """
+    Marca como fallidos los trabajos activos sin latido reciente.
+
+    Un trabajo en ejecución sin latido perdió su proceso. Uno pendiente
+    antiguo se descarta solo si no hay otro ejecutándose con latido (si lo
+    hay, puede estar esperando detrás de él en el pool o en la cola del
+    worker).
+
+    Returns:
+        int: trabajos recuperados
+    """
+    vencimiento = _vencimiento_latido()
+    activos = list(
+        SolverJob.objects.filter(estado__in=SolverJob.ESTADOS_ACTIVOS)
+        .only('estado', 'creado_en', 'latido_en')
+    )
+    vencidos = [job for job in activos if _sin_latido(job, vencimiento)]
+    hay_en_ejecucion = any(
+        job.estado == SolverJob.Estado.EJECUTANDO and job not in vencidos for job in activos
+    )
+    mensajes = {
+        SolverJob.Estado.EJECUTANDO: 'Trabajo abandonado: el proceso que lo ejecutaba dejó de responder',
+        SolverJob.Estado.PENDIENTE: 'Trabajo abandonado: ningún proceso lo tomó de la cola',
+    }
+
+    recuperados = 0
+    for job in vencidos:
+        if job.estado == SolverJob.Estado.PENDIENTE and hay_en_ejecucion:
+            continue
+        # Condicional: el trabajo pudo latir o ser tomado mientras tanto
+        recuperados += SolverJob.objects.filter(
+            pk=job.pk, estado=job.estado, latido_en=job.latido_en
+        ).update(
+            estado=SolverJob.Estado.FALLIDO,
+            mensaje=mensajes[job.estado],
+            finalizado_en=timezone.now(),
+        )
+    if recuperados:
+        logger.warning(f"{recuperados} trabajo(s) abandonado(s) marcados como fallidos")
+    return recuperados
+
+
+def revisar_latido(job):
+    """
+    Si `job` sigue activo pero sin latido, recupera los trabajos abandonados.
+
+    Returns:
+        SolverJob: el mismo trabajo, releído si pudo cambiar de estado
+    """
+    if job is not None and job.activo and _sin_latido(job, _vencimiento_latido()):
+        if recuperar_abandonados():
+            job.refresh_from_db()
+    return job
+
+
+def trabajo_activo():
+    """Último trabajo pendiente o en ejecución (con latido), si existe"""
+    activos = SolverJob.objects.filter(estado__in=SolverJob.ESTADOS_ACTIVOS)
+    job = revisar_latido(activos.first())
+    if job is not None and not job.activo:
+        job = activos.first()
+    return job
+
+
+def esperar_job(job_id, espera_s, intervalo=0.1):
+    """
+    Espera a que un trabajo termine, como mucho `espera_s` segundos.
+
+    Returns:
+        SolverJob: el trabajo (sigue activo si se agotó la espera)
+    """
+    limite = time.monotonic() + espera_s
+    job = SolverJob.objects.get(pk=job_id)
+    while job.activo and time.monotonic() < limite:
+        time.sleep(intervalo)
+        job = SolverJob.objects.get(pk=job_id)
+    return job
+
+
+# --- Worker dedicado (SOLVER_EJECUTOR = 'worker') ---
+
+def precargar_solver():
+    """
+    Importa el stack del solver y crea un solver de cada backend para que
+    las bibliotecas nativas queden cargadas antes del primer trabajo.
+
+    Returns:
+        dict: 'segundos' y 'memoria_mb' (RSS máximo del proceso)
+    """
+    inicio = time.perf_counter()
+    from ortools.linear_solver import pywraplp
+    from ortools.sat.python import cp_model
+    from solver_app import solver_logic  # noqa: F401
+
+    for nombre in ('SCIP', 'CBC'):
+        pywraplp.Solver.CreateSolver(nombre)
+    cp_model.CpSolver()
+    return {
+        'segundos': time.perf_counter() - inicio,
+        'memoria_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def reclamar_siguiente():
+    """
+    Toma el trabajo pendiente más antiguo.
+
+    El cambio a EJECUTANDO es condicional (UPDATE ... WHERE estado =
+    PENDIENTE), así que varios workers nunca toman el mismo trabajo. Antes se
+    recuperan los trabajos abandonados por otro worker.
+
+    Returns:
+        int | None: id del trabajo tomado
+    """
+    recuperar_abandonados()
+    pendientes = (
+        SolverJob.objects.filter(estado=SolverJob.Estado.PENDIENTE)
+        .order_by('creado_en', 'pk')
+        .values_list('pk', flat=True)
+    )
+    for job_id in pendientes[:10]:
+        ahora = timezone.now()
+        tomado = SolverJob.objects.filter(pk=job_id, estado=SolverJob.Estado.PENDIENTE).update(
+            estado=SolverJob.Estado.EJECUTANDO, iniciado_en=ahora, latido_en=ahora,
+            mensaje='Cargando datos',
+        )
+        if tomado:
+            return job_id
+    return None
+
+
+def atender_cola(detener=None, intervalo=None, una_vez=False):
+    """
+    Bucle del worker dedicado: ejecuta los trabajos pendientes en orden de
+    llegada y, sin trabajos, consulta la tabla cada `intervalo` segundos.
+
+    Args:
+        detener: threading.Event opcional para salir entre trabajos
+        intervalo: segundos entre consultas (por defecto SOLVER_WORKER_INTERVALO)
+        una_vez: salir en cuanto no queden trabajos pendientes
+
+    Returns:
+        int: trabajos ejecutados
+    """
+    detener = detener or threading.Event()
+    intervalo = intervalo or getattr(settings, 'SOLVER_WORKER_INTERVALO', 0.25)
+    ejecutados = 0
+    while not detener.is_set():
+        job_id = reclamar_siguiente()
+        if job_id is None:
+            if una_vez:
+                break
+            detener.wait(intervalo)
+            continue
+        logger.info(f"Worker: ejecutando el trabajo #{job_id}")
+        ejecutar_job(job_id)
+        ejecutados += 1
+    return ejecutados
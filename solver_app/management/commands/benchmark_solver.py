@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from solver_app.motores import BACKENDS
+from solver_app.benchmark import ejecutor
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta el benchmark del solver con instancias sintéticas y guarda los resultados en JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zonas', type=int, nargs='+', default=[46, 500],
+                            help='Tamaños de instancia (número de zonas)')
+        parser.add_argument('--camiones', type=int, default=None,
+                            help='Tamaño fijo de flota (por defecto, proporcional a las zonas)')
+        parser.add_argument('--motores', nargs='+', default=['flujo', 'mip', 'sectores'],
+                            choices=['flujo', 'mip', 'sectores'])
+        parser.add_argument('--backends', nargs='+', default=['SCIP', 'CP-SAT'], choices=BACKENDS)
+        parser.add_argument('--rutas-por-turno', type=int, nargs='+', default=[1])
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--limite-tiempo', type=float, default=300,
+                            help='Límite de tiempo del solver por caso, en segundos')
+        parser.add_argument('--salida', default='benchmark.json',
+                            help='Archivo JSON de resultados')
+        parser.add_argument('--comparar', default=None,
+                            help='Informe JSON anterior contra el que comparar')
+        parser.add_argument('--tolerancia', type=float, default=0.2,
+                            help='Aumento relativo de tiempo que se reporta como regresión')
+
+    def handle(self, *args, **options):
+        base = None
+        if options['comparar']:
+            try:
+                base = ejecutor.cargar(options['comparar'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer {options['comparar']}: {e}")
+
+        def progreso(r):
+            if r['estado'] == 'Error':
+                self.stdout.write(self.style.ERROR(
+                    f"{r['zonas']:>6} zonas  {r['motor']:<9} {r['backend']:<7} rpt={r['rutas_por_turno']}  "
+                    f"ERROR: {r['error']}"
+                ))
+                return
+            self.stdout.write(
+                f"{r['zonas']:>6} zonas  {r['motor']:<9} {r['backend']:<7} rpt={r['rutas_por_turno']}  "
+                f"{r['estado']:<9} objetivo={r['objetivo']:.2f}  "
+                f"total={r['tiempos']['total']:.3f}s  memoria={r['memoria_pico_mb']} MB"
+            )
+
+        informe = ejecutor.ejecutar_benchmark(
+            zonas=options['zonas'],
+            motores=options['motores'],
+            backends=options['backends'],
+            rutas_por_turno=options['rutas_por_turno'],
+            camiones=options['camiones'],
+            semilla=options['semilla'],
+            limite_tiempo_s=options['limite_tiempo'],
+            progreso=progreso,
+        )
+        ejecutor.guardar(informe, options['salida'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Resultados de {len(informe['resultados'])} casos guardados en {options['salida']}"
+        ))
+
+        if base is not None:
+            regresiones = 0
+            for fila in ejecutor.comparar(base, informe, options['tolerancia']):
+                caso = fila['caso']
+                linea = (
+                    f"{caso['zonas']:>6} zonas  {caso['motor']:<9} {caso['backend']:<7} "
+                    f"{fila['tiempo_base']:.3f}s -> {fila['tiempo_actual']:.3f}s"
+                )
+                if fila['regresion']:
+                    regresiones += 1
+                    self.stdout.write(self.style.WARNING(f"{linea}  REGRESIÓN"))
+                else:
+                    self.stdout.write(linea)
+            self.stdout.write(f"{regresiones} regresiones respecto de {options['comparar']}")
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from solver_app import exportacion
+
+
+class Command(BaseCommand):
+    help = 'Exporta un plan de asignaciones (por defecto el activo) en CSV o NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', default='csv', choices=list(exportacion.FORMATOS))
+        grupo = parser.add_mutually_exclusive_group()
+        grupo.add_argument('--plan', type=int, default=None, help='Id del PlanAsignacion')
+        grupo.add_argument('--ejecucion', type=int, default=None,
+                           help='Id de la ejecución del solver (SolverRun) que generó el plan')
+        parser.add_argument('--salida', default='-',
+                            help='Archivo de salida ("-" para la salida estándar)')
+        parser.add_argument('--tamano-pagina', type=int, default=exportacion.TAMANO_PAGINA,
+                            help='Filas leídas por consulta')
+
+    def handle(self, *args, **options):
+        plan = exportacion.buscar_plan(options['plan'], options['ejecucion'])
+        if plan is None:
+            raise CommandError('No se encontró el plan (puede haber sido podado)')
+
+        lineas = exportacion.exportar(plan, options['formato'], options['tamano_pagina'])
+        if options['salida'] == '-':
+            for linea in lineas:
+                self.stdout.write(linea, ending='')
+            return
+
+        filas = 0
+        with open(options['salida'], 'w', encoding='utf-8', newline='') as archivo:
+            for linea in lineas:
+                archivo.write(linea)
+                filas += 1
+        if options['formato'] == 'csv':
+            filas -= 1  # Encabezado
+        self.stdout.write(self.style.SUCCESS(
+            f"Plan #{plan.pk}: {filas} asignaciones exportadas en {options['salida']}"
+        ))
@@ -1,44 +1,77 @@
-import pandas as pd
+from pathlib import Path
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from solver_app.models import Ruta, Camion
+from solver_app import carga
 
 class Command(BaseCommand):
     help = 'Carga los datos de los CSV a la base de datos'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directorio', type=Path, default=settings.BASE_DIR / 'data',
+            help='Carpeta con rutas.csv, demanda.csv y dataton_pueblo_libre.csv',
+        )
+        parser.add_argument(
+            '--bloque', type=int, default=carga.TAMANO_BLOQUE,
+            help='Filas leídas por bloque (acota la memoria)',
+        )
+        parser.add_argument(
+            '--lote', type=int, default=carga.TAMANO_LOTE,
+            help='Filas escritas por transacción',
+        )
+        parser.add_argument(
+            '--conservar-ausentes', action='store_true',
+            help='No eliminar rutas ni camiones que ya no aparecen en los CSV',
+        )
+        parser.add_argument(
+            '--completa', action='store_true',
+            help='Ignorar las marcas de ingesta y recargar todos los archivos',
+        )
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Iniciando carga de datos...'))
+        parametros = {
+            'tamano_bloque': options['bloque'],
+            'tamano_lote': options['lote'],
+            'conservar_ausentes': options['conservar_ausentes'],
+            'completa': options['completa'],
+        }
 
         # --- Cargar Rutas y Demandas ---
-        df_rutas = pd.read_csv('data/rutas.csv')
-        df_demanda = pd.read_csv('data/demanda.csv')
-
-        # Unimos los dos dataframes por el id de la zona
-        df_zonas = pd.merge(df_rutas, df_demanda, on='id_zona_barrido')
-
-        Ruta.objects.all().delete() # Limpiamos datos antiguos
-        for _, row in df_zonas.iterrows():
-            Ruta.objects.create(
-                id_zona_barrido=row['id_zona_barrido'],
-                id_sector=row['id_sector'],
-                distancia_km=row['distancia_km'],
-                residuos_kg=row['residuos_kg']
-            )
-        self.stdout.write(self.style.SUCCESS(f'Se cargaron {Ruta.objects.count()} rutas.'))
+        informe = carga.ingerir_rutas(options['directorio'], **parametros)
+        if informe['modo'] == 'sin_cambios':
+            self.stdout.write('rutas.csv y demanda.csv sin cambios; se omiten.')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Se cargaron {informe['registros']} rutas. {self._resumen(informe)}"
+            ))
 
         # --- Cargar Camiones y Capacidades ---
-        # Asume que tu CSV se llama 'dataton_pueblo_libre.csv'
-        df_operaciones = pd.read_csv('data/dataton_pueblo_libre.csv')
-
-        # Agrupamos por placa y encontramos la capacidad MÁXIMA registrada
-        # Asumimos que la 'CANTIDAD' está en Toneladas
-        df_camiones = df_operaciones.groupby('PLACA')['CANTIDAD'].max().reset_index()
-
-        Camion.objects.all().delete() # Limpiamos datos antiguos
-        for _, row in df_camiones.iterrows():
-            Camion.objects.create(
-                placa=row['PLACA'],
-                capacidad_kg=row['CANTIDAD'] * 1000  # Convertimos a Kg
-            )
-        self.stdout.write(self.style.SUCCESS(f'Se cargaron {Camion.objects.count()} camiones.'))
-
-        self.stdout.write(self.style.SUCCESS('¡Carga de datos completada!'))
\ No newline at end of file
+        # Capacidad = CANTIDAD máxima registrada por PLACA (en toneladas)
+        # Si solo se agregaron filas al dataton se procesan únicamente esas
+        informe = carga.ingerir_camiones(
+            options['directorio'], progreso=self._progreso, **parametros
+        )
+        if informe['modo'] == 'sin_cambios':
+            self.stdout.write(f'{carga.ARCHIVO_OPERACIONES} sin cambios; se omite.')
+        elif informe['modo'] == 'incremental':
+            self.stdout.write(self.style.SUCCESS(
+                f"Ingesta incremental: {informe['registros']} camiones actualizados. "
+                f"{self._resumen(informe)}"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Se cargaron {informe['registros']} camiones. {self._resumen(informe)}"
+            ))
+
+        self.stdout.write(self.style.SUCCESS('¡Carga de datos completada!'))
+
+    def _progreso(self, filas):
+        self.stdout.write(f'  {filas} filas de operaciones leídas...')
+
+    def _resumen(self, informe):
+        return (
+            f"{informe['filas']} filas leídas en {informe['tiempo']:.2f} s "
+            f"({informe['filas_por_s']:.0f} filas/s), {informe['eliminados']} eliminados"
+        )
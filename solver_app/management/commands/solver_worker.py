@@ -0,0 +1,40 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from solver_app import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Proceso dedicado que carga el solver una vez y ejecuta los trabajos de '
+        'optimización encolados por los procesos web (SOLVER_EJECUTOR=worker)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=float, default=None,
+                            help='Segundos entre consultas de trabajos pendientes '
+                                 '(por defecto SOLVER_WORKER_INTERVALO)')
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Ejecutar los trabajos pendientes y salir')
+
+    def handle(self, *args, **options):
+        precarga = jobs.precargar_solver()
+        self.stdout.write(
+            f"Solver cargado en {precarga['segundos']:.2f} s "
+            f"({precarga['memoria_mb']:.0f} MB); esperando trabajos"
+        )
+
+        # Trabajos que dejó a medias un worker anterior (caído o reiniciado)
+        recuperados = jobs.recuperar_abandonados()
+        if recuperados:
+            self.stdout.write(self.style.WARNING(f"{recuperados} trabajo(s) abandonado(s) marcados como fallidos"))
+
+        # SIGTERM/SIGINT terminan el trabajo en curso y luego salen
+        detener = threading.Event()
+        for senal in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(senal, lambda *_: detener.set())
+
+        ejecutados = jobs.atender_cola(detener, options['intervalo'], options['una_vez'])
+        self.stdout.write(self.style.SUCCESS(f"Worker detenido: {ejecutados} trabajos ejecutados"))
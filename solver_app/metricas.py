@@ -0,0 +1,233 @@
+"""
+Métricas en el formato de texto de Prometheus, sin dependencias externas.
+
+Hay dos fuentes:
+
+    - En memoria, por proceso: latencia de cada vista, consultas SQL y
+      tiempo de base de datos por petición (solver_app.middleware) y
+      aciertos de la caché del dashboard. Son contadores e histogramas
+      acumulativos; con varios workers de gunicorn cada uno expone los suyos
+      con la etiqueta `pid`, y Prometheus los suma con sum without (pid).
+    - En la base de datos, al momento del scrape: duración de las
+      ejecuciones del solver por motor y por fase, ejecuciones por estado,
+      trabajos por estado (profundidad de la cola) y aciertos de la caché de
+      soluciones. Son globales, así que valen igual desde cualquier proceso.
+
+Registrar una petición solo toma un lock y suma a unas listas, para no pesar
+en vistas frecuentes como index y api_stats.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+
+from django.db.models import Count, Q, Sum
+
+from solver_app.models import SolverJob, SolverRun
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Límites (le) de los histogramas
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BUCKETS_SOLVER = (0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _etiquetas(nombres, valores):
+    if not nombres:
+        return ''
+    pares = []
+    for nombre, valor in zip(nombres, valores):
+        valor = str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+        pares.append(f'{nombre}="{valor}"')
+    return '{' + ','.join(pares) + '}'
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    """Contador acumulativo con etiquetas"""
+
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, *valores, cantidad=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def lineas(self, extra=()):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        nombres = self.etiquetas + tuple(n for n, _ in extra)
+        for clave, valor in valores:
+            etiquetas = _etiquetas(nombres, clave + tuple(v for _, v in extra))
+            yield f'{self.nombre}{etiquetas} {_numero(valor)}'
+
+
+class Histograma:
+    """Histograma acumulativo con etiquetas y límites fijos"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores):
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                # Conteo por bucket (no acumulado), suma y total
+                serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][bisect_left(self.buckets, valor)] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def lineas(self, extra=()):
+        with self._lock:
+            series = sorted((clave, (list(c), s, n)) for clave, (c, s, n) in self._series.items())
+        for clave, (conteos, suma, total) in series:
+            yield from lineas_histograma(
+                self.nombre, self.etiquetas + tuple(n for n, _ in extra),
+                clave + tuple(v for _, v in extra), self.buckets, conteos, suma, total,
+            )
+
+
+def lineas_histograma(nombre, etiquetas, valores, buckets, conteos, suma, total):
+    """Líneas _bucket/_sum/_count de una serie (`conteos` por bucket, sin acumular)"""
+    acumulado = 0
+    for limite, conteo in zip(buckets + (float('inf'),), conteos):
+        acumulado += conteo
+        le = _numero(float(limite))
+        yield f'{nombre}_bucket{_etiquetas(etiquetas + ("le",), valores + (le,))} {acumulado}'
+    yield f'{nombre}_sum{_etiquetas(etiquetas, valores)} {_numero(float(suma))}'
+    yield f'{nombre}_count{_etiquetas(etiquetas, valores)} {total}'
+
+
+# --- Métricas en memoria (por proceso) ---
+
+PETICIONES = Contador(
+    'http_peticiones_total', 'Peticiones atendidas por vista, método y código de estado',
+    ('vista', 'metodo', 'estado'),
+)
+LATENCIA = Histograma(
+    'http_peticion_segundos', 'Latencia de las peticiones por vista', ('vista',),
+)
+CONSULTAS = Histograma(
+    'http_peticion_consultas_db', 'Consultas SQL por petición', ('vista',), BUCKETS_CONSULTAS,
+)
+TIEMPO_DB = Histograma(
+    'http_peticion_db_segundos', 'Tiempo en la base de datos por petición', ('vista',),
+)
+CACHE_DASHBOARD = Contador(
+    'dashboard_cache_total', 'Lecturas de la caché del dashboard por resultado', ('resultado',),
+)
+
+EN_MEMORIA = (PETICIONES, LATENCIA, CONSULTAS, TIEMPO_DB, CACHE_DASHBOARD)
+
+
+def registrar_peticion(vista, metodo, estado, segundos, consultas, segundos_db):
+    PETICIONES.incrementar(vista, metodo, estado)
+    LATENCIA.observar(segundos, vista)
+    CONSULTAS.observar(consultas, vista)
+    TIEMPO_DB.observar(segundos_db, vista)
+
+
+# --- Métricas de la base de datos (globales) ---
+
+def _metricas_solver():
+    """Duración total por motor (histograma) y suma por fase"""
+    agregados = {'total': Count('id'), 'suma': Sum('tiempo_total')}
+    for k, limite in enumerate(BUCKETS_SOLVER):
+        agregados[f'le_{k}'] = Count('id', filter=Q(tiempo_total__lte=limite))
+    for fase in SolverRun.FASES:
+        agregados[f'fase_{fase}'] = Sum(f'tiempo_{fase}')
+        agregados[f'n_{fase}'] = Count(f'tiempo_{fase}')
+
+    yield '# HELP solver_ejecucion_segundos Duración total de las ejecuciones del solver por motor'
+    yield '# TYPE solver_ejecucion_segundos histogram'
+    filas = list(SolverRun.objects.values('motor').annotate(**agregados).order_by('motor'))
+    for fila in filas:
+        # Los COUNT con filtro son acumulados; se pasan a conteos por bucket
+        acumulados = [fila[f'le_{k}'] for k in range(len(BUCKETS_SOLVER))] + [fila['total']]
+        conteos = [acumulados[0]] + [b - a for a, b in zip(acumulados, acumulados[1:])]
+        yield from lineas_histograma(
+            'solver_ejecucion_segundos', ('motor',), (fila['motor'],),
+            BUCKETS_SOLVER, conteos, fila['suma'] or 0.0, fila['total'],
+        )
+
+    yield '# HELP solver_fase_segundos Tiempo acumulado de cada fase del solver por motor'
+    yield '# TYPE solver_fase_segundos summary'
+    for fila in filas:
+        for fase in SolverRun.FASES:
+            if fila[f'n_{fase}']:
+                etiquetas = _etiquetas(('motor', 'fase'), (fila['motor'], fase))
+                yield f'solver_fase_segundos_sum{etiquetas} {_numero(float(fila[f"fase_{fase}"]))}'
+                yield f'solver_fase_segundos_count{etiquetas} {fila[f"n_{fase}"]}'
+
+    yield '# HELP solver_ejecuciones_total Ejecuciones del solver por motor y estado'
+    yield '# TYPE solver_ejecuciones_total counter'
+    por_estado = (
+        SolverRun.objects.values_list('motor', 'estado').annotate(n=Count('id')).order_by('motor', 'estado')
+    )
+    for motor, estado, n in por_estado:
+        yield f'solver_ejecuciones_total{_etiquetas(("motor", "estado"), (motor, estado))} {n}'
+
+
+def _metricas_trabajos():
+    """Trabajos por estado (PENDIENTE = profundidad de la cola)"""
+    conteos = dict(SolverJob.objects.values_list('estado').annotate(n=Count('id')).order_by())
+    yield '# HELP solver_trabajos Trabajos de optimización por estado'
+    yield '# TYPE solver_trabajos gauge'
+    for estado in SolverJob.Estado.values:
+        yield f'solver_trabajos{_etiquetas(("estado",), (estado,))} {conteos.get(estado, 0)}'
+
+
+def _metricas_cache_soluciones():
+    from solver_app import cache_soluciones
+
+    stats = cache_soluciones.estadisticas()
+    yield '# HELP solver_cache_solicitudes_total Solicitudes a la caché de soluciones por resultado'
+    yield '# TYPE solver_cache_solicitudes_total counter'
+    yield f'solver_cache_solicitudes_total{{resultado="acierto"}} {stats["aciertos"]}'
+    yield f'solver_cache_solicitudes_total{{resultado="fallo"}} {stats["resoluciones"]}'
+    yield '# HELP solver_cache_entradas Entradas en la caché de soluciones'
+    yield '# TYPE solver_cache_entradas gauge'
+    yield f'solver_cache_entradas {stats["entradas"]}'
+    yield '# HELP solver_cache_bytes Tamaño de la caché de soluciones'
+    yield '# TYPE solver_cache_bytes gauge'
+    yield f'solver_cache_bytes {stats["tamano_bytes"]}'
+
+
+def exponer():
+    """
+    Texto de todas las métricas en el formato de exposición de Prometheus.
+
+    Returns:
+        str
+    """
+    lineas = []
+    for metrica in EN_MEMORIA:
+        lineas.append(f'# HELP {metrica.nombre} {metrica.ayuda}')
+        lineas.append(f'# TYPE {metrica.nombre} {metrica.tipo}')
+        lineas.extend(metrica.lineas(extra=(('pid', os.getpid()),)))
+    lineas.extend(_metricas_solver())
+    lineas.extend(_metricas_trabajos())
+    lineas.extend(_metricas_cache_soluciones())
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,45 @@
+"""
+Middleware de métricas por petición (ver solver_app.metricas).
+"""
+
+import time
+
+from django.db import connection
+
+from solver_app import metricas
+
+
+class MetricasMiddleware:
+    """
+    Mide la latencia de cada petición y, con connection.execute_wrapper, el
+    número de consultas SQL y el tiempo que pasan en la base de datos.
+
+    Las peticiones se etiquetan con el nombre de la vista en urls.py (no con
+    la ruta), para que las etiquetas no crezcan con los ids de la URL. En las
+    respuestas en streaming la latencia cubre hasta el envío de los
+    encabezados.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        db = [0, 0.0]  # Consultas y segundos
+
+        def medir_consulta(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                db[0] += 1
+                db[1] += time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(medir_consulta):
+            respuesta = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        coincidencia = request.resolver_match
+        vista = coincidencia.view_name if coincidencia is not None else 'sin_vista'
+        metricas.registrar_peticion(vista, request.method, respuesta.status_code, duracion, db[0], db[1])
+        return respuesta
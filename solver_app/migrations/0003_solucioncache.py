@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver_app', '0002_solverjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolucionCache',
+            fields=[
+                ('huella', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('parametros', models.JSONField(default=dict)),
+                ('resultado', models.JSONField()),
+                ('tamano_bytes', models.PositiveIntegerField(default=0)),
+                ('aciertos', models.PositiveIntegerField(default=0)),
+                ('resoluciones', models.PositiveIntegerField(default=1)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('ultimo_acceso', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Solución en caché',
+                'verbose_name_plural': 'Soluciones en caché',
+                'ordering': ['-ultimo_acceso'],
+            },
+        ),
+        migrations.AddField(
+            model_name='solverjob',
+            name='parametros',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
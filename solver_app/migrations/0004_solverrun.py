@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver_app', '0003_solucioncache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolverRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado_en', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('motor', models.CharField(blank=True, default='', max_length=20)),
+                ('backend', models.CharField(blank=True, default='', max_length=20)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('estado', models.CharField(max_length=20)),
+                ('mensaje', models.CharField(blank=True, default='', max_length=255)),
+                ('num_rutas', models.PositiveIntegerField(default=0)),
+                ('num_camiones', models.PositiveIntegerField(default=0)),
+                ('variables', models.PositiveIntegerField(blank=True, null=True)),
+                ('restricciones', models.PositiveIntegerField(blank=True, null=True)),
+                ('objetivo', models.FloatField(blank=True, null=True)),
+                ('gap', models.FloatField(blank=True, null=True)),
+                ('tiempo_carga', models.FloatField(blank=True, null=True)),
+                ('tiempo_presolve', models.FloatField(blank=True, null=True)),
+                ('tiempo_particion', models.FloatField(blank=True, null=True)),
+                ('tiempo_modelo', models.FloatField(blank=True, null=True)),
+                ('tiempo_objetivo', models.FloatField(blank=True, null=True)),
+                ('tiempo_restricciones', models.FloatField(blank=True, null=True)),
+                ('tiempo_resolucion', models.FloatField(blank=True, null=True)),
+                ('tiempo_extraccion', models.FloatField(blank=True, null=True)),
+                ('tiempo_estadisticas', models.FloatField(blank=True, null=True)),
+                ('tiempo_guardado', models.FloatField(blank=True, null=True)),
+                ('tiempo_total', models.FloatField(default=0)),
+                ('memoria_pico_mb', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Ejecución del solver',
+                'verbose_name_plural': 'Ejecuciones del solver',
+                'ordering': ['-creado_en'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver_app', '0004_solverrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solverjob',
+            name='detener_solicitado',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='solverjob',
+            name='incumbentes',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver_app', '0005_solverjob_incumbentes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solverrun',
+            name='tiempo_heuristica',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
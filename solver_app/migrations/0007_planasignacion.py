@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def crear_plan_inicial(apps, schema_editor):
+    """Agrupa las asignaciones existentes en un primer plan activo"""
+    AsignacionOptima = apps.get_model('solver_app', 'AsignacionOptima')
+    PlanAsignacion = apps.get_model('solver_app', 'PlanAsignacion')
+    asignaciones = AsignacionOptima.objects.all()
+    if not asignaciones.exists():
+        return
+    distancia = asignaciones.aggregate(total=Sum('costo_distancia_km'))['total']
+    plan = PlanAsignacion.objects.create(
+        activo=True,
+        distancia_total=float(distancia),
+        num_asignaciones=asignaciones.count(),
+    )
+    asignaciones.update(plan=plan)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver_app', '0006_solverrun_tiempo_heuristica'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanAsignacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado_en', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('activo', models.BooleanField(default=False)),
+                ('origen', models.CharField(choices=[('SOLVER', 'Solver'), ('CACHE', 'Caché de soluciones')], default='SOLVER', max_length=10)),
+                ('motor', models.CharField(blank=True, default='', max_length=20)),
+                ('distancia_total', models.FloatField(blank=True, null=True)),
+                ('num_asignaciones', models.PositiveIntegerField(default=0)),
+                ('ejecucion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='planes', to='solver_app.solverrun')),
+            ],
+            options={
+                'verbose_name': 'Plan de asignaciones',
+                'verbose_name_plural': 'Planes de asignaciones',
+                'ordering': ['-creado_en'],
+            },
+        ),
+        migrations.AddField(
+            model_name='asignacionoptima',
+            name='plan',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='asignaciones', to='solver_app.planasignacion'),
+        ),
+        migrations.RunPython(crear_plan_inicial, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='asignacionoptima',
+            name='plan',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asignaciones', to='solver_app.planasignacion'),
+        ),
+        migrations.AddConstraint(
+            model_name='planasignacion',
+            constraint=models.UniqueConstraint(condition=models.Q(('activo', True)), fields=('activo',), name='plan_activo_unico'),
+        ),
+    ]
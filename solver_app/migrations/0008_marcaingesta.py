@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver_app', '0007_planasignacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaIngesta',
+            fields=[
+                ('fuente', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('checksum', models.CharField(max_length=64)),
+                ('tamano_bytes', models.BigIntegerField(default=0)),
+                ('filas', models.BigIntegerField(default=0)),
+                ('ultimo_nro_registro', models.BigIntegerField(blank=True, null=True)),
+                ('ultima_fecha_corte', models.IntegerField(blank=True, null=True)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Marca de ingesta',
+                'verbose_name_plural': 'Marcas de ingesta',
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver_app', '0008_marcaingesta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperacionHistorica',
+            fields=[
+                ('nro_registro', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha_corte', models.DateField()),
+                ('dia_recorrido', models.DateField()),
+                ('semana_recorrido', models.PositiveSmallIntegerField()),
+                ('turno', models.CharField(max_length=20)),
+                ('placa', models.CharField(max_length=10)),
+                ('conductor', models.CharField(blank=True, default='', max_length=64)),
+                ('nro_boleta', models.BigIntegerField(blank=True, null=True)),
+                ('cantidad_t', models.FloatField()),
+            ],
+            options={
+                'verbose_name': 'Operación histórica',
+                'verbose_name_plural': 'Operaciones históricas',
+                'indexes': [models.Index(fields=['placa', 'dia_recorrido'], name='solver_app__placa_259330_idx'), models.Index(fields=['turno', 'dia_recorrido'], name='solver_app__turno_8c09d6_idx'), models.Index(fields=['dia_recorrido'], name='solver_app__dia_rec_ba02a0_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenPlacaSemana',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('viajes', models.PositiveIntegerField(default=0)),
+                ('toneladas', models.FloatField(default=0)),
+                ('max_toneladas', models.FloatField(default=0)),
+                ('placa', models.CharField(max_length=10)),
+                ('semana', models.DateField()),
+            ],
+            options={
+                'verbose_name': 'Resumen por placa y semana',
+                'verbose_name_plural': 'Resúmenes por placa y semana',
+                'constraints': [models.UniqueConstraint(fields=('placa', 'semana'), name='resumen_placa_semana_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenPlacaTurnoDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('viajes', models.PositiveIntegerField(default=0)),
+                ('toneladas', models.FloatField(default=0)),
+                ('max_toneladas', models.FloatField(default=0)),
+                ('placa', models.CharField(max_length=10)),
+                ('turno', models.CharField(max_length=20)),
+                ('dia', models.DateField()),
+            ],
+            options={
+                'verbose_name': 'Resumen por placa, turno y día',
+                'verbose_name_plural': 'Resúmenes por placa, turno y día',
+                'indexes': [models.Index(fields=['dia'], name='solver_app__dia_cdeaa5_idx')],
+                'constraints': [models.UniqueConstraint(fields=('placa', 'turno', 'dia'), name='resumen_placa_turno_dia_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenTurnoDiaSemana',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('viajes', models.PositiveIntegerField(default=0)),
+                ('toneladas', models.FloatField(default=0)),
+                ('max_toneladas', models.FloatField(default=0)),
+                ('turno', models.CharField(max_length=20)),
+                ('dia_semana', models.PositiveSmallIntegerField()),
+                ('dias', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Resumen por turno y día de la semana',
+                'verbose_name_plural': 'Resúmenes por turno y día de la semana',
+                'constraints': [models.UniqueConstraint(fields=('turno', 'dia_semana'), name='resumen_turno_dia_semana_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver_app', '0010_versiondatos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asignacionoptima',
+            index=models.Index(fields=['plan', 'id'], name='solver_app__plan_id_bf9433_idx'),
+        ),
+    ]
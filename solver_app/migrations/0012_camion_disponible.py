@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver_app', '0011_asignacion_plan_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camion',
+            name='disponible',
+            field=models.BooleanField(default=True),
+        ),
+    ]
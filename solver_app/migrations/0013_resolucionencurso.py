@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver_app', '0012_camion_disponible'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResolucionEnCurso',
+            fields=[
+                ('huella', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('iniciado_en', models.DateTimeField(auto_now_add=True)),
+                ('expira_en', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Resolución en curso',
+                'verbose_name_plural': 'Resoluciones en curso',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver_app', '0013_resolucionencurso'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solverjob',
+            name='latido_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:00
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver_app', '0014_solverjob_latido_en'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resolucionencurso',
+            name='propietario',
+            field=models.UUIDField(default=uuid.uuid4, editable=False),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 
 
@@ -30,6 +32,9 @@ class Camion(models.Model):
     # Guardamos en Kg para ser consistentes con la demanda de la ruta
     capacidad_kg = models.DecimalField(max_digits=10, decimal_places=2)
 
+    # Los camiones no disponibles (taller, baja temporal) no entran al solver
+    disponible = models.BooleanField(default=True)
+
     # Podríamos añadir más datos del CSV si quisiéramos
     # unidad_nombre = models.CharField(max_length=100, blank=True, null=True)
 
@@ -37,10 +42,63 @@ class Camion(models.Model):
         return f"{self.placa} ({self.capacidad_kg} Kg)"
 
 
+class PlanAsignacion(models.Model):
+    """
+    Versión del plan de asignaciones.
+
+    Cada resolución guarda sus asignaciones en un plan nuevo y lo activa en
+    la misma transacción: los lectores ven siempre un plan completo, el
+    anterior o el nuevo. Las versiones inactivas se podan según la política
+    de retención de solver_app.planes.
+    """
+
+    class Origen(models.TextChoices):
+        SOLVER = 'SOLVER', 'Solver'
+        CACHE = 'CACHE', 'Caché de soluciones'
+
+    creado_en = models.DateTimeField(auto_now_add=True, db_index=True)
+    activo = models.BooleanField(default=False)
+    origen = models.CharField(max_length=10, choices=Origen.choices, default=Origen.SOLVER)
+    motor = models.CharField(max_length=20, blank=True, default='')
+    distancia_total = models.FloatField(null=True, blank=True)
+    num_asignaciones = models.PositiveIntegerField(default=0)
+    ejecucion = models.ForeignKey(
+        'SolverRun', null=True, blank=True, on_delete=models.SET_NULL, related_name='planes'
+    )
+
+    class Meta:
+        verbose_name = 'Plan de asignaciones'
+        verbose_name_plural = 'Planes de asignaciones'
+        ordering = ['-creado_en']
+        constraints = [
+            # A lo sumo un plan activo
+            models.UniqueConstraint(
+                fields=['activo'], condition=models.Q(activo=True), name='plan_activo_unico'
+            ),
+        ]
+
+    def __str__(self):
+        estado = 'activo' if self.activo else 'inactivo'
+        return f"Plan #{self.pk} ({self.num_asignaciones} asignaciones, {estado})"
+
+
+class AsignacionesActivasManager(models.Manager):
+    """Asignaciones del plan activo"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(plan__activo=True)
+
+
 class AsignacionOptima(models.Model):
     """
     Esta tabla guardará los *resultados* de la optimización.
+
+    `objects` devuelve solo las asignaciones del plan activo; `todas` incluye
+    las de todas las versiones guardadas.
     """
+    TURNOS = ['MAÑANA', 'TARDE', 'NOCHE']
+
+    plan = models.ForeignKey(PlanAsignacion, on_delete=models.CASCADE, related_name='asignaciones')
     ruta_asignada = models.ForeignKey(Ruta, on_delete=models.CASCADE)
     camion_asignado = models.ForeignKey(Camion, on_delete=models.CASCADE)
     turno = models.CharField(max_length=20)  # Ej. "MAÑANA", "TARDE", "NOCHE"
@@ -49,5 +107,344 @@ class AsignacionOptima(models.Model):
     costo_distancia_km = models.DecimalField(max_digits=5, decimal_places=2)
     carga_kg = models.DecimalField(max_digits=7, decimal_places=2)
 
+    objects = AsignacionesActivasManager()
+    todas = models.Manager()
+
+    class Meta:
+        # Exportación por páginas (plan = X AND id > último, en orden de id)
+        indexes = [models.Index(fields=['plan', 'id'])]
+
+    def __str__(self):
+        return f"{self.camion_asignado.placa} -> {self.ruta_asignada.id_zona_barrido} (Turno: {self.turno})"
+
+class SolverJob(models.Model):
+    """
+    Ejecución en segundo plano del solver.
+    La vista solo encola el trabajo; el pool local de solver_app.jobs lo
+    ejecuta y va actualizando su estado y progreso.
+    """
+
+    class Estado(models.TextChoices):
+        PENDIENTE = 'PENDIENTE', 'Pendiente'
+        EJECUTANDO = 'EJECUTANDO', 'Ejecutando'
+        COMPLETADO = 'COMPLETADO', 'Completado'
+        FALLIDO = 'FALLIDO', 'Fallido'
+
+    ESTADOS_ACTIVOS = (Estado.PENDIENTE, Estado.EJECUTANDO)
+    MAX_INCUMBENTES = 200
+
+    estado = models.CharField(max_length=20, choices=Estado.choices, default=Estado.PENDIENTE)
+    progreso = models.PositiveSmallIntegerField(default=0)  # 0 - 100
+    mensaje = models.CharField(max_length=255, blank=True, default='')
+
+    # Opciones de ejecutar_optimizacion() y resumen serializable del resultado
+    parametros = models.JSONField(default=dict, blank=True)
+    resultado = models.JSONField(null=True, blank=True)
+
+    # Soluciones incumbentes informadas durante la búsqueda (las últimas
+    # MAX_INCUMBENTES, numeradas con 'n') y pedido de aceptar la actual
+    incumbentes = models.JSONField(default=list, blank=True)
+    detener_solicitado = models.BooleanField(default=False)
+
+    creado_en = models.DateTimeField(auto_now_add=True)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    finalizado_en = models.DateTimeField(null=True, blank=True)
+
+    # Última señal de vida del proceso que lo ejecuta (ver
+    # solver_app.jobs.MonitorJob); si se atrasa, el trabajo se da por abandonado
+    latido_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-creado_en']
+
+    @property
+    def activo(self):
+        return self.estado in self.ESTADOS_ACTIVOS
+
+    def como_dict(self):
+        """Representación JSON usada por el endpoint de estado"""
+        return {
+            'id': self.pk,
+            'estado': self.estado,
+            'progreso': self.progreso,
+            'mensaje': self.mensaje,
+            'resultado': self.resultado,
+            'incumbente': self.incumbentes[-1] if self.incumbentes else None,
+            'detener_solicitado': self.detener_solicitado,
+            'creado_en': self.creado_en.isoformat() if self.creado_en else None,
+            'iniciado_en': self.iniciado_en.isoformat() if self.iniciado_en else None,
+            'finalizado_en': self.finalizado_en.isoformat() if self.finalizado_en else None,
+        }
+
+    def __str__(self):
+        return f"Trabajo #{self.pk} ({self.estado})"
+
+
+class SolucionCache(models.Model):
+    """
+    Solución ya calculada, indexada por la huella de la instancia
+    (filas de Ruta y Camion, parámetros del solver y versión del motor).
+    """
+    huella = models.CharField(max_length=64, primary_key=True)
+    parametros = models.JSONField(default=dict)
+    resultado = models.JSONField()  # Formato de serializar_resultados()
+    tamano_bytes = models.PositiveIntegerField(default=0)
+
+    # Contadores para la tasa de aciertos
+    aciertos = models.PositiveIntegerField(default=0)
+    resoluciones = models.PositiveIntegerField(default=1)
+
+    creado_en = models.DateTimeField(auto_now_add=True)
+    ultimo_acceso = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Solución en caché'
+        verbose_name_plural = 'Soluciones en caché'
+        ordering = ['-ultimo_acceso']
+
+    @property
+    def tasa_aciertos(self):
+        total = self.aciertos + self.resoluciones
+        return (self.aciertos / total * 100) if total else 0
+
+    def __str__(self):
+        return f"{self.huella[:12]} ({self.aciertos} aciertos)"
+
+
+class ResolucionEnCurso(models.Model):
+    """
+    Fila de bloqueo de una resolución en curso, por huella de la instancia
+    (ver solver_app.coalescencia).
+
+    La clave primaria garantiza un único dueño entre procesos y hosts; las
+    demás solicitudes de la misma huella esperan su resultado. Si el dueño
+    muere sin borrar la fila, deja de valer en `expira_en`.
+    """
+    huella = models.CharField(max_length=64, primary_key=True)
+    # Token del dueño: solo quien tomó la fila la libera
+    propietario = models.UUIDField(default=uuid.uuid4, editable=False)
+    iniciado_en = models.DateTimeField(auto_now_add=True)
+    expira_en = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Resolución en curso'
+        verbose_name_plural = 'Resoluciones en curso'
+
+    def __str__(self):
+        return f"{self.huella[:12]} (desde {self.iniciado_en:%H:%M:%S})"
+
+
+class SolverRun(models.Model):
+    """
+    Métricas de una resolución del solver: tiempo de cada fase, tamaño del
+    modelo, memoria pico y calidad de la solución. Permite ver qué fase
+    empeora a medida que crecen los datos.
+    """
+
+    # Fases medidas por SolverRutasLimpieza (claves de su dict `tiempos`);
+    # cada una se guarda en la columna tiempo_<fase>
+    FASES = (
+        'carga', 'presolve', 'heuristica', 'particion', 'modelo', 'objetivo',
+        'restricciones', 'resolucion', 'extraccion', 'estadisticas', 'guardado',
+    )
+
+    creado_en = models.DateTimeField(auto_now_add=True, db_index=True)
+    motor = models.CharField(max_length=20, blank=True, default='')
+    backend = models.CharField(max_length=20, blank=True, default='')
+    parametros = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=20)
+    mensaje = models.CharField(max_length=255, blank=True, default='')
+
+    # Tamaño de la instancia y del modelo
+    num_rutas = models.PositiveIntegerField(default=0)
+    num_camiones = models.PositiveIntegerField(default=0)
+    variables = models.PositiveIntegerField(null=True, blank=True)
+    restricciones = models.PositiveIntegerField(null=True, blank=True)
+
+    # Calidad de la solución
+    objetivo = models.FloatField(null=True, blank=True)
+    gap = models.FloatField(null=True, blank=True)
+
+    # Tiempos por fase, en segundos
+    tiempo_carga = models.FloatField(null=True, blank=True)
+    tiempo_presolve = models.FloatField(null=True, blank=True)
+    tiempo_heuristica = models.FloatField(null=True, blank=True)
+    tiempo_particion = models.FloatField(null=True, blank=True)
+    tiempo_modelo = models.FloatField(null=True, blank=True)
+    tiempo_objetivo = models.FloatField(null=True, blank=True)
+    tiempo_restricciones = models.FloatField(null=True, blank=True)
+    tiempo_resolucion = models.FloatField(null=True, blank=True)
+    tiempo_extraccion = models.FloatField(null=True, blank=True)
+    tiempo_estadisticas = models.FloatField(null=True, blank=True)
+    tiempo_guardado = models.FloatField(null=True, blank=True)
+    tiempo_total = models.FloatField(default=0)
+
+    memoria_pico_mb = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Ejecución del solver'
+        verbose_name_plural = 'Ejecuciones del solver'
+        ordering = ['-creado_en']
+
+    def como_dict(self):
+        """Representación JSON usada por la API de ejecuciones"""
+        return {
+            'id': self.pk,
+            'creado_en': self.creado_en.isoformat() if self.creado_en else None,
+            'motor': self.motor,
+            'backend': self.backend,
+            'estado': self.estado,
+            'mensaje': self.mensaje,
+            'num_rutas': self.num_rutas,
+            'num_camiones': self.num_camiones,
+            'variables': self.variables,
+            'restricciones': self.restricciones,
+            'objetivo': self.objetivo,
+            'gap': self.gap,
+            'tiempos': {fase: getattr(self, f'tiempo_{fase}') for fase in self.FASES},
+            'tiempo_total': self.tiempo_total,
+            'memoria_pico_mb': self.memoria_pico_mb,
+        }
+
+    def __str__(self):
+        return f"Ejecución #{self.pk} ({self.motor}, {self.estado}, {self.tiempo_total:.2f} s)"
+
+
+class MarcaIngesta(models.Model):
+    """
+    Marca de agua de la ingesta de un CSV de data/ (ver solver_app.carga).
+
+    Guarda el checksum y el tamaño del archivo ya procesado y el último
+    NRO_REGISTRO / FECHA_CORTE ingerido: load_data omite los archivos sin
+    cambios y, si solo se agregaron filas al final, procesa únicamente esas.
+    """
+    fuente = models.CharField(max_length=100, primary_key=True)  # Nombre del archivo
+    checksum = models.CharField(max_length=64)  # SHA-256 del archivo completo
+    tamano_bytes = models.BigIntegerField(default=0)
+    filas = models.BigIntegerField(default=0)
+    ultimo_nro_registro = models.BigIntegerField(null=True, blank=True)
+    ultima_fecha_corte = models.IntegerField(null=True, blank=True)  # AAAAMMDD
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Marca de ingesta'
+        verbose_name_plural = 'Marcas de ingesta'
+
+    def __str__(self):
+        return f"{self.fuente} ({self.filas} filas, {self.checksum[:12]})"
+
+
+class OperacionHistorica(models.Model):
+    """
+    Viaje registrado en el dataton (una fila de dataton_pueblo_libre.csv).
+
+    load_data guarda el histórico completo; los resúmenes Resumen* se
+    mantienen a partir de estas filas (ver solver_app.historico).
+    """
+    nro_registro = models.BigIntegerField(primary_key=True)
+    fecha_corte = models.DateField()
+    dia_recorrido = models.DateField()
+    semana_recorrido = models.PositiveSmallIntegerField()
+    turno = models.CharField(max_length=20)
+    placa = models.CharField(max_length=10)  # Sin FK: el camión puede no estar en la flota actual
+    conductor = models.CharField(max_length=64, blank=True, default='')
+    nro_boleta = models.BigIntegerField(null=True, blank=True)
+    cantidad_t = models.FloatField()  # Toneladas
+
+    class Meta:
+        verbose_name = 'Operación histórica'
+        verbose_name_plural = 'Operaciones históricas'
+        indexes = [
+            models.Index(fields=['placa', 'dia_recorrido']),
+            models.Index(fields=['turno', 'dia_recorrido']),
+            models.Index(fields=['dia_recorrido']),
+        ]
+
+    def __str__(self):
+        return f"#{self.nro_registro} {self.placa} {self.dia_recorrido} ({self.turno}, {self.cantidad_t} t)"
+
+
+class ResumenOperaciones(models.Model):
+    """Campos comunes de los resúmenes del histórico"""
+    viajes = models.PositiveIntegerField(default=0)
+    toneladas = models.FloatField(default=0)
+    max_toneladas = models.FloatField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def promedio_toneladas(self):
+        return self.toneladas / self.viajes if self.viajes else 0.0
+
+
+class ResumenPlacaTurnoDia(ResumenOperaciones):
+    """Viajes y toneladas por placa, turno y día"""
+    placa = models.CharField(max_length=10)
+    turno = models.CharField(max_length=20)
+    dia = models.DateField()
+
+    class Meta:
+        verbose_name = 'Resumen por placa, turno y día'
+        verbose_name_plural = 'Resúmenes por placa, turno y día'
+        constraints = [
+            models.UniqueConstraint(fields=['placa', 'turno', 'dia'], name='resumen_placa_turno_dia_unico'),
+        ]
+        indexes = [models.Index(fields=['dia'])]
+
+    def __str__(self):
+        return f"{self.placa} {self.turno} {self.dia}: {self.viajes} viajes"
+
+
+class ResumenPlacaSemana(ResumenOperaciones):
+    """Viajes y toneladas por placa y semana (semana = su lunes)"""
+    placa = models.CharField(max_length=10)
+    semana = models.DateField()
+
+    class Meta:
+        verbose_name = 'Resumen por placa y semana'
+        verbose_name_plural = 'Resúmenes por placa y semana'
+        constraints = [
+            models.UniqueConstraint(fields=['placa', 'semana'], name='resumen_placa_semana_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.placa} semana {self.semana}: {self.viajes} viajes"
+
+
+class ResumenTurnoDiaSemana(ResumenOperaciones):
+    """Viajes y toneladas por turno y día de la semana (0 = lunes)"""
+    turno = models.CharField(max_length=20)
+    dia_semana = models.PositiveSmallIntegerField()
+    # Días distintos con operaciones en este turno (para promedios diarios)
+    dias = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Resumen por turno y día de la semana'
+        verbose_name_plural = 'Resúmenes por turno y día de la semana'
+        constraints = [
+            models.UniqueConstraint(fields=['turno', 'dia_semana'], name='resumen_turno_dia_semana_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.turno} día {self.dia_semana}: {self.viajes} viajes"
+
+
+class VersionDatos(models.Model):
+    """
+    Contador de versión de un conjunto de datos ('datos': rutas y camiones;
+    'plan': plan de asignaciones activo).
+
+    Se incrementa cada vez que esos datos cambian (ver solver_app.versiones);
+    las cachés del dashboard usan la versión como parte de su clave.
+    """
+    nombre = models.CharField(max_length=20, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Versión de datos'
+        verbose_name_plural = 'Versiones de datos'
+
     def __str__(self):
-        return f"{self.camion_asignado.placa} -> {self.ruta_asignada.id_zona_barrido} (Turno: {self.turno})"
\ No newline at end of file
+        return f"{self.nombre} v{self.version}"
@@ -0,0 +1,11 @@
+"""
+Nombres de los motores y backends del solver.
+
+Viven aparte de solver_logic y backends para que las vistas y el admin puedan
+validar y listar las opciones sin importar OR-Tools (ni NumPy y pandas, que
+OR-Tools arrastra): los procesos web no cargan el stack del solver.
+"""
+
+MOTORES = ('auto', 'flujo', 'mip', 'sectores', 'heuristica')
+
+BACKENDS = ('SCIP', 'CBC', 'CP-SAT')
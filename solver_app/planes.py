@@ -0,0 +1,157 @@
+"""
+Persistencia versionada del plan de asignaciones.
+
+Cada solución se guarda como un PlanAsignacion nuevo: sus filas de
+AsignacionOptima se insertan con bulk_create y el plan se activa en la misma
+transacción, desactivando el anterior (las activaciones concurrentes se
+serializan con un bloqueo de fila). Un lector ve siempre un plan completo
+(el anterior hasta el commit, el nuevo después), nunca una tabla vacía o a
+medio escribir.
+
+Las versiones inactivas se conservan para auditoría y se podan en segundo
+plano después de cada guardado según la política de retención:
+SOLVER_PLANES_RETENIDOS (versiones inactivas que se conservan) y
+SOLVER_PLANES_DIAS (antigüedad máxima de una versión inactiva).
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from solver_app import versiones
+from solver_app.models import AsignacionOptima, PlanAsignacion
+
+logger = logging.getLogger(__name__)
+
+# Filas por INSERT en bulk_create (SQLite admite hasta 32766 parámetros)
+TAMANO_LOTE = 2000
+
+_poda_lock = threading.Lock()
+
+
+def guardar_plan(asignaciones, motor='', distancia_total=None, origen=PlanAsignacion.Origen.SOLVER):
+    """
+    Guarda una solución como plan nuevo y lo activa de forma atómica.
+
+    Args:
+        asignaciones: dicts con 'ruta', 'camion', 'turno', 'distancia_km' y
+            'carga_kg' (formato de SolverRutasLimpieza.solucion)
+        motor: motor que produjo la solución
+        distancia_total: valor objetivo de la solución
+        origen: PlanAsignacion.Origen
+
+    Returns:
+        PlanAsignacion: el plan ya activo
+    """
+    with transaction.atomic():
+        plan = PlanAsignacion.objects.create(
+            origen=origen,
+            motor=motor or '',
+            distancia_total=distancia_total,
+            num_asignaciones=len(asignaciones),
+        )
+        AsignacionOptima.todas.bulk_create(
+            (
+                AsignacionOptima(
+                    plan=plan,
+                    ruta_asignada=a['ruta'],
+                    camion_asignado=a['camion'],
+                    turno=a['turno'],
+                    costo_distancia_km=a['distancia_km'],
+                    carga_kg=a['carga_kg'],
+                )
+                for a in asignaciones
+            ),
+            batch_size=TAMANO_LOTE,
+        )
+        activar(plan)
+    transaction.on_commit(programar_poda)
+    return plan
+
+
+def activar(plan):
+    """Hace de `plan` el plan activo (debe llamarse dentro de una transacción)"""
+    # Las activaciones concurrentes se serializan: sin el bloqueo, dos
+    # transacciones en PostgreSQL desactivan cada una el plan anterior y la
+    # segunda choca con plan_activo_unico al activar el suyo
+    versiones.bloquear(versiones.PLAN)
+    # Primero se desactiva el anterior: la restricción plan_activo_unico no
+    # admite dos planes activos ni siquiera dentro de la transacción
+    PlanAsignacion.objects.filter(activo=True).exclude(pk=plan.pk).update(activo=False)
+    PlanAsignacion.objects.filter(pk=plan.pk).update(activo=True)
+    plan.activo = True
+    versiones.incrementar(versiones.PLAN)
+
+
+def plan_activo():
+    """PlanAsignacion activo, o None si no hay asignaciones guardadas"""
+    return PlanAsignacion.objects.filter(activo=True).first()
+
+
+def descartar_plan_activo():
+    """
+    Elimina el plan activo con sus asignaciones.
+
+    Returns:
+        int: asignaciones eliminadas
+    """
+    plan = plan_activo()
+    if plan is None:
+        return 0
+    plan.delete()
+    return plan.num_asignaciones
+
+
+def podar(retenidos=None, dias=None):
+    """
+    Elimina las versiones inactivas que exceden la política de retención.
+
+    Args:
+        retenidos: versiones inactivas que se conservan (por defecto
+            settings.SOLVER_PLANES_RETENIDOS)
+        dias: antigüedad máxima de una versión inactiva (por defecto
+            settings.SOLVER_PLANES_DIAS; None = sin límite)
+
+    Returns:
+        int: planes eliminados
+    """
+    if retenidos is None:
+        retenidos = getattr(settings, 'SOLVER_PLANES_RETENIDOS', 10)
+    if dias is None:
+        dias = getattr(settings, 'SOLVER_PLANES_DIAS', None)
+
+    inactivos = PlanAsignacion.objects.filter(activo=False).order_by('-creado_en')
+    conservados = list(inactivos.values_list('pk', flat=True)[:retenidos])
+    if dias is not None:
+        limite = timezone.now() - timedelta(days=dias)
+        conservados = list(
+            PlanAsignacion.objects.filter(pk__in=conservados, creado_en__gte=limite)
+            .values_list('pk', flat=True)
+        )
+
+    _, por_modelo = inactivos.exclude(pk__in=conservados).delete()
+    eliminados = por_modelo.get(PlanAsignacion._meta.label, 0)
+    if eliminados:
+        logger.info(f"Poda de planes: eliminadas {eliminados} versiones antiguas")
+    return eliminados
+
+
+def programar_poda():
+    """Poda las versiones antiguas en un hilo aparte (una poda a la vez)"""
+    if not _poda_lock.acquire(blocking=False):
+        return  # Ya hay una poda en curso
+
+    def ejecutar():
+        try:
+            podar()
+        except Exception as e:
+            logger.warning(f"No se pudieron podar los planes antiguos: {str(e)}")
+        finally:
+            connection.close()
+            _poda_lock.release()
+
+    threading.Thread(target=ejecutar, name='poda-planes', daemon=True).start()
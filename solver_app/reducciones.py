@@ -0,0 +1,125 @@
+"""
+Etapa de presolve previa al MIP.
+
+Cada reducción transforma la Instancia (máscara, cupos, asignaciones fijas y
+cadenas de simetría) antes de construir el modelo, y se registra cuántas
+variables y restricciones eliminó comparando dimensiones_modelo() antes y
+después:
+
+    1. pares_infactibles: descarta los pares (camión, ruta) cuya ruta no cabe
+       en el camión y las restricciones de capacidad que quedan redundantes.
+    2. asignaciones_forzadas: fija las rutas con un único slot posible y
+       propaga la ocupación del slot hasta un punto fijo.
+    3. simetria: agrupa camiones de igual capacidad con slots idénticos y
+       ordena su uso para no explorar permutaciones equivalentes.
+"""
+
+import logging
+
+import numpy as np
+
+from solver_app.instancia import InstanciaInfactible, dimensiones_modelo
+
+logger = logging.getLogger(__name__)
+
+
+def podar_pares_infactibles(instancia):
+    """Elimina pares imposibles por capacidad y capacidades redundantes"""
+    compatibles = instancia.residuos[np.newaxis, np.newaxis, :] <= \
+        instancia.capacidad_restante[:, :, np.newaxis]  # (C, T, R)
+    instancia.mascara &= compatibles.transpose(0, 2, 1)
+
+    # La capacidad de un slot es redundante si ni siquiera sus `cupo` rutas
+    # permitidas más pesadas la superan
+    cargas = np.where(instancia.mascara, instancia.residuos[np.newaxis, :, np.newaxis], 0.0)
+    max_cupo = int(instancia.cupo.max(initial=0))
+    if max_cupo > 0:
+        mas_pesadas = -np.sort(-cargas, axis=1)[:, :max_cupo, :]  # (C, cupo, T)
+        acumuladas = np.cumsum(mas_pesadas, axis=1)
+        indice = np.clip(instancia.cupo - 1, 0, max_cupo - 1)[:, np.newaxis, :]
+        peor_caso = np.take_along_axis(acumuladas, indice, axis=1)[:, 0, :]
+        instancia.emitir_capacidad &= peor_caso > instancia.capacidad_restante
+
+
+def fijar_asignaciones_forzadas(instancia):
+    """
+    Fija las rutas que solo pueden ir a un slot (camión, turno).
+
+    Raises:
+        InstanciaInfactible: si alguna ruta pendiente se queda sin slots posibles
+    """
+    while True:
+        pares_por_ruta = instancia.mascara.sum(axis=(0, 2))
+        sin_slot = np.flatnonzero(instancia.rutas_pendientes & (pares_por_ruta == 0))
+        if len(sin_slot):
+            zonas = [instancia.rutas[j].id_zona_barrido for j in sin_slot[:10]]
+            raise InstanciaInfactible(
+                f"No se pudo encontrar una solución óptima. Estado: Infeasible "
+                f"({len(sin_slot)} rutas sin camión compatible, p. ej. zonas {zonas})"
+            )
+
+        forzadas = np.flatnonzero(instancia.rutas_pendientes & (pares_por_ruta == 1))
+        if not len(forzadas):
+            return
+
+        for j in forzadas:
+            pares = np.argwhere(instancia.mascara[:, j, :])
+            # Una fijación anterior de esta pasada pudo ocupar el slot
+            if len(pares) == 1:
+                i, t = pares[0]
+                instancia.fijar(int(i), int(j), int(t))
+
+
+def romper_simetria(instancia):
+    """Agrupa slots idénticos por turno en cadenas de uso no creciente"""
+    instancia.cadenas_simetria = []
+    for t in range(instancia.num_turnos):
+        clases = {}
+        for i in range(instancia.num_camiones):
+            if not instancia.mascara[i, :, t].any():
+                continue
+            firma = (
+                instancia.capacidades[i],
+                instancia.capacidad_restante[i, t],
+                int(instancia.cupo[i, t]),
+                np.packbits(instancia.mascara[i, :, t]).tobytes(),
+            )
+            clases.setdefault(firma, []).append(i)
+        instancia.cadenas_simetria.extend(
+            (t, camiones) for camiones in clases.values() if len(camiones) > 1
+        )
+
+
+REDUCCIONES = [
+    ('pares_infactibles', podar_pares_infactibles),
+    ('asignaciones_forzadas', fijar_asignaciones_forzadas),
+    ('simetria', romper_simetria),
+]
+
+
+def presolver(instancia):
+    """
+    Aplica las reducciones en orden sobre la instancia.
+
+    Returns:
+        list: un dict por reducción con 'reduccion', 'variables_eliminadas'
+            y 'restricciones_eliminadas' (negativo si la reducción agrega
+            restricciones, como la ruptura de simetría)
+    """
+    informe = []
+    for nombre, reduccion in REDUCCIONES:
+        antes = dimensiones_modelo(instancia)
+        reduccion(instancia)
+        despues = dimensiones_modelo(instancia)
+
+        paso = {
+            'reduccion': nombre,
+            'variables_eliminadas': antes['variables'] - despues['variables'],
+            'restricciones_eliminadas': antes['restricciones'] - despues['restricciones'],
+        }
+        informe.append(paso)
+        logger.info(
+            f"Presolve [{nombre}]: {paso['variables_eliminadas']} variables y "
+            f"{paso['restricciones_eliminadas']} restricciones eliminadas"
+        )
+    return informe
@@ -0,0 +1,47 @@
+"""
+Señales que incrementan las versiones de datos (solver_app.versiones).
+
+Cubren las escrituras fila a fila (admin, shell) y la eliminación del plan
+activo. Las escrituras masivas (load_data, planes.guardar_plan) no emiten
+señales e incrementan las versiones explícitamente.
+
+Rutas, camiones y asignaciones solo se escuchan en post_save: un receptor de
+post_delete obligaría a Django a cargar y notificar cada fila en los borrados
+masivos (rutas ausentes en load_data, asignaciones en cascada al borrar un
+plan). Los borrados desde el admin se cubren con su LogEntry.
+"""
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from solver_app import versiones
+from solver_app.models import AsignacionOptima, Camion, PlanAsignacion, Ruta
+
+
+@receiver(post_save, sender=Ruta)
+@receiver(post_save, sender=Camion)
+def datos_modificados(sender, **kwargs):
+    versiones.incrementar(versiones.DATOS)
+
+
+@receiver(post_save, sender=AsignacionOptima)
+def asignacion_modificada(sender, **kwargs):
+    versiones.incrementar(versiones.PLAN)
+
+
+@receiver([post_save, post_delete], sender=PlanAsignacion)
+def plan_modificado(sender, instance, **kwargs):
+    """Solo importa el plan activo (la poda borra versiones inactivas)"""
+    if instance.activo:
+        versiones.incrementar(versiones.PLAN)
+
+
+@receiver(post_save, sender=LogEntry)
+def cambio_en_admin(sender, instance, created, **kwargs):
+    """Cualquier alta, cambio o baja de un modelo de solver_app en el admin"""
+    if not created or instance.content_type_id is None:
+        return
+    if ContentType.objects.get_for_id(instance.content_type_id).app_label == 'solver_app':
+        versiones.incrementar()
@@ -3,13 +3,27 @@ Motor de Optimización para Asignación de Rutas de Limpieza
 Utiliza programación lineal con Google OR-Tools para asignar camiones a rutas de manera óptima.
 """
 
-from ortools.linear_solver import pywraplp
-from solver_app.models import Ruta, Camion, AsignacionOptima
+from solver_app.models import Ruta, Camion, AsignacionOptima, PlanAsignacion
+from solver_app import flujo
+from solver_app.descomposicion import resolver_por_sectores, PlanInconsistente
+from solver_app.heuristica import resolver_heuristica
+from solver_app.backends import ResultadoSolver, obtener_backend
+from solver_app.instancia import Instancia, ConstructorModelo, InstanciaInfactible
+from solver_app.reducciones import presolver
+from solver_app import cache_soluciones, coalescencia, motores
+from solver_app import planes
+from solver_app.instrumentacion import medir, registrar_ejecucion, reiniciar_pico_memoria
+from django.conf import settings
 from django.db.models import Sum
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Versión del motor de optimización. Forma parte de la huella de la caché de
+# soluciones: incrementarla cuando un cambio pueda alterar las soluciones.
+VERSION_MOTOR = '1'
+
 
 class SolverRutasLimpieza:
     """
@@ -21,96 +35,200 @@ class SolverRutasLimpieza:
         - Cada ruta debe ser cubierta exactamente una vez
         - La carga asignada a cada camión no puede exceder su capacidad
         - Cada camión puede hacer múltiples viajes en diferentes turnos
+    
+    Motores:
+        - 'flujo': asignación por flujo de costo mínimo (ver solver_app.flujo),
+          válido mientras el modelo conserve la estructura de asignación
+        - 'mip': modelo entero mixto general, resuelto con el backend elegido
+          (SCIP, CBC o CP-SAT; ver solver_app.backends)
+        - 'sectores': un MIP por sector resuelto en paralelo en un pool de
+          procesos (ver solver_app.descomposicion), para distritos grandes
+        - 'heuristica': best-fit decreciente + búsqueda local (ver
+          solver_app.heuristica); plan factible en milisegundos, sin garantía
+          de optimalidad
+        - 'auto': usa 'flujo' si la estructura se cumple y 'mip' si no
     """
     
-    TURNOS = ['MAÑANA', 'TARDE', 'NOCHE']
+    TURNOS = AsignacionOptima.TURNOS
+    MOTORES = motores.MOTORES
+    
+    # Límite de tiempo por defecto del MIP (300 segundos = 5 minutos)
+    LIMITE_TIEMPO_S = 300
+    
+    # Presupuesto de la búsqueda local de la heurística
+    TIEMPO_BUSQUEDA_LOCAL_S = 0.2
+    
+    # Vecindarios del modo incremental, de menor a mayor
+    NIVELES_INCREMENTALES = ('rutas', 'turnos', 'completo')
     
-    def __init__(self):
-        self.rutas = list(Ruta.objects.all())
-        self.camiones = list(Camion.objects.all())
-        self.solver = None
-        self.variables = {}
+    # Parámetros que afectan a la solución (y por tanto a la huella de caché)
+    PARAMETROS_DEFECTO = {
+        'motor': None,
+        'backend': None,
+        'objetivo_secundario': None,
+        'rutas_por_turno': 1,
+        'presolve': True,
+        'incremental': False,
+        'limite_tiempo_s': None,
+        'gap_relativo': None,
+        'objetivo_aceptable': None,
+        'pista_heuristica': True,
+    }
+    
+    def __init__(self, progreso=None, motor=None, objetivo_secundario=None,
+                 rutas_por_turno=1, con_nombres=False, presolve=True,
+                 incremental=False, backend=None, hilos=None,
+                 rutas=None, camiones=None, limite_tiempo_s=None,
+                 gap_relativo=None, objetivo_aceptable=None,
+                 al_mejorar=None, detener=None, pista_heuristica=True,
+                 liberar_camiones=None):
+        """
+        Args:
+            progreso: callable opcional (porcentaje, mensaje) que se invoca
+                al avanzar cada fase; lo usan los trabajos en segundo plano.
+            motor: 'auto', 'flujo', 'mip', 'sectores' o 'heuristica' (por
+                defecto settings.SOLVER_MOTOR)
+            objetivo_secundario: criterio de desempate del motor de flujo
+                (None, 'utilizacion' o 'balance')
+            rutas_por_turno: máximo de rutas por camión en un mismo turno
+            con_nombres: nombrar variables y restricciones del MIP (útil
+                para depurar; más lento y con más memoria en flotas grandes)
+            presolve: aplicar las reducciones de solver_app.reducciones antes
+                de construir el MIP
+            incremental: partir del plan guardado en AsignacionOptima y
+                re-optimizar solo las rutas y turnos afectados por cambios
+            backend: solver del MIP: 'SCIP', 'CBC' o 'CP-SAT'
+                (por defecto settings.SOLVER_BACKEND)
+            hilos: workers de búsqueda en paralelo del backend
+            rutas, camiones: datos en memoria en lugar de los de la base de
+                datos (p. ej. instancias sintéticas del benchmark)
+            limite_tiempo_s: límite de tiempo del MIP (por defecto LIMITE_TIEMPO_S)
+            gap_relativo: gap relativo con el que el MIP se da por resuelto
+                (p. ej. 0.01 = 1%)
+            objetivo_aceptable: distancia total "suficientemente buena"; la
+                búsqueda se detiene al encontrar una solución que la alcance
+            al_mejorar: callable opcional que recibe cada solución incumbente
+                (objetivo, cota, gap y tiempo) a medida que el solver la encuentra
+            detener: threading.Event opcional; al activarse se acepta la mejor
+                solución encontrada y se detiene la búsqueda
+            pista_heuristica: sugerir al MIP el plan de la heurística como
+                solución inicial cuando no hay otra pista (plan anterior)
+            liberar_camiones: placas cuyas asignaciones el modo incremental
+                reasigna aunque sigan siendo válidas
+        """
+        # Tiempo de cada fase en segundos (ver SolverRun.FASES)
+        self.tiempos = {}
+        with medir(self.tiempos, 'carga'):
+            self.rutas = list(Ruta.objects.all()) if rutas is None else list(rutas)
+            self.camiones = (
+                list(Camion.objects.filter(disponible=True)) if camiones is None else list(camiones)
+            )
+            self.rutas_por_turno = rutas_por_turno
+            self.instancia = self.crear_instancia()
+        self.resultado_solver = None
+        self.modelo = None
         self.solucion = []
+        self.progreso = progreso
+        self.motor = motor or getattr(settings, 'SOLVER_MOTOR', 'auto')
+        self.objetivo_secundario = objetivo_secundario
+        self.con_nombres = con_nombres
+        self.presolve = presolve
+        self.informe_presolve = []
+        self.incremental = incremental
+        self.liberar_camiones = set(liberar_camiones or ())
+        self.info_incremental = None
+        self.info_descomposicion = None
+        self.pista = []
+        self.pista_completa = False
+        self.pista_heuristica = pista_heuristica
+        self.info_heuristica = None
+        self.motor_usado = None
+        self.plan = None
+        self.backend = backend or getattr(settings, 'SOLVER_BACKEND', 'SCIP')
+        self.hilos = hilos
+        self.limite_tiempo_s = limite_tiempo_s or self.LIMITE_TIEMPO_S
+        self.gap_relativo = gap_relativo
+        self.objetivo_aceptable = objetivo_aceptable
+        self.al_mejorar = al_mejorar
+        self.detener = detener
+        
+        if self.motor not in self.MOTORES:
+            raise ValueError(f"Motor desconocido: {self.motor}")
+        
+    def crear_instancia(self):
+        """Carga rutas y camiones en una Instancia vectorizada nueva"""
+        return Instancia(self.rutas, self.camiones, self.TURNOS, self.rutas_por_turno)
+    
+    def notificar_progreso(self, porcentaje, mensaje):
+        """Informa el avance de la resolución si hay un callback registrado"""
+        if self.progreso is not None:
+            self.progreso(porcentaje, mensaje)
+    
+    def notificar_incumbente(self, incumbente):
+        """
+        Informa una nueva mejor solución. Puede invocarse desde los hilos de
+        búsqueda del backend.
+        """
+        logger.info(
+            f"Nueva solución incumbente: {incumbente['objetivo']:.2f} km "
+            f"(gap {incumbente['gap']}) a los {incumbente['tiempo']:.2f} s"
+        )
+        if self.al_mejorar is not None:
+            self.al_mejorar(incumbente)
+    
+    def debe_detenerse(self):
+        """True si se pidió aceptar la solución actual y detener la búsqueda"""
+        return self.detener is not None and self.detener.is_set()
         
     def crear_modelo(self):
         """Crea el modelo de programación lineal con OR-Tools"""
         logger.info("Creando modelo de optimización con Google OR-Tools...")
         
-        # Crear el solver (SCIP es el solver de código abierto para MIP)
-        self.solver = pywraplp.Solver.CreateSolver('SCIP')
-        
-        if not self.solver:
-            raise Exception("No se pudo crear el solver SCIP de OR-Tools")
-        
         # Variables de decisión: x[i,j,t] = 1 si el camión i cubre la ruta j en el turno t
-        self.variables = {}
-        for camion in self.camiones:
-            for ruta in self.rutas:
-                for turno in self.TURNOS:
-                    var_name = f"x_{camion.placa}_{ruta.id_zona_barrido}_{turno}"
-                    # Variable binaria (0 o 1)
-                    self.variables[(camion.placa, ruta.id_zona_barrido, turno)] = \
-                        self.solver.BoolVar(var_name)
+        # (una por cada par permitido de la máscara de la instancia)
+        self.modelo = ConstructorModelo(self.instancia, con_nombres=self.con_nombres)
+        self.modelo.crear_variables()
         
-        logger.info(f"Creadas {len(self.variables)} variables de decisión binarias")
+        logger.info(f"Creadas {self.modelo.num_variables} variables de decisión binarias")
         
     def agregar_funcion_objetivo(self):
         """
         Función objetivo: Minimizar la distancia total recorrida
         """
-        # Crear la expresión de la función objetivo
-        objetivo = self.solver.Sum([
-            self.variables[(c.placa, r.id_zona_barrido, t)] * float(r.distancia_km)
-            for c in self.camiones
-            for r in self.rutas
-            for t in self.TURNOS
-        ])
-        
-        # Establecer como objetivo de minimización
-        self.solver.Minimize(objetivo)
+        self.modelo.agregar_funcion_objetivo()
         
         logger.info("Función objetivo agregada: Minimizar distancia total")
         
     def agregar_restricciones(self):
         """Agrega todas las restricciones al modelo"""
+        conteo = self.modelo.agregar_restricciones()
         
-        # Restricción 1: Cada ruta debe ser cubierta exactamente una vez
-        for ruta in self.rutas:
-            self.solver.Add(
-                self.solver.Sum([
-                    self.variables[(c.placa, ruta.id_zona_barrido, t)]
-                    for c in self.camiones
-                    for t in self.TURNOS
-                ]) == 1
-            )
+        logger.info(f"Agregadas {conteo['cobertura']} restricciones de cobertura de rutas")
+        logger.info(f"Agregadas {conteo['capacidad']} restricciones de capacidad")
+        logger.info(f"Agregadas {conteo['simultaneidad']} restricciones de simultaneidad (máximo {self.rutas_por_turno} ruta(s) por camión por turno)")
+        logger.info(f"Agregadas {conteo['simetria']} restricciones de ruptura de simetría")
         
-        logger.info(f"Agregadas {len(self.rutas)} restricciones de cobertura de rutas")
-        
-        # Restricción 2: Capacidad de cada camión por turno
-        for camion in self.camiones:
-            for turno in self.TURNOS:
-                self.solver.Add(
-                    self.solver.Sum([
-                        self.variables[(camion.placa, r.id_zona_barrido, turno)] * 
-                        float(r.residuos_kg)
-                        for r in self.rutas
-                    ]) <= float(camion.capacidad_kg)
-                )
-        
-        logger.info(f"Agregadas {len(self.camiones) * len(self.TURNOS)} restricciones de capacidad")
-        
-        # Restricción 3: Un camión puede hacer como máximo 1 ruta por turno
-        # (un camión no puede estar en dos lugares al mismo tiempo)
-        for camion in self.camiones:
-            for turno in self.TURNOS:
-                self.solver.Add(
-                    self.solver.Sum([
-                        self.variables[(camion.placa, r.id_zona_barrido, turno)]
-                        for r in self.rutas
-                    ]) <= 1
-                )
+    def tiene_estructura_asignacion(self):
+        """
+        Indica si el modelo es una asignación bipartita pura entre rutas y
+        slots (camión, turno).
         
-        logger.info(f"Agregadas {len(self.camiones) * len(self.TURNOS)} restricciones de simultaneidad (máximo 1 ruta por camión por turno)")
+        Con una sola ruta por camión y turno, la restricción de capacidad se
+        reduce a compatibilidad de pares (residuos_kg <= capacidad_kg) y el
+        problema se resuelve como flujo. Con más rutas por turno la capacidad
+        pasa a ser una mochila y hace falta el MIP general.
+        """
+        return self.rutas_por_turno == 1
+    
+    def seleccionar_motor(self):
+        """Decide qué motor usar para esta ejecución"""
+        if self.motor in ('mip', 'sectores', 'heuristica'):
+            return self.motor
+        if self.tiene_estructura_asignacion():
+            return 'flujo'
+        if self.motor == 'flujo':
+            logger.warning("El modelo no tiene estructura de asignación; se usará el MIP (SCIP)")
+        return 'mip'
         
     def resolver(self):
         """
@@ -121,76 +239,384 @@ class SolverRutasLimpieza:
         """
         logger.info("Iniciando resolución del problema con OR-Tools...")
         
-        # Crear modelo completo
-        self.crear_modelo()
-        self.agregar_funcion_objetivo()
-        self.agregar_restricciones()
+        motor = self.motor_usado = self.seleccionar_motor()
+        if self.incremental:
+            estado, distancia_total = self.resolver_incremental(motor)
+        else:
+            estado, distancia_total = self.resolver_con_motor(motor)
+        
+        # Calcular estadísticas
+        with medir(self.tiempos, 'estadisticas'):
+            estadisticas = self.calcular_estadisticas()
+        
+        return {
+            'estado': estado,
+            'motor': motor,
+            'distancia_total': distancia_total,
+            'asignaciones': self.solucion,
+            'estadisticas': estadisticas,
+            'tiempos': self.tiempos,
+            'solver': self.resultado_solver.como_dict(),
+            'incremental': self.info_incremental,
+            'descomposicion': self.info_descomposicion,
+            'heuristica': self.info_heuristica
+        }
+    
+    def resolver_con_motor(self, motor):
+        """Resuelve la instancia actual con el motor indicado"""
+        if motor == 'flujo':
+            return self.resolver_flujo()
+        if motor == 'sectores':
+            return self.resolver_sectores()
+        if motor == 'heuristica':
+            return self.resolver_heuristica()
+        return self.resolver_mip()
+    
+    def analizar_plan_anterior(self):
+        """
+        Compara el plan guardado en AsignacionOptima con los datos actuales.
         
-        # Configurar límite de tiempo (opcional, 300 segundos = 5 minutos)
-        self.solver.SetTimeLimit(300000)  # en milisegundos
+        Una asignación sigue vigente si su ruta y su camión existen (y el
+        camión está disponible y no se pidió liberarlo), los datos de la ruta
+        no cambiaron y las rutas del slot siguen cabiendo en el camión. El
+        resto de rutas (nuevas, modificadas o cuyo camión ya no sirve) quedan
+        afectadas, junto con los turnos donde estaban.
+        
+        Returns:
+            dict: 'vigentes' (lista de (camión, ruta, turno)),
+                'rutas_afectadas' y 'turnos_afectados' (sets de índices)
+        """
+        inst = self.instancia
+        idx_ruta = {r.id_zona_barrido: j for j, r in enumerate(self.rutas)}
+        idx_camion = {c.placa: i for i, c in enumerate(self.camiones)}
+        idx_turno = {t: k for k, t in enumerate(self.TURNOS)}
+        
+        por_slot = {}
+        turnos_afectados = set()
+        filas = AsignacionOptima.objects.values_list(
+            'ruta_asignada_id', 'camion_asignado_id', 'turno', 'carga_kg', 'costo_distancia_km'
+        )
+        for zona, placa, turno, carga, distancia in filas:
+            j, i, t = idx_ruta.get(zona), idx_camion.get(placa), idx_turno.get(turno)
+            if j is None or t is None:
+                continue
+            sin_cambios = (
+                round(float(carga), 2) == round(inst.residuos[j], 2)
+                and round(float(distancia), 2) == round(inst.distancias[j], 2)
+            )
+            if i is None or not sin_cambios or placa in self.liberar_camiones:
+                turnos_afectados.add(t)
+                continue
+            por_slot.setdefault((i, t), []).append(j)
+        
+        vigentes = []
+        for (i, t), rutas_slot in por_slot.items():
+            if len(rutas_slot) <= inst.cupo[i, t] and \
+                    inst.residuos[rutas_slot].sum() <= inst.capacidades[i]:
+                vigentes.extend((i, j, t) for j in rutas_slot)
+            else:
+                turnos_afectados.add(t)
+        
+        cubiertas = {j for _, j, _ in vigentes}
+        rutas_afectadas = set(range(inst.num_rutas)) - cubiertas
+        return {
+            'vigentes': vigentes,
+            'rutas_afectadas': rutas_afectadas,
+            'turnos_afectados': turnos_afectados,
+        }
+    
+    def resolver_incremental(self, motor):
+        """
+        Re-optimiza a partir del plan guardado.
+        
+        Mantiene fijas las asignaciones vigentes y resuelve solo el
+        vecindario afectado, ampliándolo si resulta infactible:
+            - 'rutas': solo se reasignan las rutas afectadas
+            - 'turnos': se liberan además todos los turnos afectados
+            - 'completo': resolución completa, con el plan anterior como pista
+        
+        Returns:
+            tuple: (estado, distancia_total)
+        """
+        inicio = time.perf_counter()
+        plan = self.analizar_plan_anterior()
+        logger.info(
+            f"Modo incremental: {len(plan['vigentes'])} asignaciones vigentes, "
+            f"{len(plan['rutas_afectadas'])} rutas afectadas"
+        )
+        self.pista = plan['vigentes']
+        
+        for nivel in self.NIVELES_INCREMENTALES:
+            if nivel == 'rutas':
+                fijas = plan['vigentes']
+            elif nivel == 'turnos':
+                if not plan['turnos_afectados']:
+                    continue  # Mismo vecindario que 'rutas'
+                fijas = [a for a in plan['vigentes'] if a[2] not in plan['turnos_afectados']]
+            else:
+                fijas = []
+            
+            self.instancia = self.crear_instancia()
+            for i, j, t in fijas:
+                self.instancia.fijar(i, j, t)
+            
+            try:
+                estado, distancia_total = self.resolver_con_motor(motor)
+            except InstanciaInfactible:
+                logger.info(f"Vecindario '{nivel}' infactible; ampliando")
+                if nivel == self.NIVELES_INCREMENTALES[-1]:
+                    raise
+                continue
+            
+            self.info_incremental = {
+                'nivel': nivel,
+                'rutas_fijas': len(fijas),
+                'rutas_reoptimizadas': self.instancia.num_rutas - len(fijas),
+                'tiempo': time.perf_counter() - inicio,
+            }
+            logger.info(
+                f"✓ Re-optimización incremental (vecindario '{nivel}'): "
+                f"{self.info_incremental['rutas_reoptimizadas']} rutas reasignadas"
+            )
+            return estado, distancia_total
+    
+    def resolver_flujo(self):
+        """
+        Resuelve la asignación como flujo de costo mínimo (tiempo polinomial)
+        
+        Returns:
+            tuple: (estado, distancia_total)
+        """
+        self.notificar_progreso(10, 'Resolviendo asignación por flujo de costo mínimo')
+        logger.info("Estructura de asignación detectada: resolviendo con SimpleMinCostFlow")
+        
+        with medir(self.tiempos, 'resolucion'):
+            resultado = flujo.resolver_asignacion(
+                self.instancia.capacidades,
+                self.instancia.residuos,
+                self.instancia.num_turnos,
+                objetivo_secundario=self.objetivo_secundario,
+                mascara=self.instancia.mascara,
+                rutas_pendientes=self.instancia.rutas_pendientes,
+            )
+        
+        if not resultado['factible']:
+            raise InstanciaInfactible(
+                f"No se pudo encontrar una solución óptima. Estado: Infeasible "
+                f"({resultado['rutas_sin_cubrir']} rutas sin camión compatible disponible)"
+            )
+        
+        self.notificar_progreso(80, 'Extrayendo solución')
+        with medir(self.tiempos, 'extraccion'):
+            self.construir_solucion(self.instancia.fijas + resultado['asignaciones'])
+            self.solucion.sort(key=lambda a: a['ruta'].id_zona_barrido)
+        
+        distancia_total = sum(a['distancia_km'] for a in self.solucion)
+        self.resultado_solver = ResultadoSolver(
+            'FLUJO', 'Optimal', objetivo=distancia_total, cota=distancia_total,
+            tiempo=self.tiempos['resolucion'],
+        )
+        self.notificar_incumbente(self.resultado_solver.como_incumbente())
+        
+        logger.info(f"✓ Solución óptima encontrada por flujo ({len(self.solucion)} asignaciones)")
+        return 'Optimal', distancia_total
+    
+    def resolver_sectores(self):
+        """
+        Resuelve un MIP por sector en paralelo y combina los planes.
+        
+        Si la partición de la flota deja algún sector sin solución, se
+        resuelve la instancia completa con el MIP monolítico.
+        
+        Returns:
+            tuple: (estado, distancia_total)
+        """
+        self.notificar_progreso(10, 'Resolviendo subproblemas por sector')
+        inicio = time.perf_counter()
+        try:
+            resultado = resolver_por_sectores(
+                self.instancia, self.backend, self.limite_tiempo_s,
+                gap_relativo=self.gap_relativo, presolve=self.presolve,
+            )
+        except InstanciaInfactible as e:
+            logger.warning(f"Descomposición por sectores infactible ({e}); se resuelve el MIP completo")
+            return self.resolver_mip()
+        except PlanInconsistente as e:
+            logger.error(f"{e}; se resuelve el MIP completo")
+            return self.resolver_mip()
+        self.tiempos['particion'] = resultado['tiempo_particion']
+        self.tiempos['resolucion'] = time.perf_counter() - inicio - resultado['tiempo_particion']
+        
+        self.notificar_progreso(80, 'Extrayendo solución')
+        with medir(self.tiempos, 'extraccion'):
+            self.construir_solucion(self.instancia.fijas + resultado['asignaciones'])
+            self.solucion.sort(key=lambda a: a['ruta'].id_zona_barrido)
+        
+        distancia_total = sum(a['distancia_km'] for a in self.solucion)
+        estado = resultado['estado']
+        self.resultado_solver = ResultadoSolver(
+            self.backend, estado, objetivo=distancia_total,
+            cota=distancia_total if estado == 'Optimal' else None,
+            tiempo=self.tiempos['resolucion'],
+        )
+        self.notificar_incumbente(self.resultado_solver.como_incumbente())
+        self.info_descomposicion = {
+            'sectores': len(resultado['subproblemas']),
+            'procesos': resultado['procesos'],
+            'subproblemas': resultado['subproblemas'],
+        }
+        
+        logger.info(
+            f"✓ Plan combinado de {len(resultado['subproblemas'])} sectores "
+            f"({resultado['procesos']} procesos) en {time.perf_counter() - inicio:.3f} s"
+        )
+        return estado, distancia_total
+    
+    def resolver_heuristica(self):
+        """
+        Construye un plan factible con best-fit decreciente + búsqueda local
+        
+        Returns:
+            tuple: (estado, distancia_total)
+        """
+        self.notificar_progreso(10, 'Construyendo plan rápido (heurística)')
+        with medir(self.tiempos, 'heuristica'):
+            asignaciones, self.info_heuristica = resolver_heuristica(
+                self.instancia, tiempo_max_s=self.TIEMPO_BUSQUEDA_LOCAL_S,
+            )
+        
+        self.notificar_progreso(80, 'Extrayendo solución')
+        with medir(self.tiempos, 'extraccion'):
+            self.construir_solucion(self.instancia.fijas + asignaciones)
+            self.solucion.sort(key=lambda a: a['ruta'].id_zona_barrido)
+        
+        distancia_total = sum(a['distancia_km'] for a in self.solucion)
+        self.resultado_solver = ResultadoSolver(
+            'HEURISTICA', 'Feasible', objetivo=distancia_total,
+            tiempo=self.tiempos['heuristica'],
+        )
+        self.notificar_incumbente(self.resultado_solver.como_incumbente())
+        
+        logger.info(
+            f"✓ Plan heurístico en {self.tiempos['heuristica'] * 1000:.1f} ms "
+            f"({len(self.solucion)} asignaciones)"
+        )
+        return 'Feasible', distancia_total
+    
+    def calcular_pista_heuristica(self):
+        """
+        Plan heurístico para usar como solución inicial del MIP.
+        
+        Returns:
+            list: tuplas (camión, ruta, turno), vacía si la heurística no
+                logra ubicar todas las rutas (el MIP puede seguir siendo factible)
+        """
+        with medir(self.tiempos, 'heuristica'):
+            try:
+                asignaciones, self.info_heuristica = resolver_heuristica(
+                    self.instancia, tiempo_max_s=self.TIEMPO_BUSQUEDA_LOCAL_S,
+                )
+            except InstanciaInfactible as e:
+                logger.info(f"Sin pista heurística para el MIP: {e}")
+                return []
+        return asignaciones
+    
+    def resolver_mip(self):
+        """
+        Resuelve el modelo entero mixto general con el backend configurado
+        
+        Returns:
+            tuple: (estado, distancia_total)
+        """
+        # Reducir la instancia antes de crear el modelo
+        if self.presolve:
+            self.notificar_progreso(5, 'Aplicando reducciones (presolve)')
+            with medir(self.tiempos, 'presolve'):
+                self.informe_presolve = presolver(self.instancia)
+        
+        # Solución inicial de la heurística si no hay un plan anterior
+        if not self.pista and self.pista_heuristica:
+            self.notificar_progreso(8, 'Calculando solución inicial (heurística)')
+            self.pista = self.calcular_pista_heuristica()
+            self.pista_completa = bool(self.pista)
+        
+        # Crear modelo completo
+        self.notificar_progreso(10, 'Creando modelo de optimización')
+        with medir(self.tiempos, 'modelo'):
+            self.crear_modelo()
+            if self.pista:
+                sugeridas = self.modelo.agregar_pista(self.pista, completa=self.pista_completa)
+                logger.info(f"Solución inicial sugerida al solver: {sugeridas} asignaciones")
+        with medir(self.tiempos, 'objetivo'):
+            self.agregar_funcion_objetivo()
+        with medir(self.tiempos, 'restricciones'):
+            self.agregar_restricciones()
+        construccion = sum(self.tiempos[fase] for fase in ('modelo', 'objetivo', 'restricciones'))
+        logger.info(f"Modelo construido en {construccion:.3f} s")
         
         # Resolver
-        logger.info("Ejecutando solver...")
-        status = self.solver.Solve()
+        backend = obtener_backend(self.backend, self.hilos)
+        logger.info(f"Ejecutando solver {backend.nombre}...")
+        self.notificar_progreso(30, f'Ejecutando solver {backend.nombre}')
+        with medir(self.tiempos, 'resolucion'):
+            self.resultado_solver = backend.resolver(
+                self.modelo.proto,
+                self.limite_tiempo_s,
+                gap_relativo=self.gap_relativo,
+                objetivo_aceptable=self.objetivo_aceptable,
+                al_mejorar=self.notificar_incumbente,
+                debe_detenerse=self.debe_detenerse,
+            )
         
         # Verificar estado de la solución
-        if status == pywraplp.Solver.OPTIMAL:
-            estado = 'Optimal'
+        estado = self.resultado_solver.estado
+        if estado == 'Optimal':
             logger.info("✓ Solución óptima encontrada")
-        elif status == pywraplp.Solver.FEASIBLE:
-            estado = 'Feasible'
-            logger.warning("⚠ Solución factible encontrada (no óptima)")
+        elif estado == 'Feasible':
+            if self.debe_detenerse():
+                logger.info("Búsqueda detenida a pedido: se acepta la mejor solución encontrada")
+            logger.warning(f"⚠ Solución factible encontrada (no óptima, gap {self.resultado_solver.gap})")
+        elif estado == 'Infeasible':
+            raise InstanciaInfactible(f"No se pudo encontrar una solución óptima. Estado: {estado}")
+        elif self.debe_detenerse():
+            raise Exception("Búsqueda detenida antes de encontrar una solución factible")
         else:
-            estados = {
-                pywraplp.Solver.INFEASIBLE: 'Infeasible',
-                pywraplp.Solver.UNBOUNDED: 'Unbounded',
-                pywraplp.Solver.ABNORMAL: 'Abnormal',
-                pywraplp.Solver.NOT_SOLVED: 'Not Solved'
-            }
-            estado = estados.get(status, 'Unknown')
             raise Exception(f"No se pudo encontrar una solución óptima. Estado: {estado}")
         
         # Extraer solución
-        self.extraer_solucion()
-        
-        # Calcular estadísticas
-        estadisticas = self.calcular_estadisticas()
+        self.notificar_progreso(80, 'Extrayendo solución')
+        with medir(self.tiempos, 'extraccion'):
+            self.extraer_solucion()
         
         # Obtener valor objetivo
-        distancia_total = self.solver.Objective().Value()
+        distancia_total = self.resultado_solver.objetivo
         
         # Información adicional del solver
-        logger.info(f"Tiempo de resolución: {self.solver.WallTime()} ms")
-        logger.info(f"Número de variables: {self.solver.NumVariables()}")
-        logger.info(f"Número de restricciones: {self.solver.NumConstraints()}")
+        logger.info(f"Tiempo de resolución: {self.resultado_solver.tiempo:.3f} s")
+        logger.info(f"Número de variables: {self.modelo.num_variables}")
+        logger.info(f"Número de restricciones: {self.modelo.num_restricciones}")
         
-        return {
-            'estado': estado,
-            'distancia_total': distancia_total,
-            'asignaciones': self.solucion,
-            'estadisticas': estadisticas
-        }
+        return estado, distancia_total
     
     def extraer_solucion(self):
         """Extrae las asignaciones de la solución de OR-Tools"""
-        self.solucion = []
-        
-        for (placa, zona_id, turno), var in self.variables.items():
-            # En OR-Tools, usamos solution_value() para obtener el valor de la variable
-            if var.solution_value() == 1:
-                # Encontrar la ruta y el camión correspondientes
-                ruta = next(r for r in self.rutas if r.id_zona_barrido == zona_id)
-                camion = next(c for c in self.camiones if c.placa == placa)
-                
-                self.solucion.append({
-                    'camion': camion,
-                    'ruta': ruta,
-                    'turno': turno,
-                    'distancia_km': float(ruta.distancia_km),
-                    'carga_kg': float(ruta.residuos_kg)
-                })
+        camion_idx, ruta_idx, turno_idx = self.modelo.interpretar_valores(self.resultado_solver.valores)
+        self.construir_solucion(zip(camion_idx.tolist(), ruta_idx.tolist(), turno_idx.tolist()))
         
         logger.info(f"✓ Extraídas {len(self.solucion)} asignaciones óptimas")
+    
+    def construir_solucion(self, asignaciones):
+        """Convierte tuplas (camión, ruta, turno) de índices en self.solucion"""
+        self.solucion = []
+        for i, j, t in asignaciones:
+            ruta = self.rutas[j]
+            self.solucion.append({
+                'camion': self.camiones[i],
+                'ruta': ruta,
+                'turno': self.TURNOS[t],
+                'distancia_km': float(ruta.distancia_km),
+                'carga_kg': float(ruta.residuos_kg)
+            })
         
     def calcular_estadisticas(self):
         """Calcula estadísticas de la solución"""
@@ -244,37 +670,181 @@ class SolverRutasLimpieza:
             }
         }
     
+    def dimensiones_modelo(self):
+        """
+        Tamaño del modelo resuelto.
+        
+        Returns:
+            tuple: (variables, restricciones); None si no hubo MIP (flujo).
+                Con el motor 'sectores' suma las de todos los subproblemas.
+        """
+        if self.modelo is not None:
+            return self.modelo.num_variables, self.modelo.num_restricciones
+        if self.info_descomposicion:
+            subproblemas = self.info_descomposicion['subproblemas']
+            return (
+                sum(s['variables'] for s in subproblemas),
+                sum(s['restricciones'] for s in subproblemas),
+            )
+        return None, None
+    
     def guardar_en_base_datos(self):
         """Guarda la solución en la base de datos"""
-        logger.info("Guardando solución en la base de datos...")
-        
-        # Limpiar asignaciones anteriores
-        AsignacionOptima.objects.all().delete()
-        
-        # Guardar nuevas asignaciones
-        for asignacion in self.solucion:
-            AsignacionOptima.objects.create(
-                ruta_asignada=asignacion['ruta'],
-                camion_asignado=asignacion['camion'],
-                turno=asignacion['turno'],
-                costo_distancia_km=asignacion['distancia_km'],
-                carga_kg=asignacion['carga_kg']
+        with medir(self.tiempos, 'guardado'):
+            self.plan = guardar_asignaciones(
+                self.solucion, motor=self.motor_usado, distancia_total=self.resultado_solver.objetivo,
             )
-        
-        logger.info(f"Guardadas {len(self.solucion)} asignaciones en la base de datos")
 
 
-def ejecutar_optimizacion():
+def guardar_asignaciones(asignaciones, motor='', distancia_total=None,
+                         origen=PlanAsignacion.Origen.SOLVER):
+    """
+    Guarda una solución como nueva versión del plan y la activa.
+    
+    Returns:
+        PlanAsignacion: el plan activo
+    """
+    logger.info("Guardando solución en la base de datos...")
+    plan = planes.guardar_plan(asignaciones, motor=motor, distancia_total=distancia_total, origen=origen)
+    logger.info(f"Guardadas {len(asignaciones)} asignaciones en la base de datos (plan #{plan.pk})")
+    return plan
+
+
+def normalizar_parametros(opciones):
+    """
+    Completa las opciones del solver con sus valores por defecto para que
+    ejecuciones equivalentes compartan huella.
+    """
+    parametros = dict(SolverRutasLimpieza.PARAMETROS_DEFECTO)
+    parametros.update({k: v for k, v in opciones.items() if k in parametros})
+    parametros['motor'] = parametros['motor'] or getattr(settings, 'SOLVER_MOTOR', 'auto')
+    parametros['backend'] = parametros['backend'] or getattr(settings, 'SOLVER_BACKEND', 'SCIP')
+    parametros['limite_tiempo_s'] = parametros['limite_tiempo_s'] or SolverRutasLimpieza.LIMITE_TIEMPO_S
+    return parametros
+
+
+def serializar_resultados(resultados):
+    """
+    Convierte los resultados de resolver() a tipos JSON (placas e ids de zona
+    en lugar de instancias de modelos) para guardarlos en un SolverJob o en la
+    caché de soluciones.
+    """
+    if resultados is None:
+        return None
+    return {
+        'estado': resultados['estado'],
+        'motor': resultados['motor'],
+        'distancia_total': resultados['distancia_total'],
+        'estadisticas': resultados['estadisticas'],
+        'solver': resultados.get('solver'),
+        'incremental': resultados.get('incremental'),
+        'descomposicion': resultados.get('descomposicion'),
+        'heuristica': resultados.get('heuristica'),
+        'asignaciones': [
+            {
+                'placa': a['camion'].placa,
+                'id_zona_barrido': a['ruta'].id_zona_barrido,
+                'turno': a['turno'],
+                'distancia_km': a['distancia_km'],
+                'carga_kg': a['carga_kg'],
+            }
+            for a in resultados['asignaciones']
+        ],
+    }
+
+
+def rehidratar_resultados(datos):
+    """
+    Inverso de serializar_resultados(): vuelve a enlazar las asignaciones con
+    sus instancias de Ruta y Camion.
+    """
+    asignaciones = datos['asignaciones']
+    rutas = Ruta.objects.in_bulk({a['id_zona_barrido'] for a in asignaciones})
+    camiones = Camion.objects.in_bulk({a['placa'] for a in asignaciones})
+    return {
+        **datos,
+        'asignaciones': [
+            {
+                'camion': camiones[a['placa']],
+                'ruta': rutas[a['id_zona_barrido']],
+                'turno': a['turno'],
+                'distancia_km': a['distancia_km'],
+                'carga_kg': a['carga_kg'],
+            }
+            for a in asignaciones
+        ],
+    }
+
+
+def ejecutar_optimizacion(progreso=None, forzar=False, al_mejorar=None, detener=None, **opciones):
     """
     Función principal para ejecutar la optimización.
     
+    Si la instancia (rutas, camiones y parámetros) no cambió desde una
+    resolución anterior, la solución se toma de la caché de soluciones. Si
+    otra solicitud ya está resolviendo la misma instancia (en este u otro
+    proceso), se espera su resultado en lugar de resolver de nuevo (ver
+    solver_app.coalescencia).
+    
+    Args:
+        progreso: callable opcional (porcentaje, mensaje) para informar avance
+        forzar: ignorar la caché y resolver de nuevo
+        al_mejorar: callable opcional que recibe cada solución incumbente
+        detener: threading.Event opcional para aceptar la solución actual
+        **opciones: parámetros de SolverRutasLimpieza (motor, objetivo_secundario, ...)
+    
     Returns:
         dict: Resultados de la optimización
     """
+    solver = None
+    dueno = None  # Token de la fila de ResolucionEnCurso si esta llamada la tiene
     try:
-        solver = SolverRutasLimpieza()
+        parametros = normalizar_parametros(opciones)
+        huella = cache_soluciones.calcular_huella(parametros, VERSION_MOTOR)
+        
+        # El resultado incremental depende del plan vigente, no solo de la
+        # instancia: no se sirve ni se guarda en la caché, ni se coalesce
+        usar_cache = not parametros['incremental']
+        cacheado = cache_soluciones.obtener(huella) if usar_cache and not forzar else None
+        if cacheado is not None:
+            return desde_cache(cacheado, 'Optimización recuperada de la caché de soluciones')
+        
+        if usar_cache:
+            dueno = coalescencia.tomar(huella, parametros['limite_tiempo_s'])
+            while not dueno:
+                logger.info(f"Misma instancia en resolución ({huella[:12]}); esperando su resultado")
+                if progreso is not None:
+                    progreso(10, 'Esperando una resolución en curso de la misma instancia')
+                coalescencia.esperar(huella)
+                cacheado = cache_soluciones.obtener(huella)
+                if cacheado is not None:
+                    # El dueño ya guardó y activó este mismo plan
+                    return desde_cache(
+                        cacheado, 'Optimización compartida con una resolución en curso', guardar=False
+                    )
+                # Sin solución en caché (falló o se detuvo antes): resolver
+                dueno = coalescencia.tomar(huella, parametros['limite_tiempo_s'])
+            # Otra resolución pudo terminar entre la consulta a la caché y la toma
+            cacheado = cache_soluciones.obtener(huella) if not forzar else None
+            if cacheado is not None:
+                return desde_cache(cacheado, 'Optimización recuperada de la caché de soluciones')
+        
+        reiniciar_pico_memoria()
+        inicio = time.perf_counter()
+        solver = SolverRutasLimpieza(
+            progreso=progreso, al_mejorar=al_mejorar, detener=detener, **opciones
+        )
         resultados = solver.resolver()
+        solver.notificar_progreso(90, 'Guardando asignaciones')
         solver.guardar_en_base_datos()
+        ejecucion = registrar_ejecucion(
+            solver, parametros, resultados, tiempo_total=time.perf_counter() - inicio
+        )
+        if ejecucion is not None:
+            PlanAsignacion.objects.filter(pk=solver.plan.pk).update(ejecucion=ejecucion)
+        # Una solución aceptada a mitad de búsqueda no representa a la huella
+        if usar_cache and not solver.debe_detenerse():
+            cache_soluciones.guardar(huella, parametros, serializar_resultados(resultados))
         
         return {
             'exito': True,
@@ -284,9 +854,39 @@ def ejecutar_optimizacion():
     
     except Exception as e:
         logger.error(f"Error durante la optimización: {str(e)}", exc_info=True)
+        if solver is not None:
+            registrar_ejecucion(
+                solver, parametros, error=str(e), tiempo_total=time.perf_counter() - inicio
+            )
         return {
             'exito': False,
             'mensaje': f'Error: {str(e)}',
             'resultados': None
         }
+    finally:
+        if dueno:
+            coalescencia.liberar(huella, dueno)
+
+
+def desde_cache(cacheado, mensaje, guardar=True):
+    """
+    Resultado de ejecutar_optimizacion() para una solución de la caché.
+    
+    Args:
+        guardar: activar la solución como un plan nuevo (no hace falta si
+            la acaba de guardar la resolución con la que se coalesció)
+    """
+    resultados = rehidratar_resultados(cacheado)
+    resultados['desde_cache'] = True
+    resultados['coalescida'] = not guardar
+    if guardar:
+        guardar_asignaciones(
+            resultados['asignaciones'], motor=resultados['motor'],
+            distancia_total=resultados['distancia_total'], origen=PlanAsignacion.Origen.CACHE,
+        )
+    return {
+        'exito': True,
+        'mensaje': mensaje,
+        'resultados': resultados
+    }
 
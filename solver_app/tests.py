@@ -1,3 +1,1721 @@
-from django.test import TestCase
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipIf
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from ortools.linear_solver import linear_solver_pb2
+
+from solver_app import (
+    backends, cache_soluciones, carga, coalescencia, dataset, descomposicion, exportacion, heuristica, historico,
+    instancia, jobs, metricas, planes, reducciones, versiones, views,
+)
+from solver_app.models import (
+    AsignacionOptima, Camion, MarcaIngesta, OperacionHistorica, PlanAsignacion, ResolucionEnCurso, Ruta,
+    SolucionCache, SolverJob, SolverRun, VersionDatos,
+)
+from solver_app.benchmark import ejecutor
+from solver_app.benchmark.generador import CAMIONES_POR_ZONA, DistribucionesReales, generar_instancia
+from solver_app.instancia import ConstructorModelo, Instancia, InstanciaInfactible, dimensiones_modelo
+from solver_app.solver_logic import (
+    VERSION_MOTOR, SolverRutasLimpieza, ejecutar_optimizacion, normalizar_parametros,
+)
+
+
+def rutas_de_prueba(residuos, distancias=None, sectores=None):
+    """
+    Rutas sin guardar, una por valor de `residuos` (kg), con ids desde 1.
+    Por defecto la distancia de la ruta j es 1 + j % 5 km y todas son del
+    sector 1.
+    """
+    return [
+        Ruta(
+            id_zona_barrido=j + 1,
+            id_sector=sectores[j] if sectores else 1,
+            distancia_km=Decimal(str(distancias[j] if distancias else 1 + j % 5)),
+            residuos_kg=Decimal(str(residuo)),
+        )
+        for j, residuo in enumerate(residuos)
+    ]
+
+
+def camiones_de_prueba(capacidades):
+    """Camiones sin guardar C000, C001, ... con las capacidades dadas (kg)"""
+    return [Camion(placa=f'C{i:03d}', capacidad_kg=Decimal(str(c))) for i, c in enumerate(capacidades)]
+
+
+def guardar_instancia(rutas, camiones):
+    Ruta.objects.bulk_create(rutas)
+    Camion.objects.bulk_create(camiones)
+
+
+class TrabajosTests(TestCase):
+    """Optimizaciones encoladas como SolverJob y recuperación de abandonados"""
+
+    def setUp(self):
+        guardar_instancia(rutas_de_prueba([400, 300, 200]), camiones_de_prueba([500, 500]))
+        self.vencido = timezone.now() - timedelta(seconds=120)
+
+    def test_ejecutar_solver_encola_sin_resolver(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            respuesta = self.client.post(
+                reverse('ejecutar_solver'), {'motor': 'heuristica'},
+                secure=True, HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+        self.assertEqual(respuesta.status_code, 202)
+        datos = respuesta.json()
+        job = SolverJob.objects.get(pk=datos['job_id'])
+        self.assertEqual(job.estado, SolverJob.Estado.PENDIENTE)
+        self.assertEqual(job.parametros['motor'], 'heuristica')
+        self.assertEqual(len(callbacks), 1)  # Envío al pool al confirmar
+        self.assertEqual(self.client.get(datos['url_estado'], secure=True).json()['estado'], 'PENDIENTE')
+
+    def test_parametros_invalidos(self):
+        respuesta = self.client.post(
+            reverse('ejecutar_solver'), {'motor': 'magia'},
+            secure=True, HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(SolverJob.objects.exists())
+
+    def test_trabajo_sin_latido_se_da_por_abandonado(self):
+        job = SolverJob.objects.create(estado=SolverJob.Estado.EJECUTANDO, latido_en=self.vencido)
+        self.assertIsNone(jobs.trabajo_activo())
+        job.refresh_from_db()
+        self.assertEqual(job.estado, SolverJob.Estado.FALLIDO)
+        self.assertIsNotNone(job.finalizado_en)
+
+        # Con latido reciente sigue activo
+        vivo = SolverJob.objects.create(estado=SolverJob.Estado.EJECUTANDO, latido_en=timezone.now())
+        self.assertEqual(jobs.trabajo_activo(), vivo)
+
+    def test_pendiente_detras_de_un_trabajo_vivo_se_conserva(self):
+        vivo = SolverJob.objects.create(estado=SolverJob.Estado.EJECUTANDO, latido_en=timezone.now())
+        pendiente = SolverJob.objects.create()
+        SolverJob.objects.filter(pk=pendiente.pk).update(creado_en=self.vencido)
+        self.assertEqual(jobs.recuperar_abandonados(), 0)
+
+        SolverJob.objects.filter(pk=vivo.pk).update(estado=SolverJob.Estado.COMPLETADO)
+        self.assertEqual(jobs.recuperar_abandonados(), 1)
+        pendiente.refresh_from_db()
+        self.assertEqual(pendiente.estado, SolverJob.Estado.FALLIDO)
+
+    def test_endpoint_de_estado_informa_el_abandono(self):
+        job = SolverJob.objects.create(estado=SolverJob.Estado.EJECUTANDO, latido_en=self.vencido)
+        datos = self.client.get(reverse('api_job_estado', args=[job.pk]), secure=True).json()
+        self.assertEqual(datos['estado'], SolverJob.Estado.FALLIDO)
+
+    def test_monitor_registra_latido_incumbentes_y_detencion(self):
+        job = SolverJob.objects.create(
+            estado=SolverJob.Estado.EJECUTANDO, latido_en=self.vencido, detener_solicitado=True,
+        )
+        monitor = jobs.MonitorJob(job.pk)
+        monitor.registrar_incumbente({'objetivo': 12.5, 'cota': 10.0, 'gap': 0.2, 'tiempo': 0.1})
+        monitor.sincronizar()
+
+        job.refresh_from_db()
+        self.assertEqual([i['n'] for i in job.incumbentes], [1])
+        self.assertEqual(job.mensaje, 'Mejor solución: 12.50 km, gap 20.00%')
+        self.assertGreater(job.latido_en, self.vencido)
+        self.assertTrue(monitor.detener.is_set())
+
+
+class TrabajosEnPoolTests(TransactionTestCase):
+    """El pool de hilos ejecuta el trabajo fuera de la petición"""
+
+    def test_el_pool_resuelve_el_trabajo_encolado(self):
+        guardar_instancia(rutas_de_prueba([400, 300, 200]), camiones_de_prueba([500, 500]))
+        job = jobs.esperar_job(jobs.encolar_optimizacion(motor='heuristica').pk, espera_s=30)
+        self.assertEqual(job.estado, SolverJob.Estado.COMPLETADO, job.mensaje)
+        self.assertEqual(job.progreso, 100)
+        self.assertEqual(len(job.resultado['asignaciones']), 3)
+        self.assertIsNotNone(job.latido_en)
+        self.assertEqual(AsignacionOptima.objects.count(), 3)
+
+
+def resolver_en_memoria(rutas, camiones, **opciones):
+    """Resuelve rutas y camiones sin guardar, sin pasar por la base de datos"""
+    return SolverRutasLimpieza(rutas=rutas, camiones=camiones, **opciones).resolver()
+
+
+def verificar_plan(prueba, resultados, rutas, rutas_por_turno=1):
+    """Cada ruta cubierta una vez y ningún slot (camión, turno) sobrecargado"""
+    prueba.assertEqual(
+        sorted(a['ruta'].id_zona_barrido for a in resultados['asignaciones']),
+        [r.id_zona_barrido for r in rutas],
+    )
+    slots = {}
+    for a in resultados['asignaciones']:
+        slots.setdefault((a['camion'].placa, a['turno']), []).append(a)
+    for (placa, turno), asignadas in slots.items():
+        prueba.assertLessEqual(len(asignadas), rutas_por_turno)
+        prueba.assertLessEqual(
+            sum(a['carga_kg'] for a in asignadas), float(asignadas[0]['camion'].capacidad_kg),
+        )
+
+
+class MotorFlujoTests(SimpleTestCase):
+    """Asignación por flujo de costo mínimo frente al MIP"""
+
+    def setUp(self):
+        self.rutas = rutas_de_prueba([400, 300, 200, 450, 100, 250, 320])
+        self.camiones = camiones_de_prueba([500, 350, 300])
+
+    def test_flujo_y_mip_alcanzan_el_mismo_objetivo(self):
+        por_flujo = resolver_en_memoria(self.rutas, self.camiones, motor='flujo')
+        por_mip = resolver_en_memoria(self.rutas, self.camiones, motor='mip', backend='SCIP')
+        self.assertEqual(por_flujo['motor'], 'flujo')
+        self.assertEqual(por_flujo['estado'], 'Optimal')
+        self.assertEqual(por_mip['estado'], 'Optimal')
+        self.assertAlmostEqual(por_flujo['distancia_total'], por_mip['distancia_total'])
+        verificar_plan(self, por_flujo, self.rutas)
+
+    def test_auto_usa_el_mip_sin_estructura_de_asignacion(self):
+        resultados = resolver_en_memoria(self.rutas, self.camiones, motor='auto', rutas_por_turno=2)
+        self.assertEqual(resultados['motor'], 'mip')
+        verificar_plan(self, resultados, self.rutas, rutas_por_turno=2)
+
+    def test_utilizacion_prefiere_el_camion_mas_ajustado(self):
+        resultados = resolver_en_memoria(
+            rutas_de_prueba([300]), camiones_de_prueba([1000, 300]),
+            motor='flujo', objetivo_secundario='utilizacion',
+        )
+        self.assertEqual(resultados['asignaciones'][0]['camion'].placa, 'C001')
+
+    def test_ruta_sin_camion_compatible(self):
+        with self.assertRaises(InstanciaInfactible):
+            resolver_en_memoria(rutas_de_prueba([600]), self.camiones, motor='flujo')
+
+
+class ConstructorModeloTests(SimpleTestCase):
+    """Codificación en bloque del MPModelProto"""
+
+    def construir(self, con_nombres=False):
+        inst = Instancia(
+            rutas_de_prueba([400, 300, 200]), camiones_de_prueba([500, 350]),
+            SolverRutasLimpieza.TURNOS, rutas_por_turno=2,
+        )
+        inst.mascara &= inst.compatibilidad_capacidad()[:, :, np.newaxis]
+        inst.fijar(1, 2, 0)
+        modelo = ConstructorModelo(inst, con_nombres=con_nombres)
+        modelo.crear_variables()
+        modelo.agregar_funcion_objetivo()
+        conteo = modelo.agregar_restricciones()
+        return inst, modelo, conteo
+
+    def test_varints_vectorizados(self):
+        valores = [0, 1, 127, 128, 300, 16383, 16384, 2**21 - 1, 2**21, 2**28 - 1]
+        codificados, posiciones = instancia._varints(valores)
+        self.assertEqual(codificados.tobytes(), b''.join(instancia._varint(v) for v in valores))
+        self.assertEqual(np.diff(posiciones).tolist(), [len(instancia._varint(v)) for v in valores])
+        with self.assertRaises(OverflowError):
+            instancia._varints([2**28])
+
+    def test_esquema_del_proto(self):
+        self.assertTrue(instancia.CODIFICACION_BINARIA)
+        # Un campo renumerado (o con etiqueta de dos bytes) desactiva la codificación a mano
+        movido = [
+            (mensaje, nombre, 16 if nombre == 'var_index' else numero, tipo, repetido)
+            for mensaje, nombre, numero, tipo, repetido in instancia._ESQUEMA
+        ]
+        self.assertFalse(instancia.esquema_compatible(movido))
+        faltante = [(linear_solver_pb2.MPConstraintProto, 'indices', 6, 5, True)]
+        self.assertFalse(instancia.esquema_compatible(faltante))
+
+    def test_sin_codificacion_binaria_produce_el_mismo_modelo(self):
+        def construir():
+            inst = Instancia(
+                rutas_de_prueba([400, 300, 200]), camiones_de_prueba([500, 500, 350]),
+                SolverRutasLimpieza.TURNOS, rutas_por_turno=2,
+            )
+            inst.cadenas_simetria = [(0, [0, 1])]  # Coeficientes por fila
+            modelo = ConstructorModelo(inst, con_nombres=True)
+            modelo.crear_variables()
+            return modelo, modelo.agregar_restricciones()
+
+        modelo, _ = construir()
+        with mock.patch.object(instancia, 'CODIFICACION_BINARIA', False):
+            con_api, conteo = construir()
+        self.assertEqual(conteo['simetria'], 1)
+        self.assertEqual(con_api.proto, modelo.proto)
+
+    def test_variables_y_objetivo(self):
+        inst, modelo, _ = self.construir()
+        self.assertEqual(modelo.num_variables, int(inst.mascara.sum()))
+        for variable, j in zip(modelo.proto.variable, modelo.var_ruta):
+            self.assertEqual((variable.lower_bound, variable.upper_bound), (0.0, 1.0))
+            self.assertTrue(variable.is_integer)
+            self.assertEqual(variable.objective_coefficient, inst.distancias[j])
+        self.assertEqual(modelo.proto.objective_offset, inst.distancias[2])
+
+    def test_restricciones(self):
+        inst, modelo, conteo = self.construir()
+        self.assertEqual(conteo['cobertura'], 2)
+        self.assertEqual(modelo.num_restricciones, sum(conteo.values()))
+        cobertura = modelo.proto.constraint[0]
+        self.assertEqual((cobertura.lower_bound, cobertura.upper_bound), (1.0, 1.0))
+        self.assertEqual(set(modelo.var_ruta[list(cobertura.var_index)]), {0})
+        self.assertEqual(list(cobertura.coefficient), [1.0] * len(cobertura.var_index))
+
+        capacidad = modelo.proto.constraint[conteo['cobertura']]
+        self.assertEqual(list(capacidad.coefficient), inst.residuos[modelo.var_ruta[list(capacidad.var_index)]].tolist())
+        # El slot (C001, MAÑANA) ya lleva la ruta fijada de 200 kg
+        i, t = modelo.var_camion[capacidad.var_index[0]], modelo.var_turno[capacidad.var_index[0]]
+        self.assertEqual(capacidad.upper_bound, inst.capacidad_restante[i, t])
+
+    def test_nombres_opcionales(self):
+        _, modelo, _ = self.construir(con_nombres=True)
+        self.assertTrue(modelo.proto.variable[0].name.startswith('x_C000_1_'))
+        self.assertEqual(modelo.proto.constraint[0].name, 'cobertura_1')
+        _, sin_nombres, _ = self.construir()
+        self.assertEqual(sin_nombres.proto.variable[0].name, '')
+
+    def test_bloques_pequenos_producen_el_mismo_modelo(self):
+        _, modelo, _ = self.construir(con_nombres=True)
+        with mock.patch.object(instancia, 'TERMINOS_POR_BLOQUE', 2):
+            _, en_bloques, _ = self.construir(con_nombres=True)
+        self.assertEqual(en_bloques.proto, modelo.proto)
+
+
+class PresolveTests(SimpleTestCase):
+    """Reducciones de solver_app.reducciones antes del MIP"""
+
+    def instancia(self, residuos, capacidades, turnos=SolverRutasLimpieza.TURNOS, rutas_por_turno=1):
+        return Instancia(rutas_de_prueba(residuos), camiones_de_prueba(capacidades), turnos, rutas_por_turno)
+
+    def test_poda_pares_infactibles_y_capacidades_redundantes(self):
+        inst = self.instancia([400, 300, 200], [500, 350])
+        reducciones.podar_pares_infactibles(inst)
+        self.assertFalse(inst.mascara[1, 0, :].any())  # 400 kg no cabe en 350 kg
+        self.assertEqual(int(inst.mascara.sum()), 15)
+        # Con una ruta por turno ninguna capacidad puede excederse
+        self.assertFalse(inst.emitir_capacidad.any())
+
+        inst = self.instancia([400, 300, 200], [500, 350], rutas_por_turno=2)
+        reducciones.podar_pares_infactibles(inst)
+        self.assertEqual(inst.emitir_capacidad.tolist(), [[True] * 3, [True] * 3])
+
+    def test_fija_rutas_con_un_solo_slot(self):
+        inst = self.instancia([450, 100], [500, 200], turnos=['MAÑANA'])
+        reducciones.podar_pares_infactibles(inst)
+        reducciones.fijar_asignaciones_forzadas(inst)
+        # 450 kg solo cabe en C000; al ocupar su único turno, 100 kg queda en C001
+        self.assertEqual(sorted(inst.fijas), [(0, 0, 0), (1, 1, 0)])
+        self.assertFalse(inst.rutas_pendientes.any())
+
+    def test_slot_disputado_es_infactible(self):
+        inst = self.instancia([450, 480], [500, 200], turnos=['MAÑANA'])
+        reducciones.podar_pares_infactibles(inst)
+        with self.assertRaises(InstanciaInfactible):
+            reducciones.fijar_asignaciones_forzadas(inst)
+
+    def test_cadenas_de_simetria_entre_camiones_iguales(self):
+        inst = self.instancia([400, 300, 200], [500, 500, 350])
+        reducciones.presolver(inst)
+        self.assertEqual(inst.cadenas_simetria, [(0, [0, 1]), (1, [0, 1]), (2, [0, 1])])
+
+    def test_informe_coincide_con_el_modelo_emitido(self):
+        inst = self.instancia([400, 300, 200, 120], [500, 500, 350], rutas_por_turno=2)
+        inicial = dimensiones_modelo(inst)
+        informe = reducciones.presolver(inst)
+        self.assertEqual([p['reduccion'] for p in informe], ['pares_infactibles', 'asignaciones_forzadas', 'simetria'])
+
+        modelo = ConstructorModelo(inst)
+        modelo.crear_variables()
+        modelo.agregar_restricciones()
+        self.assertEqual(
+            modelo.num_variables, inicial['variables'] - sum(p['variables_eliminadas'] for p in informe),
+        )
+        self.assertEqual(
+            modelo.num_restricciones,
+            inicial['restricciones'] - sum(p['restricciones_eliminadas'] for p in informe),
+        )
+
+    def test_presolve_conserva_el_optimo(self):
+        rutas, camiones = rutas_de_prueba([400, 300, 200, 120, 90]), camiones_de_prueba([500, 500, 350])
+        con_presolve = resolver_en_memoria(rutas, camiones, motor='mip', rutas_por_turno=2)
+        sin_presolve = resolver_en_memoria(rutas, camiones, motor='mip', rutas_por_turno=2, presolve=False)
+        self.assertAlmostEqual(con_presolve['distancia_total'], sin_presolve['distancia_total'])
+        verificar_plan(self, con_presolve, rutas, rutas_por_turno=2)
+
+
+class CacheSolucionesTests(TestCase):
+    """Caché de soluciones por huella de la instancia"""
+
+    def setUp(self):
+        guardar_instancia(rutas_de_prueba([400, 300, 200]), camiones_de_prueba([500, 350]))
+
+    def test_la_misma_instancia_se_sirve_sin_resolver(self):
+        primera = ejecutar_optimizacion(motor='flujo')
+        segunda = ejecutar_optimizacion(motor='flujo')
+        self.assertTrue(primera['exito'] and segunda['exito'])
+        self.assertFalse(primera['resultados'].get('desde_cache', False))
+        self.assertTrue(segunda['resultados']['desde_cache'])
+        self.assertEqual(SolverRun.objects.count(), 1)
+        self.assertEqual(SolucionCache.objects.get().aciertos, 1)
+        self.assertEqual(
+            PlanAsignacion.objects.get(activo=True).origen, PlanAsignacion.Origen.CACHE,
+        )
+        self.assertEqual(segunda['resultados']['distancia_total'], primera['resultados']['distancia_total'])
+
+    def test_cambios_en_datos_o_parametros_cambian_la_huella(self):
+        parametros = normalizar_parametros({'motor': 'flujo'})
+        huella = cache_soluciones.calcular_huella(parametros, VERSION_MOTOR)
+        self.assertNotEqual(
+            huella, cache_soluciones.calcular_huella(normalizar_parametros({'motor': 'mip'}), VERSION_MOTOR),
+        )
+        self.assertNotEqual(huella, cache_soluciones.calcular_huella(parametros, VERSION_MOTOR + 'x'))
+        Ruta.objects.filter(pk=1).update(residuos_kg=Decimal('410'))
+        self.assertNotEqual(huella, cache_soluciones.calcular_huella(parametros, VERSION_MOTOR))
+
+    def test_forzar_vuelve_a_resolver(self):
+        ejecutar_optimizacion(motor='flujo')
+        resultado = ejecutar_optimizacion(motor='flujo', forzar=True)
+        self.assertFalse(resultado['resultados'].get('desde_cache', False))
+        self.assertEqual(SolverRun.objects.count(), 2)
+        self.assertEqual(SolucionCache.objects.get().resoluciones, 2)
+
+    def guardar_entradas(self, *huellas):
+        """Guarda entradas vacías con accesos antiguos en el orden dado"""
+        antes = timezone.now() - timedelta(hours=1)
+        for k, huella in enumerate(huellas):
+            cache_soluciones.guardar(huella, {}, {'asignaciones': []})
+            SolucionCache.objects.filter(huella=huella).update(ultimo_acceso=antes + timedelta(seconds=k))
+
+    @override_settings(SOLVER_CACHE_MAX_ENTRADAS=2)
+    def test_desalojo_lru_por_entradas(self):
+        self.guardar_entradas('a', 'b')
+        cache_soluciones.obtener('a')  # 'a' pasa a ser la más reciente
+        self.guardar_entradas('c')
+        self.assertEqual(set(SolucionCache.objects.values_list('huella', flat=True)), {'a', 'c'})
+
+    @override_settings(SOLVER_CACHE_MAX_BYTES=50)
+    def test_desalojo_lru_por_tamano(self):
+        self.guardar_entradas('a', 'b', 'c')  # 19 bytes cada una
+        self.assertEqual(set(SolucionCache.objects.values_list('huella', flat=True)), {'b', 'c'})
+
+
+def guardar_plan_de_prueba(filas, **opciones):
+    """Guarda y activa un plan con filas (zona, placa, turno) de datos ya guardados"""
+    rutas = Ruta.objects.in_bulk()
+    camiones = Camion.objects.in_bulk()
+    return planes.guardar_plan([
+        {
+            'ruta': rutas[zona], 'camion': camiones[placa], 'turno': turno,
+            'distancia_km': float(rutas[zona].distancia_km), 'carga_kg': float(rutas[zona].residuos_kg),
+        }
+        for zona, placa, turno in filas
+    ], **opciones)
+
+
+class IncrementalTests(TestCase):
+    """Re-optimización incremental a partir del plan guardado"""
+
+    # C000 (500 kg) lleva las rutas de 400 kg en MAÑANA y NOCHE; C001
+    # (300 kg) tiene libre el turno NOCHE
+    PLAN = [
+        (1, 'C000', 'MAÑANA'), (4, 'C001', 'MAÑANA'),
+        (3, 'C000', 'TARDE'), (5, 'C001', 'TARDE'),
+        (2, 'C000', 'NOCHE'),
+    ]
+
+    def setUp(self):
+        guardar_instancia(rutas_de_prueba([400, 400, 200, 200, 200]), camiones_de_prueba([500, 300]))
+        guardar_plan_de_prueba(self.PLAN)
+
+    def reoptimizar(self, **opciones):
+        resultados = SolverRutasLimpieza(motor='mip', incremental=True, **opciones).resolver()
+        verificar_plan(self, resultados, list(Ruta.objects.order_by('pk')))
+        return resultados
+
+    def plan_resultante(self, resultados):
+        return {(a['ruta'].pk, a['camion'].placa, a['turno']) for a in resultados['asignaciones']}
+
+    def test_plan_sin_cambios_se_conserva(self):
+        resultados = self.reoptimizar()
+        self.assertEqual(resultados['incremental']['nivel'], 'rutas')
+        self.assertEqual(resultados['incremental']['rutas_reoptimizadas'], 0)
+        self.assertEqual(self.plan_resultante(resultados), set(self.PLAN))
+
+    def test_solo_se_reasignan_las_rutas_nuevas(self):
+        Ruta.objects.create(id_zona_barrido=6, id_sector=1, distancia_km=2, residuos_kg=100)
+        resultados = self.reoptimizar()
+        self.assertEqual(resultados['incremental']['nivel'], 'rutas')
+        self.assertEqual(resultados['incremental']['rutas_fijas'], 5)
+        self.assertEqual(self.plan_resultante(resultados), set(self.PLAN) | {(6, 'C001', 'NOCHE')})
+
+    def test_amplia_a_los_turnos_afectados(self):
+        # La ruta 5 ya no cabe en C001 y C000 está ocupado en TARDE por la
+        # ruta 3, que sí puede pasar a C001
+        Ruta.objects.filter(pk=5).update(residuos_kg=450)
+        resultados = self.reoptimizar()
+        self.assertEqual(resultados['incremental']['nivel'], 'turnos')
+        plan = self.plan_resultante(resultados)
+        self.assertIn((5, 'C000', 'TARDE'), plan)
+        self.assertIn((1, 'C000', 'MAÑANA'), plan)  # Los demás turnos quedan fijos
+
+    def test_amplia_a_la_resolucion_completa(self):
+        # En MAÑANA, C000 ya lleva la ruta 1 de 400 kg, que no cabe en C001
+        Ruta.objects.filter(pk=4).update(residuos_kg=450)
+        resultados = self.reoptimizar()
+        self.assertEqual(resultados['incremental']['nivel'], 'completo')
+        self.assertEqual(resultados['incremental']['rutas_fijas'], 0)
+
+    def test_liberar_camiones(self):
+        resultados = self.reoptimizar(liberar_camiones=['C001'])
+        self.assertEqual(resultados['incremental']['rutas_reoptimizadas'], 2)
+
+
+class BackendsTests(SimpleTestCase):
+    """Backends del MIP y escalado de coeficientes para CP-SAT"""
+
+    def modelo_decimal(self):
+        """min 10 - 1.25 x0 - 1.5 x1  s.a.  0.5 x0 + 0.75 x1 <= 1.0"""
+        proto = linear_solver_pb2.MPModelProto(objective_offset=10.0)
+        for costo in (-1.25, -1.5):
+            proto.variable.add(lower_bound=0, upper_bound=1, is_integer=True, objective_coefficient=costo)
+        proto.constraint.add(
+            var_index=[0, 1], coefficient=[0.5, 0.75], lower_bound=-np.inf, upper_bound=1.0,
+        )
+        return proto
+
+    def test_escala_entera(self):
+        self.assertEqual(backends._escala_entera([3, 4, np.inf]), 1)
+        self.assertEqual(backends._escala_entera([1.5, 2.25]), 100)
+        self.assertEqual(backends._escala_entera([0.1234567]), 10 ** 6)
+
+    def test_cp_sat_traduce_coeficientes_decimales(self):
+        proto = self.modelo_decimal()
+        modelo, _, escala = backends.BackendCPSAT(hilos=1).traducir(proto)
+        self.assertEqual(escala, 100)
+        restriccion = modelo.Proto().constraints[0].linear
+        self.assertEqual(list(restriccion.coeffs), [50, 75])
+        self.assertEqual(list(restriccion.domain), [0, 100])
+
+        for backend in (backends.BackendCPSAT(hilos=1), backends.BackendPywraplp('SCIP')):
+            resultado = backend.resolver(proto, limite_tiempo_s=10)
+            self.assertEqual(resultado.estado, 'Optimal')
+            self.assertAlmostEqual(resultado.objetivo, 8.5)
+            self.assertEqual(resultado.valores.tolist(), [0.0, 1.0])
+
+    def test_backends_coinciden_en_una_mochila(self):
+        rutas = rutas_de_prueba([250.5, 249.75, 120.25, 300, 80.5], distancias=[1.25, 2.5, 3.75, 0.5, 1.1])
+        camiones = camiones_de_prueba([500.25, 400])
+        resultados = {
+            backend: resolver_en_memoria(rutas, camiones, motor='mip', backend=backend, hilos=1, rutas_por_turno=2)
+            for backend in ('SCIP', 'CBC', 'CP-SAT')
+        }
+        for backend, resultado in resultados.items():
+            self.assertEqual(resultado['solver']['backend'], backend)
+            self.assertEqual(resultado['estado'], 'Optimal')
+            self.assertAlmostEqual(resultado['distancia_total'], 9.1)
+            verificar_plan(self, resultado, rutas, rutas_por_turno=2)
+
+    def test_backend_desconocido(self):
+        with self.assertRaises(ValueError):
+            backends.obtener_backend('GUROBI')
+
+
+class DescomposicionTests(SimpleTestCase):
+    """Motor 'sectores': partición de la flota y verificación del plan"""
+
+    def setUp(self):
+        self.instancia = Instancia(
+            rutas_de_prueba([400, 300, 200, 450, 100, 250, 120, 90, 60], sectores=[1, 2, 3] * 3),
+            camiones_de_prueba([500, 300, 400]), SolverRutasLimpieza.TURNOS,
+        )
+
+    def test_cada_slot_pertenece_a_un_solo_sector(self):
+        particion = descomposicion.particionar_flota(self.instancia)
+        self.assertEqual(sorted(particion), [1, 2, 3])
+        duenos = sum(slots.astype(int) for slots in particion.values())
+        self.assertLessEqual(int(duenos.max()), 1)
+
+    def test_verificar_asignaciones_detecta_violaciones(self):
+        inst = Instancia(rutas_de_prueba([400, 300]), camiones_de_prueba([500]), ['MAÑANA'], rutas_por_turno=2)
+        self.assertEqual(descomposicion.verificar_asignaciones(inst, [(0, 0, 0)]), ['Zona 2 cubierta 0 veces'])
+        violaciones = descomposicion.verificar_asignaciones(inst, [(0, 0, 0), (0, 1, 0), (0, 1, 0)])
+        self.assertEqual(violaciones, [
+            'Zona 2 cubierta 2 veces', 'Camión C000 excede su capacidad o cupo en el turno MAÑANA',
+        ])
+
+    def verificar_resultado(self, resultado):
+        self.assertEqual(resultado['estado'], 'Optimal')
+        self.assertEqual([s['sector'] for s in resultado['subproblemas']], [1, 2, 3])
+        self.assertEqual(descomposicion.verificar_asignaciones(self.instancia, resultado['asignaciones']), [])
+
+    def test_resuelve_cada_sector_en_el_proceso(self):
+        self.verificar_resultado(descomposicion.resolver_por_sectores(self.instancia, 'SCIP', 10, procesos=1))
+
+    def test_resuelve_en_un_pool_sin_fork(self):
+        self.assertNotEqual(descomposicion.contexto_procesos().get_start_method(), 'fork')
+        resultado = descomposicion.resolver_por_sectores(self.instancia, 'SCIP', 10, procesos=2)
+        self.assertEqual(resultado['procesos'], 2)
+        self.verificar_resultado(resultado)
+
+    def test_motor_sectores_coincide_con_el_mip(self):
+        rutas, camiones = self.instancia.rutas, self.instancia.camiones
+        por_sectores = resolver_en_memoria(rutas, camiones, motor='sectores')
+        self.assertEqual(por_sectores['descomposicion']['sectores'], 3)
+        self.assertAlmostEqual(
+            por_sectores['distancia_total'], resolver_en_memoria(rutas, camiones, motor='mip')['distancia_total'],
+        )
+        verificar_plan(self, por_sectores, rutas)
+
+    def test_plan_combinado_inconsistente(self):
+        violacion = ['Zona 1 cubierta 2 veces']
+        with mock.patch.object(descomposicion, 'verificar_asignaciones', return_value=violacion):
+            with self.assertRaises(descomposicion.PlanInconsistente) as ctx:
+                descomposicion.resolver_por_sectores(self.instancia, 'SCIP', 10, procesos=1)
+            self.assertEqual(ctx.exception.violaciones, violacion)
+            self.assertNotIsInstance(ctx.exception, InstanciaInfactible)
+
+            # El motor 'sectores' lo registra y recurre al MIP completo
+            rutas, camiones = self.instancia.rutas, self.instancia.camiones
+            with self.assertLogs('solver_app.solver_logic', 'ERROR'):
+                resultados = resolver_en_memoria(rutas, camiones, motor='sectores')
+        self.assertIsNone(resultados['descomposicion'])
+        verificar_plan(self, resultados, rutas)
+
+
+class BenchmarkTests(SimpleTestCase):
+    """Instancias sintéticas reproducibles y comparación de informes"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.distribuciones = DistribucionesReales()
+
+    def generar(self, num_zonas, **opciones):
+        return generar_instancia(num_zonas, distribuciones=self.distribuciones, **opciones)
+
+    def firma(self, instancia):
+        rutas, camiones = instancia
+        return (
+            [(r.id_zona_barrido, r.id_sector, r.distancia_km, r.residuos_kg) for r in rutas],
+            [(c.placa, c.capacidad_kg) for c in camiones],
+        )
+
+    def test_misma_semilla_misma_instancia(self):
+        self.assertEqual(self.firma(self.generar(60, semilla=3)), self.firma(self.generar(60, semilla=3)))
+        self.assertNotEqual(self.firma(self.generar(60, semilla=3)), self.firma(self.generar(60, semilla=4)))
+
+    def test_tamano_de_la_instancia(self):
+        rutas, camiones = self.generar(100)
+        self.assertEqual([r.id_zona_barrido for r in rutas], list(range(1, 101)))
+        self.assertEqual(len(camiones), int(np.ceil(100 * CAMIONES_POR_ZONA)))
+        self.assertEqual(len(self.generar(100, num_camiones=7)[1]), 7)
+        self.assertGreater(len({r.id_sector for r in rutas}), 1)
+
+    def test_caso_en_el_proceso(self):
+        caso = ejecutor.ejecutar_caso(30, None, 'flujo', 'SCIP', 1, 0, 10)
+        self.assertEqual(caso['estado'], 'Optimal')
+        self.assertEqual(caso['motor_usado'], 'flujo')
+        self.assertIn('generacion', caso['tiempos'])
+
+    def test_comparar_detecta_regresiones(self):
+        caso = {'zonas': 46, 'camiones': 42, 'motor': 'mip', 'backend': 'SCIP', 'rutas_por_turno': 1, 'semilla': 0}
+        base = {'resultados': [{**caso, 'objetivo': 100.0, 'tiempos': {'total': 1.0}}]}
+        igual = {'resultados': [{**caso, 'objetivo': 100.0, 'tiempos': {'total': 1.1}}]}
+        lento = {'resultados': [{**caso, 'objetivo': 100.0, 'tiempos': {'total': 1.5}}]}
+        distinto = {'resultados': [{**caso, 'objetivo': 99.0, 'tiempos': {'total': 1.0}}]}
+        self.assertFalse(ejecutor.comparar(base, igual)[0]['regresion'])
+        self.assertTrue(ejecutor.comparar(base, lento)[0]['regresion'])
+        self.assertTrue(ejecutor.comparar(base, distinto)[0]['regresion'])
+
+
+class SolverRunTests(TestCase):
+    """Historial de ejecuciones del solver (SolverRun)"""
+
+    def setUp(self):
+        guardar_instancia(rutas_de_prueba([400, 300, 200]), camiones_de_prueba([500, 350]))
+
+    def test_registra_las_fases_de_una_resolucion(self):
+        resultado = ejecutar_optimizacion(motor='mip', backend='SCIP')
+        run = SolverRun.objects.get()
+        self.assertEqual((run.motor, run.backend, run.estado), ('mip', 'SCIP', 'Optimal'))
+        self.assertEqual((run.num_rutas, run.num_camiones), (3, 2))
+        self.assertEqual(run.objetivo, resultado['resultados']['distancia_total'])
+        self.assertGreater(run.variables, 0)
+        for fase in ('carga', 'modelo', 'restricciones', 'resolucion', 'guardado'):
+            self.assertIsNotNone(getattr(run, f'tiempo_{fase}'), fase)
+        self.assertGreaterEqual(run.tiempo_total, run.tiempo_resolucion)
+        self.assertEqual(PlanAsignacion.objects.get(activo=True).ejecucion, run)
+
+    def test_registra_las_resoluciones_fallidas(self):
+        Ruta.objects.filter(pk=1).update(residuos_kg=900)
+        with self.assertLogs('solver_app.solver_logic', 'ERROR'):
+            self.assertFalse(ejecutar_optimizacion(motor='flujo')['exito'])
+        run = SolverRun.objects.get()
+        self.assertEqual(run.estado, 'Error')
+        self.assertIn('Infeasible', run.mensaje)
+
+    def test_api_acota_el_limite_y_los_dias(self):
+        ejecutar_optimizacion(motor='flujo')
+        ejecutar_optimizacion(motor='flujo', forzar=True)
+        url = reverse('api_solver_runs')
+        for limite, esperadas in (('-1', 1), ('0', 1), ('1', 1), ('5000', 2)):
+            datos = self.client.get(url, {'limite': limite}, secure=True).json()
+            self.assertEqual(len(datos['ejecuciones']), esperadas, limite)
+        datos = self.client.get(url, secure=True).json()
+        self.assertEqual(datos['tendencias'][0]['ejecuciones'], 2)
+        # Fuera de rango se acota: al menos el día actual y sin desbordar timedelta
+        for dias in ('-5', '0', '999999999'):
+            respuesta = self.client.get(url, {'dias': dias}, secure=True)
+            self.assertEqual(respuesta.status_code, 200, dias)
+            self.assertEqual(respuesta.json()['tendencias'][0]['ejecuciones'], 2, dias)
+        self.assertEqual(self.client.get(url, {'limite': 'x'}, secure=True).status_code, 400)
+        self.assertEqual(self.client.get(url, {'dias': 'x'}, secure=True).status_code, 400)
+
+
+class EventosTrabajoTests(TestCase):
+    """Long-poll de eventos (SSE) de un trabajo"""
+
+    def setUp(self):
+        incumbentes = [
+            {'n': n, 'objetivo': objetivo, 'cota': None, 'gap': None, 'tiempo': n}
+            for n, objetivo in ((1, 20.0), (2, 18.5))
+        ]
+        self.job = SolverJob.objects.create(
+            estado=SolverJob.Estado.EJECUTANDO, progreso=40, incumbentes=incumbentes,
+            latido_en=timezone.now(),
+        )
+        self.url = reverse('api_job_eventos', args=[self.job.pk])
+
+    def eventos(self, **cabeceras):
+        respuesta = self.client.get(self.url, secure=True, **cabeceras)
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        bloques = respuesta.content.decode().strip().split('\n\n')[1:]  # Sin 'retry'
+        return [
+            dict(linea.split(': ', 1) for linea in bloque.split('\n'))
+            for bloque in bloques
+        ]
+
+    def test_primera_conexion_envia_incumbentes_y_progreso(self):
+        eventos = self.eventos()
+        self.assertEqual([e['event'] for e in eventos], ['incumbente', 'incumbente', 'progreso'])
+        self.assertEqual(json.loads(eventos[1]['data'])['objetivo'], 18.5)
+        self.assertEqual(eventos[-1]['id'], '2-40')
+
+    def test_reconexion_solo_envia_novedades(self):
+        eventos = self.eventos(HTTP_LAST_EVENT_ID='1')  # Solo incumbentes
+        self.assertEqual([e['event'] for e in eventos], ['incumbente', 'progreso'])
+        self.assertEqual(json.loads(eventos[0]['data'])['n'], 2)
+
+        respuesta = self.client.get(self.url, {'desde': '1-40'}, secure=True)
+        self.assertEqual(respuesta.content.decode().count('event: '), 1)
+
+    @mock.patch.object(views, 'ESPERA_EVENTOS_S', 0.1)
+    def test_sin_novedades_la_respuesta_termina(self):
+        self.assertEqual(self.eventos(HTTP_LAST_EVENT_ID='2-40'), [])
+
+    def test_fin_del_trabajo(self):
+        SolverJob.objects.filter(pk=self.job.pk).update(estado=SolverJob.Estado.COMPLETADO, progreso=100)
+        eventos = self.eventos(HTTP_LAST_EVENT_ID='2-40')
+        self.assertEqual([e['event'] for e in eventos], ['progreso', 'fin'])
+        self.assertEqual(json.loads(eventos[1]['data'])['estado'], SolverJob.Estado.COMPLETADO)
+
+
+class HeuristicaTests(SimpleTestCase):
+    """Best-fit decreciente + búsqueda local"""
+
+    def instancia(self, residuos, capacidades, rutas_por_turno=1):
+        return Instancia(
+            rutas_de_prueba(residuos), camiones_de_prueba(capacidades),
+            SolverRutasLimpieza.TURNOS, rutas_por_turno,
+        )
+
+    def test_plan_factible(self):
+        rng = np.random.default_rng(0)
+        inst = self.instancia(rng.integers(50, 500, 40).tolist(), rng.integers(400, 900, 12).tolist(), 2)
+        asignaciones, informe = heuristica.resolver_heuristica(inst)
+        self.assertEqual(descomposicion.verificar_asignaciones(inst, asignaciones), [])
+        self.assertLessEqual(informe['costo_final'], informe['costo_inicial'])
+
+    def test_best_fit_prefiere_el_slot_mas_ajustado(self):
+        inst = self.instancia([300], [1000, 320])
+        self.assertEqual(heuristica.best_fit_decreciente(inst).asignaciones(), [(1, 0, 0)])
+
+    def test_busqueda_local_libera_camiones(self):
+        inst = self.instancia([100, 100], [500, 500])
+        plan = heuristica.PlanHeuristico(inst)
+        plan.asignar(0, 0)  # C000, MAÑANA
+        plan.asignar(1, 3)  # C001, MAÑANA
+        informe = heuristica.busqueda_local(plan)
+        self.assertEqual(informe['camiones_usados'], 1)
+        self.assertGreater(informe['movimientos'], 0)
+        self.assertEqual(descomposicion.verificar_asignaciones(inst, plan.asignaciones()), [])
+
+    def test_respeta_las_rutas_fijadas(self):
+        inst = self.instancia([400, 300], [500])
+        inst.fijar(0, 0, 1)
+        asignaciones, _ = heuristica.resolver_heuristica(inst)
+        self.assertEqual(len(asignaciones), 1)
+        self.assertNotEqual(asignaciones[0][2], 1)
+
+    def test_sin_slot_es_infactible(self):
+        with self.assertRaises(InstanciaInfactible):
+            heuristica.resolver_heuristica(self.instancia([600], [500]))
+
+    def test_pista_del_mip(self):
+        rutas, camiones = rutas_de_prueba([400, 300, 200, 150]), camiones_de_prueba([500, 450])
+        resultados = resolver_en_memoria(rutas, camiones, motor='mip', rutas_por_turno=2)
+        self.assertIsNotNone(resultados['heuristica'])
+        sin_pista = resolver_en_memoria(rutas, camiones, motor='mip', rutas_por_turno=2, pista_heuristica=False)
+        self.assertIsNone(sin_pista['heuristica'])
+
+
+class PlanRapidoTests(TestCase):
+    """Botón "Plan rápido" del dashboard"""
+
+    def setUp(self):
+        guardar_instancia(rutas_de_prueba([400, 300, 200]), camiones_de_prueba([500, 350]))
+
+    def plan_rapido(self):
+        return self.client.post(reverse('plan_rapido'), secure=True, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def test_genera_y_activa_un_plan(self):
+        respuesta = self.plan_rapido()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['estado'], 'Feasible')
+        self.assertEqual(PlanAsignacion.objects.get(activo=True).motor, 'heuristica')
+
+    def test_no_pisa_una_optimizacion_en_curso(self):
+        SolverJob.objects.create(estado=SolverJob.Estado.EJECUTANDO, latido_en=timezone.now())
+        self.assertEqual(self.plan_rapido().status_code, 409)
+        self.assertFalse(PlanAsignacion.objects.exists())
+
+
+class PlanesTests(TestCase):
+    """Versiones del plan de asignaciones y su poda"""
+
+    def setUp(self):
+        guardar_instancia(rutas_de_prueba([400, 300]), camiones_de_prueba([500]))
+
+    def guardar(self):
+        return guardar_plan_de_prueba([(1, 'C000', 'MAÑANA'), (2, 'C000', 'TARDE')])
+
+    def test_cada_guardado_activa_una_version_nueva(self):
+        primero = self.guardar()
+        segundo = self.guardar()
+        primero.refresh_from_db()
+        self.assertFalse(primero.activo)
+        self.assertTrue(segundo.activo)
+        self.assertEqual(set(AsignacionOptima.objects.values_list('plan', flat=True)), {segundo.pk})
+        self.assertEqual(AsignacionOptima.todas.count(), 4)
+        self.assertEqual(planes.plan_activo(), segundo)
+
+    def test_la_activacion_bloquea_el_contador_del_plan(self):
+        with mock.patch.object(versiones, 'bloquear', wraps=versiones.bloquear) as bloquear:
+            self.guardar()
+        bloquear.assert_called_once_with(versiones.PLAN)
+        self.assertEqual(VersionDatos.objects.get(nombre=versiones.PLAN).version, 1)
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_bloqueo_de_fila(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.guardar()
+        self.assertTrue(any('FOR UPDATE' in q['sql'] for q in consultas.captured_queries))
+
+    def test_guardar_programa_la_poda(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.guardar()
+        self.assertIn(planes.programar_poda, callbacks)
+
+    @override_settings(SOLVER_PLANES_RETENIDOS=2)
+    def test_poda_las_versiones_inactivas_sobrantes(self):
+        guardados = [self.guardar() for _ in range(5)]
+        self.assertEqual(planes.podar(), 2)
+        self.assertEqual(
+            list(PlanAsignacion.objects.order_by('pk').values_list('pk', flat=True)),
+            [p.pk for p in guardados[2:]],
+        )
+        self.assertEqual(AsignacionOptima.todas.count(), 6)
+
+    def test_poda_por_antiguedad(self):
+        viejo, reciente, _ = self.guardar(), self.guardar(), self.guardar()
+        PlanAsignacion.objects.filter(pk=viejo.pk).update(creado_en=timezone.now() - timedelta(days=10))
+        self.assertEqual(planes.podar(retenidos=10, dias=5), 1)
+        self.assertTrue(PlanAsignacion.objects.filter(pk=reciente.pk).exists())
+
+    def test_descartar_el_plan_activo(self):
+        self.guardar()
+        self.assertEqual(planes.descartar_plan_activo(), 2)
+        self.assertIsNone(planes.plan_activo())
+        self.assertFalse(AsignacionOptima.todas.exists())
+
+
+DATOS = Path(__file__).resolve().parent.parent / 'data'
+
+
+def copiar_datos(destino, filas_dataton):
+    """
+    Copia rutas.csv y demanda.csv de data/ a `destino`, y del dataton solo el
+    encabezado y sus primeras `filas_dataton` filas.
+
+    Returns:
+        list[bytes]: filas del dataton que no se copiaron (para agregarlas
+            después)
+    """
+    for nombre in ('rutas.csv', 'demanda.csv'):
+        (destino / nombre).write_bytes((DATOS / nombre).read_bytes())
+    lineas = (DATOS / 'dataton_pueblo_libre.csv').read_bytes().splitlines(keepends=True)
+    (destino / 'dataton_pueblo_libre.csv').write_bytes(b''.join(lineas[:filas_dataton + 1]))
+    return lineas[filas_dataton + 1:]
+
+
+class CargaDatosTests(TestCase):
+    """load_data por bloques y lotes: mismo resultado que leer todo de una vez"""
+
+    def setUp(self):
+        temporal = tempfile.TemporaryDirectory()
+        self.addCleanup(temporal.cleanup)
+        self.directorio = Path(temporal.name)
+        copiar_datos(self.directorio, 300)
+
+    def cargar(self, **opciones):
+        salida = io.StringIO()
+        call_command('load_data', directorio=self.directorio, bloque=7, lote=5, stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def reescribir_rutas(self, cambiar):
+        """Aplica `cambiar` a las filas de datos de rutas.csv"""
+        ruta = self.directorio / 'rutas.csv'
+        encabezado, *filas = ruta.read_text(encoding='utf-8-sig').splitlines()
+        ruta.write_text('\n'.join([encabezado, *cambiar(filas)]) + '\n', encoding='utf-8-sig')
+
+    def test_carga_igual_a_leer_todo(self):
+        self.cargar()
+
+        rutas = pd.read_csv(self.directorio / 'rutas.csv', encoding='utf-8-sig').merge(
+            pd.read_csv(self.directorio / 'demanda.csv', encoding='utf-8-sig'), on='id_zona_barrido',
+        )
+        self.assertEqual(
+            dict(Ruta.objects.values_list('id_zona_barrido', 'distancia_km')),
+            {zona: Decimal(f'{d:.2f}') for zona, d in zip(rutas['id_zona_barrido'], rutas['distancia_km'])},
+        )
+        self.assertEqual(
+            dict(Ruta.objects.values_list('id_zona_barrido', 'residuos_kg')),
+            {zona: Decimal(f'{r:.2f}') for zona, r in zip(rutas['id_zona_barrido'], rutas['residuos_kg'])},
+        )
+
+        operaciones = pd.read_csv(self.directorio / 'dataton_pueblo_libre.csv', encoding='utf-8-sig')
+        maximos = operaciones.groupby('PLACA')['CANTIDAD'].max()
+        self.assertEqual(
+            {placa: float(c) for placa, c in Camion.objects.values_list('placa', 'capacidad_kg')},
+            {placa: round(cantidad * 1000, 2) for placa, cantidad in maximos.items()},
+        )
+        self.assertEqual(OperacionHistorica.objects.count(), 300)
+
+    def test_recarga_actualiza_en_su_lugar(self):
+        self.cargar()
+        self.reescribir_rutas(lambda filas: [
+            '1,1,9.99' if fila.split(',')[1] == '1' else fila
+            for fila in filas if fila.split(',')[1] != '2'
+        ])
+
+        salida = self.cargar()
+
+        self.assertIn('Se cargaron 45 rutas', salida)
+        self.assertEqual(Ruta.objects.get(pk=1).distancia_km, Decimal('9.99'))
+        self.assertFalse(Ruta.objects.filter(pk=2).exists())
+        self.assertEqual(Ruta.objects.count(), 45)
+
+    def test_conservar_ausentes(self):
+        Camion.objects.create(placa='ZZZ-999', capacidad_kg=1000)
+        self.cargar()
+        self.assertFalse(Camion.objects.filter(placa='ZZZ-999').exists())
+
+        Camion.objects.create(placa='ZZZ-999', capacidad_kg=1000)
+        self.reescribir_rutas(lambda filas: [f for f in filas if f.split(',')[1] != '2'])
+        self.cargar(conservar_ausentes=True, completa=True)
+
+        self.assertTrue(Camion.objects.filter(placa='ZZZ-999').exists())
+        self.assertTrue(Ruta.objects.filter(pk=2).exists())
+
+    def test_carga_fallida_conserva_el_historico(self):
+        self.cargar()
+        resumenes = resumenes_guardados()
+
+        # Una fecha inválida a mitad del archivo: los primeros bloques ya se
+        # escribieron cuando falla la carga
+        ruta = self.directorio / 'dataton_pueblo_libre.csv'
+        lineas = ruta.read_bytes().splitlines(keepends=True)
+        campos = lineas[200].split(b',')
+        campos[7] = b'2024XXXX'
+        lineas[200] = b','.join(campos)
+        ruta.write_bytes(b''.join(lineas[:250]))
+
+        with self.assertRaises(ValueError):
+            self.cargar()
+
+        self.assertEqual(OperacionHistorica.objects.count(), 300)
+        self.assertEqual(resumenes_guardados(), resumenes)
+
+    def test_lotes_en_transacciones_separadas(self):
+        rutas = [Ruta(id_zona_barrido=k, id_sector=1, distancia_km=1, residuos_kg=1) for k in range(1, 13)]
+        with CaptureQueriesContext(connection) as consultas:
+            escritos = carga.upsert(Ruta, rutas, ['id_sector', 'distancia_km', 'residuos_kg'], tamano_lote=5)
+
+        self.assertEqual(escritos, 12)
+        self.assertEqual(Ruta.objects.count(), 12)
+        inserciones = [q for q in consultas.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserciones), 3)
+
+
+class IngestaIncrementalTests(TestCase):
+    """Marcas de agua de load_data: solo se procesan las filas nuevas"""
+
+    def setUp(self):
+        temporal = tempfile.TemporaryDirectory()
+        self.addCleanup(temporal.cleanup)
+        self.directorio = Path(temporal.name)
+        self.restantes = copiar_datos(self.directorio, 200)
+        self.dataton = self.directorio / carga.ARCHIVO_OPERACIONES
+
+    def ingerir(self, **opciones):
+        return carga.ingerir_camiones(self.directorio, tamano_bloque=15, tamano_lote=10, **opciones)
+
+    def agregar(self, lineas):
+        with open(self.dataton, 'ab') as archivo:
+            archivo.write(b''.join(lineas))
+
+    def test_archivos_sin_cambios_se_omiten(self):
+        self.ingerir()
+        self.assertEqual(carga.ingerir_rutas(self.directorio)['modo'], 'completa')
+
+        with mock.patch.object(carga, 'cargar_camiones') as completa, \
+                mock.patch.object(carga, 'cargar_camiones_nuevos') as nuevas:
+            informe = self.ingerir()
+        self.assertEqual(informe['modo'], 'sin_cambios')
+        completa.assert_not_called()
+        nuevas.assert_not_called()
+        self.assertEqual(carga.ingerir_rutas(self.directorio)['modo'], 'sin_cambios')
+
+    def test_solo_filas_agregadas(self):
+        self.ingerir()
+        self.agregar(self.restantes[:40])
+
+        informe = self.ingerir()
+
+        self.assertEqual(informe['modo'], 'incremental')
+        self.assertEqual(informe['filas'], 40)
+        self.assertEqual(OperacionHistorica.objects.count(), 240)
+        marca = MarcaIngesta.objects.get(fuente=carga.ARCHIVO_OPERACIONES)
+        operaciones = pd.read_csv(self.dataton, encoding='utf-8-sig')
+        self.assertEqual(marca.filas, 240)
+        self.assertEqual(marca.ultimo_nro_registro, operaciones['NRO_REGISTRO'].max())
+        self.assertEqual(marca.tamano_bytes, self.dataton.stat().st_size)
+
+        # Mismas capacidades que una carga completa del archivo
+        incrementales = dict(Camion.objects.values_list('placa', 'capacidad_kg'))
+        self.assertEqual(self.ingerir(completa=True)['modo'], 'completa')
+        self.assertEqual(dict(Camion.objects.values_list('placa', 'capacidad_kg')), incrementales)
+
+    def test_filas_repetidas_no_se_cuentan(self):
+        self.ingerir()
+        lineas = self.dataton.read_bytes().splitlines(keepends=True)
+        self.agregar(lineas[1:11] + self.restantes[:5])
+
+        informe = self.ingerir()
+
+        self.assertEqual(informe['modo'], 'incremental')
+        self.assertEqual(informe['filas'], 5)
+        self.assertEqual(OperacionHistorica.objects.count(), 205)
+
+    def test_cambio_en_filas_ingeridas_recarga_todo(self):
+        self.ingerir()
+        encabezado, primera, *resto = self.dataton.read_bytes().splitlines(keepends=True)
+        campos = primera.split(b',')
+        campos[-2] = b'99.5'
+        self.dataton.write_bytes(b''.join([encabezado, b','.join(campos), *resto, *self.restantes[:3]]))
+
+        informe = self.ingerir()
+
+        self.assertEqual(informe['modo'], 'completa')
+        self.assertEqual(OperacionHistorica.objects.count(), 203)
+        self.assertEqual(Camion.objects.order_by('-capacidad_kg').first().capacidad_kg, Decimal('99500.00'))
+
+    def test_ultima_linea_incompleta_recarga_todo(self):
+        self.dataton.write_bytes(self.dataton.read_bytes().rstrip(b'\n'))
+        self.ingerir()
+        self.agregar([b'\n', *self.restantes[:3]])
+
+        self.assertEqual(self.ingerir()['modo'], 'completa')
+        self.assertEqual(OperacionHistorica.objects.count(), 203)
+
+
+class RepararTextoTests(SimpleTestCase):
+
+    def test_revierte_mojibake(self):
+        self.assertEqual(dataset.reparar_texto('MAÃ‘ANA'), 'MAÑANA')
+        self.assertEqual(dataset.reparar_texto('SÃ\x81BADO'), 'SÁBADO')
+
+    def test_texto_correcto_no_cambia(self):
+        for texto in ('MAÑANA', 'NOCHE', 'Ñandú', 12, None):
+            self.assertEqual(dataset.reparar_texto(texto), texto)
+
+
+@skipIf(dataset.pq is None, 'pyarrow no está instalado')
+class CacheParquetTests(SimpleTestCase):
+    """Caché columnar del dataton junto al CSV"""
+
+    def setUp(self):
+        temporal = tempfile.TemporaryDirectory()
+        self.addCleanup(temporal.cleanup)
+        directorio = Path(temporal.name)
+        self.restantes = copiar_datos(directorio, 120)
+        self.csv = directorio / 'dataton_pueblo_libre.csv'
+
+    def leer(self, columnas=None):
+        return pd.concat(dataset.iterar_operaciones(self.csv, columnas, tamano_bloque=50), ignore_index=True)
+
+    def test_primera_lectura_construye_la_cache(self):
+        self.assertFalse(dataset.cache_vigente(self.csv))
+
+        desde_csv = self.leer()
+
+        self.assertTrue(dataset.ruta_cache(self.csv).exists())
+        self.assertTrue(dataset.cache_vigente(self.csv))
+        self.assertEqual(len(desde_csv), 120)
+        self.assertIn('UNIDAD_MEDIDA', desde_csv.columns)
+        self.assertEqual(set(desde_csv['TURNO'].cat.categories), {'MAÑANA', 'TARDE', 'NOCHE'})
+        self.assertEqual(desde_csv['FECHA_CORTE'].dtype.kind, 'M')
+
+    def test_lecturas_siguientes_usan_la_cache(self):
+        columnas = ['NRO_REGISTRO', 'DIA_RECORRIDO', 'TURNO', 'PLACA', 'CANTIDAD']
+        desde_csv = self.leer(columnas)
+
+        with mock.patch.object(dataset, 'leer_csv', side_effect=AssertionError('se leyó el CSV')):
+            desde_cache = self.leer(columnas)
+            completo = dataset.leer_operaciones(self.csv, ['PLACA', 'CANTIDAD'])
+
+        self.assertEqual(list(desde_cache.columns), columnas)
+        pd.testing.assert_frame_equal(
+            desde_cache.astype({'TURNO': str, 'PLACA': str}),
+            desde_csv.astype({'TURNO': str, 'PLACA': str}),
+            check_dtype=False,
+        )
+        self.assertEqual(completo['CANTIDAD'].sum(), desde_csv['CANTIDAD'].sum())
+
+    def test_csv_modificado_invalida_la_cache(self):
+        self.leer()
+        with open(self.csv, 'ab') as archivo:
+            archivo.write(b''.join(self.restantes[:10]))
+
+        self.assertFalse(dataset.cache_vigente(self.csv))
+        self.assertEqual(len(self.leer()), 130)
+        self.assertTrue(dataset.cache_vigente(self.csv))
+
+    def test_solo_cambia_la_fecha_de_modificacion(self):
+        self.leer()
+        estado = self.csv.stat()
+        os.utime(self.csv, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+
+        self.assertTrue(dataset.cache_vigente(self.csv))
+
+        # Mismo tamaño y contenido distinto: se detecta por el SHA-256
+        contenido = self.csv.read_bytes()
+        self.csv.write_bytes(contenido.replace(b'NOCHE', b'NOCHX', 1))
+        self.assertFalse(dataset.cache_vigente(self.csv))
+
+    def test_otra_version_de_la_cache(self):
+        self.leer()
+        with mock.patch.object(dataset, 'VERSION_CACHE', '0'):
+            self.assertFalse(dataset.cache_vigente(self.csv))
+
+    def test_lectura_interrumpida_no_deja_cache(self):
+        bloques = dataset.iterar_operaciones(self.csv, tamano_bloque=50)
+        next(bloques)
+        bloques.close()
+
+        destino = dataset.ruta_cache(self.csv)
+        self.assertFalse(destino.exists())
+        self.assertEqual(list(destino.parent.iterdir()), [])
+
+
+def resumenes_guardados():
+    """Los tres resúmenes del histórico como dicts clave -> totales"""
+    def totales(fila, *extra):
+        return (fila.viajes, round(fila.toneladas, 6), fila.max_toneladas, *extra)
+
+    return {
+        'placa_turno_dia': {
+            (f.placa, f.turno, f.dia): totales(f) for f in historico.ResumenPlacaTurnoDia.objects.all()
+        },
+        'placa_semana': {
+            (f.placa, f.semana): totales(f) for f in historico.ResumenPlacaSemana.objects.all()
+        },
+        'turno_dia_semana': {
+            (f.turno, f.dia_semana): totales(f, f.dias) for f in historico.ResumenTurnoDiaSemana.objects.all()
+        },
+    }
+
+
+class HistoricoTests(TestCase):
+    """Resúmenes materializados del histórico y sus consultas"""
+
+    def setUp(self):
+        temporal = tempfile.TemporaryDirectory()
+        self.addCleanup(temporal.cleanup)
+        directorio = Path(temporal.name)
+        copiar_datos(directorio, 400)
+        self.operaciones = pd.concat(
+            dataset.leer_csv(directorio / 'dataton_pueblo_libre.csv', historico.COLUMNAS), ignore_index=True,
+        )
+
+    def ingerir_por_bloques(self, tamano):
+        bloques = (self.operaciones.iloc[k:k + tamano] for k in range(0, len(self.operaciones), tamano))
+        for _ in historico.registrar(bloques, tamano_lote=25, acumular=True):
+            pass
+
+    def resumenes_de_pandas(self):
+        """Los mismos resúmenes agregando las filas crudas con pandas"""
+        df = pd.DataFrame({
+            'placa': self.operaciones['PLACA'].astype(str),
+            'turno': self.operaciones['TURNO'].astype(str),
+            'dia': self.operaciones['DIA_RECORRIDO'].dt.date,
+            'CANTIDAD': self.operaciones['CANTIDAD'],
+        })
+        df['semana'] = [dia - timedelta(days=dia.weekday()) for dia in df['dia']]
+        df['dia_semana'] = [dia.weekday() for dia in df['dia']]
+
+        def agregar(claves, dias=False):
+            grupos = df.groupby(claves)
+            agregado = grupos['CANTIDAD'].agg(['size', 'sum', 'max'])
+            if dias:
+                agregado['dias'] = grupos['dia'].nunique()
+            return {
+                clave: (int(fila['size']), round(fila['sum'], 6), fila['max'],
+                        *([int(fila['dias'])] if dias else []))
+                for clave, fila in agregado.iterrows()
+            }
+
+        return {
+            'placa_turno_dia': agregar(['placa', 'turno', 'dia']),
+            'placa_semana': agregar(['placa', 'semana']),
+            'turno_dia_semana': agregar(['turno', 'dia_semana'], dias=True),
+        }
+
+    def test_acumular_y_reconstruir_dan_los_mismos_totales(self):
+        esperados = self.resumenes_de_pandas()
+
+        self.ingerir_por_bloques(37)
+        acumulados = resumenes_guardados()
+        conteos = historico.reconstruir_resumenes(tamano_lote=25)
+        reconstruidos = resumenes_guardados()
+
+        self.assertEqual(OperacionHistorica.objects.count(), 400)
+        self.assertEqual(acumulados, esperados)
+        self.assertEqual(reconstruidos, esperados)
+        self.assertEqual(conteos, {nombre: len(filas) for nombre, filas in esperados.items()})
+
+    def test_reingerir_no_duplica_el_historico(self):
+        self.ingerir_por_bloques(100)
+        historico.guardar_operaciones(self.operaciones.iloc[:50])
+
+        self.assertEqual(OperacionHistorica.objects.count(), 400)
+
+    def test_consultas_leen_los_resumenes(self):
+        self.ingerir_por_bloques(100)
+
+        with self.assertNumQueries(1):
+            capacidades = historico.capacidades_estimadas()
+        self.assertEqual(
+            capacidades, self.operaciones.groupby('PLACA', observed=True)['CANTIDAD'].max().to_dict(),
+        )
+
+        perfil = historico.perfil_demanda()
+        self.assertEqual(sum(f['viajes'] for f in perfil), 400)
+        for fila in perfil:
+            self.assertAlmostEqual(fila['toneladas_por_dia'], fila['toneladas'] / fila['dias'])
+            self.assertEqual(fila['nombre_dia'], historico.DIAS_SEMANA[fila['dia_semana']])
+
+        dias = self.operaciones['DIA_RECORRIDO'].dt.date
+        uso = historico.uso_flota_reciente(dias=3)
+        self.assertEqual([f['dia'] for f in uso], sorted(set(dias))[-3:])
+        ultimo = uso[-1]
+        del_dia = self.operaciones[dias == ultimo['dia']]
+        self.assertEqual(ultimo['camiones'], del_dia['PLACA'].nunique())
+        self.assertEqual(ultimo['viajes'], len(del_dia))
+        self.assertAlmostEqual(ultimo['toneladas'], del_dia['CANTIDAD'].sum())
+
+    def test_pagina_de_camiones_muestra_el_historico(self):
+        # Las versiones vuelven a empezar en cada test; la caché del dashboard no
+        caches[versiones.ALIAS_CACHE].clear()
+        self.ingerir_por_bloques(100)
+
+        respuesta = self.client.get(reverse('listar_camiones'), secure=True)
+
+        self.assertContains(respuesta, 'Demanda Histórica por Turno')
+        self.assertContains(respuesta, 'MAÑANA')
+        ultimo = self.operaciones['DIA_RECORRIDO'].max()
+        self.assertContains(respuesta, f"<td>{ultimo:%d/%m/%Y}</td>", html=True)
+
+
+class DashboardTestCase(TestCase):
+    """Datos de prueba y conteo de consultas de las vistas del dashboard"""
+
+    VISTAS = ['index', 'resultados_optimizacion', 'listar_camiones', 'listar_rutas', 'api_stats']
+
+    def setUp(self):
+        caches[versiones.ALIAS_CACHE].clear()
+
+    def crear_flota(self, num_camiones):
+        """Una ruta y una asignación por camión y turno, en un plan activo"""
+        plan = PlanAsignacion.objects.create(activo=True, num_asignaciones=num_camiones * 3)
+        turnos = AsignacionOptima.TURNOS
+        rutas = Ruta.objects.bulk_create(
+            Ruta(id_zona_barrido=j + 1, id_sector=j % 4 + 1, distancia_km=2.5, residuos_kg=1000)
+            for j in range(num_camiones * len(turnos))
+        )
+        camiones = Camion.objects.bulk_create(
+            Camion(placa=f'T{i:05d}', capacidad_kg=5000 + i) for i in range(num_camiones)
+        )
+        AsignacionOptima.objects.bulk_create(
+            AsignacionOptima(
+                plan=plan,
+                ruta_asignada=rutas[i * len(turnos) + t],
+                camion_asignado=camion,
+                turno=turno,
+                costo_distancia_km=2.5,
+                carga_kg=1000,
+            )
+            for i, camion in enumerate(camiones)
+            for t, turno in enumerate(turnos)
+        )
+
+    def consultas_de(self, vista, cache_vacia=False):
+        if cache_vacia:
+            caches[versiones.ALIAS_CACHE].clear()
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse(vista), secure=True)
+        self.assertEqual(respuesta.status_code, 200)
+        return len(consultas)
+
+
+class ConsultasDashboardTests(DashboardTestCase):
+    """
+    Las vistas del dashboard deben resolver sus estadísticas en un número
+    constante de consultas, sin importar el tamaño de la flota.
+    """
+
+    # Consultas esperadas por vista con la caché vacía (ver
+    # solver_app.consultas); todas leen además las versiones de los datos
+    CONSULTAS = {
+        'index': 5,  # rutas, camiones, asignaciones y trabajo activo
+        'resultados_optimizacion': 3,  # resumen por turno y asignaciones
+        'listar_camiones': 5,  # resumen de flota y de asignaciones, uso por camión, perfil de demanda
+        'listar_rutas': 3,  # resumen y rutas (con su asignación)
+        'api_stats': 4,  # rutas, camiones y asignaciones
+    }
+
+    def test_consultas_constantes_al_crecer_la_flota(self):
+        self.crear_flota(5)
+        pocas = {vista: self.consultas_de(vista, cache_vacia=True) for vista in self.VISTAS}
+
+        # Agregar camiones y asignaciones (el plan sigue siendo el activo)
+        PlanAsignacion.objects.all().delete()
+        Ruta.objects.all().delete()
+        Camion.objects.all().delete()
+        self.crear_flota(40)
+        muchas = {vista: self.consultas_de(vista, cache_vacia=True) for vista in self.VISTAS}
+
+        self.assertEqual(pocas, self.CONSULTAS)
+        self.assertEqual(muchas, self.CONSULTAS)
+
+    def test_estadisticas_por_turno_y_camion(self):
+        self.crear_flota(3)
+        respuesta = self.client.get(reverse('resultados_optimizacion'), secure=True)
+        por_turno = respuesta.context['stats_por_turno']
+        self.assertEqual(list(por_turno), AsignacionOptima.TURNOS)
+        for datos in por_turno.values():
+            self.assertEqual(datos['count'], 3)
+            self.assertEqual(datos['camiones'], 3)
+            self.assertEqual(float(datos['carga']), 3000)
+        self.assertEqual(respuesta.context['stats']['camiones_utilizados'], 3)
+
+        respuesta = self.client.get(reverse('listar_camiones'), secure=True)
+        uso = respuesta.context['camiones_con_uso']()
+        self.assertEqual([u['veces_usado'] for u in uso], [3, 3, 3])
+        self.assertEqual(uso[0]['camion'].placa, 'T00002')  # Mayor capacidad primero
+        self.assertAlmostEqual(uso[0]['utilizacion_promedio'], round(1000 / 5002 * 100, 2))
+
+    def test_uso_solo_cuenta_el_plan_activo(self):
+        self.crear_flota(2)
+        PlanAsignacion.objects.update(activo=False)
+        respuesta = self.client.get(reverse('listar_camiones'), secure=True)
+        self.assertFalse(respuesta.context['hay_asignaciones'])
+        self.assertEqual([u['veces_usado'] for u in respuesta.context['camiones_con_uso']()], [0, 0])
+
+
+class CacheDashboardTests(DashboardTestCase):
+    """La caché del dashboard se invalida cuando cambia la versión de los datos"""
+
+    # Consultas con la caché llena
+    CONSULTAS_CACHEADAS = {
+        'index': 1,  # trabajo activo
+        'resultados_optimizacion': 0,
+        'listar_camiones': 0,
+        'listar_rutas': 0,
+        'api_stats': 0,
+    }
+
+    def test_paginas_servidas_desde_la_cache(self):
+        self.crear_flota(5)
+        for vista in self.VISTAS:
+            self.consultas_de(vista)
+        cacheadas = {vista: self.consultas_de(vista) for vista in self.VISTAS}
+        self.assertEqual(cacheadas, self.CONSULTAS_CACHEADAS)
+
+    def test_incrementar_version_invalida(self):
+        self.crear_flota(2)
+        self.assertEqual(self.client.get(reverse('api_stats'), secure=True).json()['camiones']['total'], 2)
+
+        # Sin cambio de versión se sigue sirviendo la copia en caché
+        Camion.objects.bulk_create([Camion(placa='NUEVO1', capacidad_kg=1000)])
+        self.assertEqual(self.client.get(reverse('api_stats'), secure=True).json()['camiones']['total'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            versiones.incrementar(versiones.DATOS)
+        self.assertEqual(self.client.get(reverse('api_stats'), secure=True).json()['camiones']['total'], 3)
+
+    def test_guardar_por_senal_incrementa_version(self):
+        antes = versiones.actuales()[versiones.DATOS]['version']
+        with self.captureOnCommitCallbacks(execute=True):
+            Camion.objects.create(placa='SENAL1', capacidad_kg=1000)
+        self.assertEqual(versiones.actuales()[versiones.DATOS]['version'], antes + 1)
+
+
+class ApiCondicionalTests(DashboardTestCase):
+    """ETag/Last-Modified de la API y filtros de las asignaciones"""
+
+    def test_304_sin_consultas_mientras_no_cambie_la_version(self):
+        self.crear_flota(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            versiones.incrementar()
+        url = reverse('api_stats')
+        respuesta = self.client.get(url, secure=True)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('Last-Modified', respuesta)
+        etag = respuesta['ETag']
+
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(len(consultas), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            versiones.incrementar(versiones.PLAN)
+        respuesta = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+    def test_filtros_de_asignaciones(self):
+        self.crear_flota(3)
+        url = reverse('api_asignaciones')
+        datos = self.client.get(url, secure=True).json()
+        self.assertEqual(datos['total'], 9)
+        self.assertEqual([a['turno'] for a in datos['asignaciones'][:3]], ['MAÑANA'] * 3)
+
+        filtradas = self.client.get(url, {'turno': 'tarde', 'camion': 'T00001'}, secure=True).json()
+        self.assertEqual(filtradas['total'], 1)
+        self.assertEqual(filtradas['asignaciones'][0]['ruta'], 5)  # ruta 1 * 3 + 1, sector 1
+        self.assertEqual(self.client.get(url, {'sector': 1}, secure=True).json()['total'], 3)
+
+        self.assertEqual(self.client.get(url, {'turno': 'MADRUGADA'}, secure=True).status_code, 400)
+        self.assertEqual(self.client.get(url, {'sector': 'x'}, secure=True).status_code, 400)
+
+
+class ExportacionTests(TestCase):
+    """Exportación del plan por páginas en CSV y NDJSON"""
+
+    def crear_plan(self, num_camiones):
+        """Un plan activo con una ruta por camión y turno"""
+        turnos = AsignacionOptima.TURNOS
+        guardar_instancia(
+            rutas_de_prueba([100] * num_camiones * len(turnos)), camiones_de_prueba([500] * num_camiones),
+        )
+        guardar_plan_de_prueba([
+            (i * len(turnos) + t + 1, f'C{i:03d}', turno)
+            for i in range(num_camiones) for t, turno in enumerate(turnos)
+        ])
+
+    def test_csv_y_ndjson_del_plan_activo(self):
+        self.crear_plan(4)
+        respuesta = self.client.get(
+            reverse('exportar_asignaciones', args=['csv']), secure=True
+        )
+        self.assertTrue(respuesta.streaming)
+        lineas = b''.join(respuesta.streaming_content).decode().splitlines()
+        self.assertEqual(lineas[0], ','.join(exportacion.CAMPOS))
+        self.assertEqual(len(lineas), 13)
+
+        respuesta = self.client.get(
+            reverse('exportar_asignaciones', args=['ndjson']), secure=True
+        )
+        filas = [json.loads(l) for l in b''.join(respuesta.streaming_content).splitlines()]
+        self.assertEqual(len(filas), 12)
+        self.assertEqual(set(filas[0]), set(exportacion.CAMPOS))
+
+        self.assertEqual(
+            self.client.get(reverse('exportar_asignaciones', args=['xml']), secure=True).status_code, 404
+        )
+
+    def test_paginas_cubren_el_plan_sin_repetir(self):
+        self.crear_plan(5)
+        plan = exportacion.buscar_plan()
+        filas = list(exportacion.filas(plan, tamano_pagina=4))
+        self.assertEqual(len(filas), 15)
+        self.assertEqual(len({(f[2], f[1]) for f in filas}), 15)
+
+    def test_comando_exporta_a_archivo(self):
+        self.crear_plan(2)
+        with tempfile.TemporaryDirectory() as directorio:
+            destino = os.path.join(directorio, 'plan.ndjson')
+            call_command('exportar_plan', formato='ndjson', salida=destino, stdout=io.StringIO())
+            with open(destino, encoding='utf-8') as archivo:
+                self.assertEqual(len(archivo.readlines()), 6)
+        with self.assertRaises(CommandError):
+            call_command('exportar_plan', plan=999999, stdout=io.StringIO())
+
+
+class AdminCamionesTests(TestCase):
+    """Listados del admin sin consultas por fila y acciones sobre la flota"""
+
+    def setUp(self):
+        self.client.force_login(
+            User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        )
+
+    def crear_plan(self, num_camiones):
+        """Camiones C000, C001, ... con una ruta cada uno en un plan activo"""
+        guardar_instancia(rutas_de_prueba([100] * num_camiones), camiones_de_prueba([500] * num_camiones))
+        guardar_plan_de_prueba([(j + 1, f'C{j:03d}', 'MAÑANA') for j in range(num_camiones)])
+
+    def consultas_admin(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url, secure=True)
+        self.assertEqual(respuesta.status_code, 200)
+        return len(consultas)
+
+    def test_listados_con_consultas_constantes(self):
+        urls = [
+            reverse('admin:solver_app_camion_changelist') + '?o=-4',  # Por veces usado
+            reverse('admin:solver_app_asignacionoptima_changelist') + '?o=-7',  # Por utilización
+        ]
+        self.crear_plan(3)
+        pocas = [self.consultas_admin(url) for url in urls]
+        PlanAsignacion.objects.all().delete()
+        Ruta.objects.all().delete()
+        Camion.objects.all().delete()
+        self.crear_plan(30)
+        muchas = [self.consultas_admin(url) for url in urls]
+        self.assertEqual(pocas, muchas)
+
+    def test_filtro_por_camion_del_plan_activo(self):
+        self.crear_plan(2)
+        Camion.objects.create(placa='FUERA1', capacidad_kg=500)
+        url = reverse('admin:solver_app_asignacionoptima_changelist')
+
+        respuesta = self.client.get(url, secure=True)
+        self.assertContains(respuesta, 'camion_asignado__placa__exact=C001')
+        self.assertNotContains(respuesta, 'FUERA1')
+
+        respuesta = self.client.get(url, {'camion_asignado__placa__exact': 'C001'}, secure=True)
+        self.assertEqual(respuesta.context['cl'].result_count, 1)
+
+    def test_marcar_no_disponibles_encola_reoptimizacion(self):
+        self.crear_plan(3)
+        # Sin ejecutar los callbacks: el trabajo se encola pero no se resuelve
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(
+                reverse('admin:solver_app_camion_changelist'),
+                {'action': 'marcar_no_disponibles', '_selected_action': ['C000', 'C001']},
+                secure=True,
+            )
+        self.assertEqual(Camion.objects.filter(disponible=False).count(), 2)
+        self.assertGreater(len(callbacks), 0)
+        self.assertEqual(VersionDatos.objects.get(nombre=versiones.DATOS).version, 1)
+        job = SolverJob.objects.get()
+        self.assertTrue(job.parametros['incremental'])
+        self.assertEqual(job.parametros['liberar_camiones'], ['C000', 'C001'])
+
+
+class ImportacionesWebTests(SimpleTestCase):
+    """Los procesos web no cargan OR-Tools ni pandas al importar las vistas"""
+
+    def test_vistas_sin_solver_ni_pandas(self):
+        codigo = (
+            "import sys, django; django.setup(); "
+            "import solver_app.views, solver_app.admin, optimiza_limpieza.urls; "
+            "print(' '.join(m for m in ('pandas', 'numpy', 'pyarrow', 'ortools') if m in sys.modules))"
+        )
+        entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'optimiza_limpieza.settings'}
+        salida = subprocess.run(
+            [sys.executable, '-c', codigo], cwd=DATOS.parent, env=entorno,
+            capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(salida.stdout.strip(), '')
+
+
+@override_settings(SOLVER_EJECUTOR='worker')
+class WorkerDedicadoTests(TransactionTestCase):
+    """
+    Con el worker dedicado los procesos web solo encolan los trabajos.
+
+    TransactionTestCase: el MonitorJob escribe desde su propio hilo y
+    conexión, que con la transacción abierta de TestCase encontraría la
+    tabla bloqueada.
+    """
+
+    def setUp(self):
+        guardar_instancia(rutas_de_prueba([400, 300, 200]), camiones_de_prueba([500, 500]))
+
+    def test_el_worker_toma_y_ejecuta_los_pendientes(self):
+        with mock.patch.object(jobs, 'obtener_pool') as pool:
+            job = jobs.encolar_optimizacion(limite_tiempo_s=10)
+        pool.assert_not_called()  # Nada se envía al pool local
+
+        # Un error del monitor solo se registra como advertencia
+        with self.assertNoLogs('solver_app.jobs', 'WARNING'):
+            self.assertEqual(jobs.atender_cola(una_vez=True), 1)
+        self.assertFalse([h for h in threading.enumerate() if h.name.startswith('solver-monitor-')])
+
+        job.refresh_from_db()
+        self.assertEqual(job.estado, SolverJob.Estado.COMPLETADO)
+        self.assertEqual(len(job.resultado['asignaciones']), 3)
+        # El monitor sincronizó el incumbente del solver
+        self.assertGreaterEqual(len(job.incumbentes), 1)
+        self.assertAlmostEqual(job.incumbentes[-1]['objetivo'], job.resultado['distancia_total'], places=2)
+        self.assertIsNone(jobs.reclamar_siguiente())
+
+
+@override_settings(METRICAS_TOKEN='secreto')
+class MetricasTests(TestCase):
+    """Endpoint /metrics en formato de texto de Prometheus"""
+
+    def metricas(self, **cabeceras):
+        return self.client.get(reverse('metricas'), secure=True, **cabeceras)
+
+    def test_expone_peticiones_consultas_y_solver(self):
+        self.client.get(reverse('api_stats'), secure=True)
+        SolverRun.objects.create(motor='flujo', estado='Optimal', tiempo_total=0.3, tiempo_resolucion=0.2)
+        SolverJob.objects.create()  # Pendiente en la cola
+
+        respuesta = self.metricas(HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta['Content-Type'].startswith('text/plain; version=0.0.4'))
+        texto = respuesta.content.decode()
+        self.assertIn('# TYPE http_peticion_segundos histogram', texto)
+        self.assertRegex(texto, r'http_peticiones_total\{vista="api_stats",metodo="GET",estado="200",pid="\d+"\} \d+')
+        self.assertRegex(texto, r'http_peticion_consultas_db_bucket\{vista="api_stats",pid="\d+",le="\+Inf"\} \d+')
+        self.assertIn('solver_ejecuciones_total{motor="flujo",estado="Optimal"} 1', texto)
+        self.assertIn('solver_ejecucion_segundos_count{motor="flujo"} 1', texto)
+        self.assertIn('solver_trabajos{estado="PENDIENTE"} 1', texto)
+
+    def test_histograma_acumulado(self):
+        histograma = metricas.Histograma('prueba', 'Prueba', ('vista',), buckets=(1, 5))
+        for valor in (0.5, 1, 3, 7):
+            histograma.observar(valor, 'index')
+        self.assertEqual(list(histograma.lineas()), [
+            'prueba_bucket{vista="index",le="1"} 2',
+            'prueba_bucket{vista="index",le="5"} 3',
+            'prueba_bucket{vista="index",le="+Inf"} 4',
+            'prueba_sum{vista="index"} 11.5',
+            'prueba_count{vista="index"} 4',
+        ])
+
+    def test_token(self):
+        self.assertEqual(self.metricas().status_code, 401)
+        self.assertEqual(self.metricas(HTTP_AUTHORIZATION='Bearer otro').status_code, 401)
+        self.assertEqual(self.metricas(HTTP_AUTHORIZATION='Bearer secreto').status_code, 200)
+
+    @override_settings(METRICAS_TOKEN='', DEBUG=False)
+    def test_sin_token_no_se_expone_en_produccion(self):
+        self.assertEqual(self.metricas().status_code, 404)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.metricas().status_code, 200)
+
+
+class CoalescenciaTests(TestCase):
+    """Solicitudes concurrentes de la misma instancia comparten una resolución"""
+
+    HUELLA = 'a' * 64
+
+    def huella(self, **opciones):
+        return cache_soluciones.calcular_huella(normalizar_parametros(opciones), VERSION_MOTOR)
+
+    def vencer(self, huella):
+        ResolucionEnCurso.objects.filter(huella=huella).update(expira_en=timezone.now() - timedelta(seconds=1))
+
+    def test_un_solo_dueno_por_huella(self):
+        dueno = coalescencia.tomar(self.HUELLA, limite_tiempo_s=60)
+        self.assertIsNotNone(dueno)
+        self.assertIsNone(coalescencia.tomar(self.HUELLA, limite_tiempo_s=60))
+        self.assertIsNotNone(coalescencia.tomar('b' * 64, limite_tiempo_s=60))
+        self.assertTrue(coalescencia.liberar(self.HUELLA, dueno))
+        self.assertIsNotNone(coalescencia.tomar(self.HUELLA, limite_tiempo_s=60))
+
+    def test_fila_vencida_no_bloquea(self):
+        ResolucionEnCurso.objects.create(
+            huella=self.HUELLA, expira_en=timezone.now() - timedelta(seconds=1)
+        )
+        with self.assertLogs('solver_app.coalescencia', 'WARNING'):
+            self.assertIsNotNone(coalescencia.tomar(self.HUELLA, limite_tiempo_s=60))
+
+    def test_dueno_vencido_no_libera_la_fila_del_nuevo(self):
+        lento = coalescencia.tomar(self.HUELLA, limite_tiempo_s=60)
+        self.vencer(self.HUELLA)
+        with self.assertLogs('solver_app.coalescencia', 'WARNING'):
+            nuevo = coalescencia.tomar(self.HUELLA, limite_tiempo_s=60)
+        self.assertNotEqual(nuevo, lento)
+
+        # El dueño anterior termina tarde: la fila del nuevo dueño sigue
+        with self.assertLogs('solver_app.coalescencia', 'WARNING'):
+            self.assertFalse(coalescencia.liberar(self.HUELLA, lento))
+        self.assertEqual(ResolucionEnCurso.objects.get(huella=self.HUELLA).propietario, nuevo)
+        self.assertIsNone(coalescencia.tomar(self.HUELLA, limite_tiempo_s=60))
+
+        self.assertTrue(coalescencia.liberar(self.HUELLA, nuevo))
+        self.assertFalse(ResolucionEnCurso.objects.exists())
+
+    def test_espera_y_comparte_la_solucion_del_dueno(self):
+        guardar_instancia(rutas_de_prueba([400, 300, 200]), camiones_de_prueba([500, 500]))
+        primera = ejecutar_optimizacion(motor='heuristica')
+        self.assertTrue(primera['exito'])
+        planes = PlanAsignacion.objects.count()
+
+        # Otro proceso resuelve la misma instancia y termina en 0.2 s
+        ResolucionEnCurso.objects.create(
+            huella=self.huella(motor='heuristica'),
+            expira_en=timezone.now() + timedelta(seconds=0.2),
+        )
+        resultado = ejecutar_optimizacion(motor='heuristica', forzar=True)
+        self.assertTrue(resultado['exito'])
+        self.assertTrue(resultado['resultados']['coalescida'])
+        self.assertEqual(resultado['resultados']['distancia_total'], primera['resultados']['distancia_total'])
+        self.assertEqual(PlanAsignacion.objects.count(), planes)  # El dueño ya guardó el plan
+
+    def test_libera_la_huella_al_terminar(self):
+        guardar_instancia(rutas_de_prueba([400, 300, 200]), camiones_de_prueba([500, 500]))
+        resultado = ejecutar_optimizacion(motor='heuristica')
+        self.assertTrue(resultado['exito'])
+        self.assertFalse(resultado['resultados'].get('coalescida', False))
+        self.assertFalse(ResolucionEnCurso.objects.exists())
@@ -0,0 +1,164 @@
+"""
+Versiones de los datos y caché de las vistas del dashboard.
+
+Cada conjunto de datos tiene un contador en VersionDatos:
+
+    - DATOS: rutas y camiones (load_data, admin)
+    - PLAN: plan de asignaciones activo (fin de una resolución,
+      limpiar_asignaciones, admin)
+
+El contador se incrementa en cada cambio (explícitamente tras las escrituras
+masivas y por señales en el resto, ver solver_app.signals). Las estadísticas
+y fragmentos del dashboard se guardan en la caché 'dashboard' de Django con
+las versiones de las que dependen como parte de la clave: un cambio no borra
+nada, solo hace que las claves nuevas no existan todavía. Las entradas viejas
+expiran por DASHBOARD_CACHE_TIMEOUT.
+
+Las versiones mismas se guardan en la caché durante DASHBOARD_VERSION_TTL
+segundos, así que una página servida desde la caché no consulta la base de
+datos. Con el backend locmem y varios procesos, otro proceso puede tardar
+hasta ese TTL en ver un cambio; con el backend de archivos
+(DASHBOARD_CACHE_DIR) la invalidación es inmediata en todos.
+
+condicional() aplica las mismas versiones a las respuestas HTTP: ETag y
+Last-Modified salen de los contadores, así que un cliente que repite la
+petición con If-None-Match recibe 304 sin que se consulte la base de datos.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from solver_app import metricas
+from solver_app.models import VersionDatos
+
+logger = logging.getLogger(__name__)
+
+DATOS = 'datos'
+PLAN = 'plan'
+NOMBRES = (DATOS, PLAN)
+
+ALIAS_CACHE = 'dashboard'
+CLAVE_VERSIONES = 'versiones'
+
+_FALTA = object()
+
+
+def _cache():
+    return caches[ALIAS_CACHE]
+
+
+def actuales():
+    """
+    Versión vigente de cada conjunto de datos.
+
+    Returns:
+        dict: nombre -> {'version': int, 'actualizado_en': datetime | None}
+    """
+    versiones = _cache().get(CLAVE_VERSIONES)
+    if versiones is None:
+        versiones = {nombre: {'version': 0, 'actualizado_en': None} for nombre in NOMBRES}
+        for fila in VersionDatos.objects.filter(nombre__in=NOMBRES):
+            versiones[fila.nombre] = {'version': fila.version, 'actualizado_en': fila.actualizado_en}
+        _cache().set(CLAVE_VERSIONES, versiones, getattr(settings, 'DASHBOARD_VERSION_TTL', 5))
+    return versiones
+
+
+def incrementar(*nombres):
+    """
+    Incrementa los contadores de `nombres` (por defecto todos).
+
+    El contador se actualiza dentro de la transacción en curso; la copia en
+    caché se descarta al confirmarla, para que nadie vuelva a cachear la
+    versión anterior mientras los datos nuevos aún no son visibles.
+    """
+    nombres = nombres or NOMBRES
+    ahora = timezone.now()
+    for nombre in nombres:
+        actualizadas = VersionDatos.objects.filter(nombre=nombre).update(
+            version=F('version') + 1, actualizado_en=ahora
+        )
+        if not actualizadas:
+            VersionDatos.objects.get_or_create(nombre=nombre, defaults={'version': 1})
+    transaction.on_commit(lambda: _cache().delete(CLAVE_VERSIONES))
+    logger.debug(f"Versiones incrementadas: {', '.join(nombres)}")
+
+
+def bloquear(nombre):
+    """
+    Bloquea la fila del contador `nombre` hasta el fin de la transacción en
+    curso (SELECT ... FOR UPDATE; en SQLite las escrituras ya se serializan).
+    Sirve para serializar las escrituras que de todos modos incrementan ese
+    contador, como la activación de un plan.
+    """
+    VersionDatos.objects.get_or_create(nombre=nombre)
+    VersionDatos.objects.select_for_update().filter(nombre=nombre).exists()
+
+
+def cacheado(nombre, calcular, dependencias=NOMBRES):
+    """
+    Valor de `calcular()` cacheado mientras no cambien sus dependencias.
+
+    Args:
+        nombre: identificador del valor
+        calcular: callable sin argumentos que lo produce
+        dependencias: conjuntos de datos de los que depende (DATOS, PLAN)
+    """
+    versiones = actuales()
+    clave = ':'.join([nombre] + [f"{d}{versiones[d]['version']}" for d in dependencias])
+    valor = _cache().get(clave, _FALTA)
+    if valor is _FALTA:
+        metricas.CACHE_DASHBOARD.incrementar('fallo')
+        valor = calcular()
+        _cache().set(clave, valor, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 3600))
+    else:
+        metricas.CACHE_DASHBOARD.incrementar('acierto')
+    return valor
+
+
+def contexto():
+    """
+    Variables para las plantillas: versiones (para las claves de
+    {% cache %}) y su tiempo de expiración.
+    """
+    return {
+        'versiones': {nombre: v['version'] for nombre, v in actuales().items()},
+        'cache_timeout': getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 3600),
+    }
+
+
+def etag(dependencias=NOMBRES):
+    """ETag de una respuesta que depende de `dependencias`, p. ej. "datos3-plan7" """
+    versiones = actuales()
+    return '"' + '-'.join(f"{d}{versiones[d]['version']}" for d in dependencias) + '"'
+
+
+def ultima_modificacion(dependencias=NOMBRES):
+    """Fecha del último cambio de `dependencias`, o None si nunca cambiaron"""
+    versiones = actuales()
+    fechas = [versiones[d]['actualizado_en'] for d in dependencias if versiones[d]['actualizado_en']]
+    return max(fechas) if fechas else None
+
+
+def condicional(*dependencias):
+    """
+    Decorador de vistas GET: agrega ETag y Last-Modified según las versiones
+    de `dependencias` (por defecto todas) y responde 304 Not Modified si el
+    cliente ya tiene esa versión. Cache-Control: no-cache obliga a los
+    navegadores a revalidar en cada uso en lugar de reutilizar una copia
+    posiblemente vieja.
+    """
+    dependencias = dependencias or NOMBRES
+
+    def decorador(vista):
+        return cache_control(no_cache=True)(condition(
+            etag_func=lambda request, *args, **kwargs: etag(dependencias),
+            last_modified_func=lambda request, *args, **kwargs: ultima_modificacion(dependencias),
+        )(vista))
+    return decorador
@@ -2,69 +2,67 @@
 Vistas para la aplicación de optimización de rutas de limpieza
 """
 
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
-from django.db.models import Count, Sum, Avg
-from solver_app.models import Ruta, Camion, AsignacionOptima
-from solver_app.solver_logic import ejecutar_optimizacion
+from solver_app.models import Ruta, Camion, AsignacionOptima, SolverJob, SolverRun
+from solver_app.jobs import (
+    encolar_optimizacion, esperar_job, revisar_latido, solicitar_detencion, trabajo_activo,
+    usa_worker_dedicado,
+)
+from solver_app.motores import BACKENDS, MOTORES
+from solver_app import consultas, exportacion, historico, instrumentacion, metricas, planes, versiones
+import hmac
+import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Espera máxima de una petición de eventos sin novedades: cada respuesta
+# termina en pocos segundos (no retiene un worker síncrono de gunicorn) y el
+# navegador reconecta solo con Last-Event-ID
+ESPERA_EVENTOS_S = 5
+INTERVALO_EVENTOS_S = 0.5
+
+# Espera máxima del plan rápido cuando lo resuelve el worker dedicado
+ESPERA_PLAN_RAPIDO_S = 30
+
 
 def index(request):
     """
     Vista principal - Dashboard con resumen del sistema
     """
-    # Obtener estadísticas generales
-    total_rutas = Ruta.objects.count()
-    total_camiones = Camion.objects.count()
-    total_asignaciones = AsignacionOptima.objects.count()
-    
-    # Estadísticas de rutas
-    stats_rutas = Ruta.objects.aggregate(
-        distancia_total=Sum('distancia_km'),
-        residuos_totales=Sum('residuos_kg'),
-        distancia_promedio=Avg('distancia_km'),
-        residuos_promedio=Avg('residuos_kg')
-    )
-    
-    # Estadísticas de camiones
-    stats_camiones = Camion.objects.aggregate(
-        capacidad_total=Sum('capacidad_kg'),
-        capacidad_promedio=Avg('capacidad_kg')
-    )
+    # Estadísticas generales (una consulta por tabla, ver solver_app.consultas;
+    # cacheadas hasta que cambien los datos)
+    stats_rutas = consultas.cacheada('resumen_rutas')
+    stats_camiones = consultas.cacheada('resumen_camiones')
+    resumen = consultas.cacheada('resumen_asignaciones')
+    total_rutas = stats_rutas['total']
+    total_camiones = stats_camiones['total']
+    total_asignaciones = resumen['total']
     
     # Estadísticas de asignaciones si existen
     hay_asignaciones = total_asignaciones > 0
     stats_asignaciones = None
     
     if hay_asignaciones:
-        stats_asignaciones = AsignacionOptima.objects.aggregate(
-            distancia_total=Sum('costo_distancia_km'),
-            carga_total=Sum('carga_kg')
-        )
-        
-        # Contar asignaciones por turno
-        asignaciones_por_turno = {}
-        for turno in ['MAÑANA', 'TARDE', 'NOCHE']:
-            asignaciones_por_turno[turno] = AsignacionOptima.objects.filter(
-                turno=turno
-            ).count()
-        
-        # Camiones utilizados
-        camiones_utilizados = AsignacionOptima.objects.values(
-            'camion_asignado'
-        ).distinct().count()
-        
-        stats_asignaciones['asignaciones_por_turno'] = asignaciones_por_turno
-        stats_asignaciones['camiones_utilizados'] = camiones_utilizados
-        stats_asignaciones['eficiencia'] = round(
-            (camiones_utilizados / total_camiones * 100) if total_camiones > 0 else 0,
-            2
-        )
+        camiones_utilizados = resumen['camiones_utilizados']
+        stats_asignaciones = {
+            'distancia_total': resumen['distancia_total'],
+            'carga_total': resumen['carga_total'],
+            'asignaciones_por_turno': {
+                turno: datos['count'] for turno, datos in resumen['por_turno'].items()
+            },
+            'camiones_utilizados': camiones_utilizados,
+            'eficiencia': round(
+                (camiones_utilizados / total_camiones * 100) if total_camiones > 0 else 0,
+                2
+            ),
+        }
     
     contexto = {
         'total_rutas': total_rutas,
@@ -74,107 +72,314 @@ def index(request):
         'stats_camiones': stats_camiones,
         'hay_asignaciones': hay_asignaciones,
         'stats_asignaciones': stats_asignaciones,
+        'job_activo': trabajo_activo(),
+        'motores': MOTORES,
+        'backends': BACKENDS,
     }
     
     return render(request, 'solver_app/index.html', contexto)
 
 
+def _espera_json(request):
+    """Indica si la petición viene del dashboard vía fetch/Ajax"""
+    return (
+        request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        or 'application/json' in request.headers.get('accept', '')
+    )
+
+
+def _leer_positivo(request, campo, escala=1):
+    """
+    Lee un número positivo opcional del POST.
+    
+    Returns:
+        float | None: el valor multiplicado por `escala`, o None si está vacío
+    
+    Raises:
+        ValueError: si no es un número positivo
+    """
+    valor = request.POST.get(campo, '').strip().replace(',', '.')
+    if not valor:
+        return None
+    numero = float(valor)
+    if numero <= 0:
+        raise ValueError(campo)
+    return numero * escala
+
+
 def ejecutar_solver(request):
     """
-    Vista para ejecutar el solver de optimización
+    Vista para ejecutar el solver de optimización.
+    
+    No resuelve dentro de la petición: encola un SolverJob y responde de
+    inmediato con su id (202 en JSON, o redirección al dashboard).
     """
     if request.method == 'POST':
         logger.info("Iniciando proceso de optimización desde la vista...")
         
         # Verificar que hay datos cargados
-        if Ruta.objects.count() == 0 or Camion.objects.count() == 0:
-            messages.error(
-                request,
+        if not Ruta.objects.exists() or not Camion.objects.filter(disponible=True).exists():
+            mensaje = (
                 'No hay suficientes datos para optimizar. '
                 'Asegúrate de cargar rutas y camiones primero.'
             )
+            if _espera_json(request):
+                return JsonResponse({'error': mensaje}, status=400)
+            messages.error(request, mensaje)
             return redirect('index')
         
-        # Ejecutar optimización
-        resultado = ejecutar_optimizacion()
+        # Motor y backend del MIP (vacíos = SOLVER_MOTOR / SOLVER_BACKEND)
+        motor = request.POST.get('motor') or None
+        backend = request.POST.get('backend') or None
+        mensaje = None
+        if motor is not None and motor not in MOTORES:
+            mensaje = f"Motor desconocido: {motor}"
+        elif backend is not None and backend not in BACKENDS:
+            mensaje = f"Backend desconocido: {backend}"
         
-        if resultado['exito']:
-            messages.success(
-                request,
-                f"¡Optimización completada! "
-                f"Distancia total: {resultado['resultados']['distancia_total']:.2f} km"
-            )
-        else:
-            messages.error(
-                request,
-                f"Error en la optimización: {resultado['mensaje']}"
-            )
+        # Resolución anytime: límite de tiempo (s), gap (%) y objetivo aceptable (km)
+        try:
+            limite_tiempo_s = _leer_positivo(request, 'limite_tiempo')
+            gap_relativo = _leer_positivo(request, 'gap', escala=0.01)
+            objetivo_aceptable = _leer_positivo(request, 'objetivo_aceptable')
+        except ValueError:
+            mensaje = 'Límite de tiempo, gap y objetivo aceptable deben ser números positivos'
+        if mensaje:
+            if _espera_json(request):
+                return JsonResponse({'error': mensaje}, status=400)
+            messages.error(request, mensaje)
+            return redirect('index')
+        
+        # Encolar optimización (forzar=1 ignora la caché de soluciones;
+        # incremental=1 re-optimiza solo lo afectado del plan actual)
+        job = encolar_optimizacion(
+            forzar=request.POST.get('forzar') == '1',
+            incremental=request.POST.get('incremental') == '1',
+            motor=motor,
+            backend=backend,
+            limite_tiempo_s=limite_tiempo_s,
+            gap_relativo=gap_relativo,
+            objetivo_aceptable=objetivo_aceptable,
+        )
+        
+        if _espera_json(request):
+            return JsonResponse({
+                'job_id': job.pk,
+                'estado': job.estado,
+                'url_estado': reverse('api_job_estado', args=[job.pk]),
+                'url_eventos': reverse('api_job_eventos', args=[job.pk]),
+                'url_detener': reverse('api_job_detener', args=[job.pk]),
+            }, status=202)
         
-        return redirect('resultados_optimizacion')
+        messages.info(
+            request,
+            f"Optimización encolada (trabajo #{job.pk}). "
+            f"El progreso se muestra en el dashboard."
+        )
     
     return redirect('index')
 
 
+@require_http_methods(["POST"])
+def plan_rapido(request):
+    """
+    Genera un plan con el motor heurístico dentro de la misma petición.
+    
+    La heurística responde en milisegundos, así que no pasa por la cola de
+    trabajos; no se ejecuta si hay una optimización en curso para no pisar
+    su plan.
+    """
+    mensaje = None
+    if not Ruta.objects.exists() or not Camion.objects.filter(disponible=True).exists():
+        mensaje = 'No hay suficientes datos para generar un plan.'
+    elif trabajo_activo() is not None:
+        mensaje = 'Hay una optimización en curso; espera a que termine.'
+    if mensaje:
+        if _espera_json(request):
+            return JsonResponse({'error': mensaje}, status=409)
+        messages.error(request, mensaje)
+        return redirect('index')
+    
+    resultado = _resolver_plan_rapido()
+    if 'job_pendiente' in resultado:
+        job_id = resultado['job_pendiente']
+        if _espera_json(request):
+            return JsonResponse({
+                'job_id': job_id,
+                'estado': SolverJob.Estado.PENDIENTE,
+                'url_estado': reverse('api_job_estado', args=[job_id]),
+            }, status=202)
+        messages.info(request, f"El plan rápido sigue en proceso (trabajo #{job_id}).")
+        return redirect('index')
+    if _espera_json(request):
+        if not resultado['exito']:
+            return JsonResponse({'error': resultado['mensaje']}, status=400)
+        resultados = resultado['resultados']
+        return JsonResponse({
+            'estado': resultados['estado'],
+            'distancia_total': resultados['distancia_total'],
+            'asignaciones': len(resultados['asignaciones']),
+            'tiempos': resultados.get('tiempos', {}),  # No hay tiempos si vino de la caché
+            'url_resultados': reverse('resultados_optimizacion'),
+        })
+    
+    if not resultado['exito']:
+        messages.error(request, resultado['mensaje'])
+        return redirect('index')
+    resultados = resultado['resultados']
+    messages.success(
+        request,
+        f"Plan rápido generado: {len(resultados['asignaciones'])} asignaciones, "
+        f"{resultados['distancia_total']:.2f} km"
+    )
+    return redirect('resultados_optimizacion')
+
+
+def _resolver_plan_rapido():
+    """
+    Ejecuta la heurística y devuelve el resultado de ejecutar_optimizacion.
+    
+    Con el worker dedicado la heurística se resuelve allí (los procesos web
+    no cargan el solver) y se espera hasta ESPERA_PLAN_RAPIDO_S; si no
+    terminó a tiempo el resultado solo trae 'job_pendiente' (id del trabajo).
+    """
+    if not usa_worker_dedicado():
+        from solver_app.solver_logic import ejecutar_optimizacion
+        return ejecutar_optimizacion(motor='heuristica')
+    
+    job = esperar_job(encolar_optimizacion(motor='heuristica').pk, ESPERA_PLAN_RAPIDO_S)
+    if job.activo:
+        return {'job_pendiente': job.pk}
+    return {
+        'exito': job.estado == SolverJob.Estado.COMPLETADO,
+        'mensaje': job.mensaje,
+        'resultados': job.resultado,
+    }
+
+
+def api_job_estado(request, job_id):
+    """
+    API endpoint con el estado y progreso de un trabajo de optimización
+    """
+    job = revisar_latido(get_object_or_404(SolverJob, pk=job_id))
+    datos = job.como_dict()
+    if job.estado == SolverJob.Estado.COMPLETADO:
+        datos['url_resultados'] = reverse('resultados_optimizacion')
+    return JsonResponse(datos)
+
+
+@require_http_methods(["POST"])
+def api_job_detener(request, job_id):
+    """
+    API endpoint para aceptar la mejor solución encontrada hasta ahora y
+    detener la búsqueda del trabajo
+    """
+    get_object_or_404(SolverJob, pk=job_id)
+    if not solicitar_detencion(job_id):
+        return JsonResponse({'error': 'El trabajo ya no está en ejecución'}, status=409)
+    return JsonResponse({'job_id': job_id, 'detener_solicitado': True}, status=202)
+
+
+def _leer_cursor_eventos(cursor):
+    """
+    Interpreta el id del último evento recibido: 'incumbentes-progreso'
+    (o solo el número de incumbentes, sin progreso).
+
+    Returns:
+        tuple: (incumbentes enviados, progreso enviado o None)
+    """
+    incumbentes, _, progreso = (cursor or '').partition('-')
+    try:
+        return int(incumbentes or 0), int(progreso) if progreso else None
+    except ValueError:
+        return 0, None
+
+
+def api_job_eventos(request, job_id):
+    """
+    Eventos (Server-Sent Events) de un trabajo de optimización, como long-poll.
+    
+    Emite 'incumbente' por cada nueva mejor solución (objetivo, cota, gap y
+    tiempo), 'progreso' cuando cambia el avance y 'fin' con el estado final.
+    Cada respuesta espera a lo sumo ESPERA_EVENTOS_S una novedad y termina;
+    EventSource reconecta solo y envía el id del último evento
+    (Last-Event-ID, o ?desde= para otros clientes), así que no se repiten
+    incumbentes ni progreso ya enviados. El cliente cierra la conexión al
+    recibir 'fin'.
+    """
+    job = revisar_latido(get_object_or_404(SolverJob, pk=job_id))
+    enviados, progreso_enviado = _leer_cursor_eventos(
+        request.headers.get('Last-Event-ID') or request.GET.get('desde')
+    )
+    
+    def hay_novedades(job):
+        return (
+            not job.activo
+            or job.progreso != progreso_enviado
+            or any(i['n'] > enviados for i in job.incumbentes)
+        )
+    
+    limite = time.monotonic() + ESPERA_EVENTOS_S
+    while not hay_novedades(job) and time.monotonic() < limite:
+        time.sleep(INTERVALO_EVENTOS_S)
+        job = SolverJob.objects.get(pk=job_id)
+    
+    def evento(nombre, datos):
+        return f"id: {enviados}-{job.progreso}\nevent: {nombre}\ndata: {json.dumps(datos)}\n\n"
+    
+    eventos = ["retry: 1000\n\n"]
+    for incumbente in job.incumbentes:
+        if incumbente['n'] > enviados:
+            enviados = incumbente['n']
+            eventos.append(evento('incumbente', incumbente))
+    if job.progreso != progreso_enviado:
+        eventos.append(evento('progreso', {'progreso': job.progreso, 'mensaje': job.mensaje}))
+    if not job.activo:
+        datos = job.como_dict()
+        datos.pop('resultado')  # El plan se consulta en url_resultados
+        eventos.append(evento('fin', datos))
+    
+    respuesta = HttpResponse(''.join(eventos), content_type='text/event-stream')
+    respuesta['Cache-Control'] = 'no-cache'
+    return respuesta
+
+
 def resultados_optimizacion(request):
     """
     Vista para mostrar los resultados de la optimización
     """
-    asignaciones = AsignacionOptima.objects.select_related(
-        'ruta_asignada', 'camion_asignado'
-    ).order_by('turno', 'camion_asignado__placa')
+    # Calcular estadísticas (totales y por turno en una consulta)
+    resumen = consultas.cacheada('resumen_asignaciones')
     
-    if not asignaciones.exists():
+    if not resumen['total']:
         messages.warning(
             request,
             'No hay resultados de optimización. Ejecuta el solver primero.'
         )
         return redirect('index')
     
-    # Agrupar asignaciones por turno
-    asignaciones_por_turno = {
-        'MAÑANA': [],
-        'TARDE': [],
-        'NOCHE': []
-    }
+    def asignaciones_por_turno():
+        """Asignaciones agrupadas por turno (solo si el fragmento no está en caché)"""
+        agrupadas = {turno: [] for turno in AsignacionOptima.TURNOS}
+        asignaciones = AsignacionOptima.objects.select_related(
+            'ruta_asignada', 'camion_asignado'
+        ).order_by('turno', 'camion_asignado__placa')
+        for asignacion in asignaciones:
+            agrupadas[asignacion.turno].append(asignacion)
+        return agrupadas
     
-    for asignacion in asignaciones:
-        asignaciones_por_turno[asignacion.turno].append(asignacion)
-    
-    # Calcular estadísticas
     stats = {
-        'total_asignaciones': asignaciones.count(),
-        'distancia_total': asignaciones.aggregate(
-            Sum('costo_distancia_km')
-        )['costo_distancia_km__sum'],
-        'carga_total': asignaciones.aggregate(
-            Sum('carga_kg')
-        )['carga_kg__sum'],
-        'camiones_utilizados': asignaciones.values(
-            'camion_asignado'
-        ).distinct().count(),
+        'total_asignaciones': resumen['total'],
+        'distancia_total': resumen['distancia_total'],
+        'carga_total': resumen['carga_total'],
+        'camiones_utilizados': resumen['camiones_utilizados'],
     }
     
-    # Estadísticas por turno
-    stats_por_turno = {}
-    for turno in ['MAÑANA', 'TARDE', 'NOCHE']:
-        turno_asignaciones = asignaciones.filter(turno=turno)
-        stats_por_turno[turno] = {
-            'count': turno_asignaciones.count(),
-            'distancia': turno_asignaciones.aggregate(
-                Sum('costo_distancia_km')
-            )['costo_distancia_km__sum'] or 0,
-            'carga': turno_asignaciones.aggregate(
-                Sum('carga_kg')
-            )['carga_kg__sum'] or 0,
-            'camiones': turno_asignaciones.values(
-                'camion_asignado'
-            ).distinct().count(),
-        }
-    
     contexto = {
         'asignaciones_por_turno': asignaciones_por_turno,
         'stats': stats,
-        'stats_por_turno': stats_por_turno,
+        'stats_por_turno': resumen['por_turno'],
+        **versiones.contexto(),
     }
     
     return render(request, 'solver_app/resultados.html', contexto)
@@ -184,28 +389,20 @@ def listar_rutas(request):
     """
     Vista para listar todas las rutas disponibles
     """
-    rutas = Ruta.objects.all().order_by('id_sector', 'id_zona_barrido')
-    
     # Estadísticas
-    stats = rutas.aggregate(
-        total=Count('id_zona_barrido'),
-        distancia_total=Sum('distancia_km'),
-        residuos_totales=Sum('residuos_kg'),
-        distancia_promedio=Avg('distancia_km'),
-        residuos_promedio=Avg('residuos_kg')
-    )
+    stats = consultas.cacheada('resumen_rutas')
     
-    # Agrupar por sector
-    sectores = {}
-    for ruta in rutas:
-        if ruta.id_sector not in sectores:
-            sectores[ruta.id_sector] = []
-        sectores[ruta.id_sector].append(ruta)
+    def sectores():
+        """Rutas agrupadas por sector (solo si el fragmento no está en caché)"""
+        agrupadas = {}
+        for ruta in consultas.rutas_con_asignacion():
+            agrupadas.setdefault(ruta.id_sector, []).append(ruta)
+        return agrupadas
     
     contexto = {
-        'rutas': rutas,
         'sectores': sectores,
         'stats': stats,
+        **versiones.contexto(),
     }
     
     return render(request, 'solver_app/rutas.html', contexto)
@@ -215,43 +412,20 @@ def listar_camiones(request):
     """
     Vista para listar todos los camiones disponibles
     """
-    camiones = Camion.objects.all().order_by('-capacidad_kg')
-    
     # Estadísticas
-    stats = camiones.aggregate(
-        total=Count('placa'),
-        capacidad_total=Sum('capacidad_kg'),
-        capacidad_promedio=Avg('capacidad_kg')
-    )
-    
-    # Agregar información de uso si hay asignaciones
-    camiones_con_uso = []
-    for camion in camiones:
-        asignaciones = AsignacionOptima.objects.filter(camion_asignado=camion)
-        uso = {
-            'camion': camion,
-            'veces_usado': asignaciones.count(),
-            'carga_total': asignaciones.aggregate(
-                Sum('carga_kg')
-            )['carga_kg__sum'] or 0,
-            'distancia_total': asignaciones.aggregate(
-                Sum('costo_distancia_km')
-            )['costo_distancia_km__sum'] or 0,
-        }
-        if uso['veces_usado'] > 0:
-            uso['utilizacion_promedio'] = round(
-                (uso['carga_total'] / (float(camion.capacidad_kg) * uso['veces_usado'])) * 100,
-                2
-            )
-        else:
-            uso['utilizacion_promedio'] = 0
-        
-        camiones_con_uso.append(uso)
+    stats = consultas.cacheada('resumen_camiones')
     
+    # Información de uso de cada camión (una sola consulta para toda la flota;
+    # solo se calcula si la tabla no está en caché)
     contexto = {
-        'camiones_con_uso': camiones_con_uso,
+        'camiones_con_uso': consultas.uso_por_camion,
+        # Histórico del dataton, desde sus resúmenes (solo se consultan si
+        # el fragmento no está en caché)
+        'perfil_demanda': historico.perfil_demanda,
+        'uso_flota': historico.uso_flota_reciente,
         'stats': stats,
-        'hay_asignaciones': AsignacionOptima.objects.exists(),
+        'hay_asignaciones': consultas.cacheada('resumen_asignaciones')['total'] > 0,
+        **versiones.contexto(),
     }
     
     return render(request, 'solver_app/camiones.html', contexto)
@@ -262,8 +436,7 @@ def limpiar_asignaciones(request):
     """
     Vista para limpiar todas las asignaciones
     """
-    count = AsignacionOptima.objects.count()
-    AsignacionOptima.objects.all().delete()
+    count = planes.descartar_plan_activo()
     
     messages.success(
         request,
@@ -274,41 +447,141 @@ def limpiar_asignaciones(request):
 
 
 # API endpoints para uso con JavaScript/Ajax
+@require_http_methods(["GET", "HEAD"])
+@versiones.condicional()
 def api_stats(request):
     """
-    API endpoint que devuelve estadísticas en formato JSON
+    API endpoint que devuelve estadísticas en formato JSON.
+    
+    Responde 304 si el ETag o Last-Modified del cliente corresponden a las
+    versiones vigentes de los datos y del plan.
+    """
+    stats = dict(versiones.cacheado('api_stats', _calcular_stats))
+    stats['versiones'] = versiones.contexto()['versiones']
+    return JsonResponse(stats)
+
+
+@require_http_methods(["GET", "HEAD"])
+@versiones.condicional()
+def api_asignaciones(request):
+    """
+    API endpoint con las asignaciones del plan activo.
+    
+    Filtros opcionales: ?turno=, ?camion= (placa) y ?sector=. Igual que
+    api_stats, responde 304 mientras no cambien los datos ni el plan.
     """
+    turno = request.GET.get('turno', '').strip().upper()
+    camion = request.GET.get('camion', '').strip()
+    if turno and turno not in AsignacionOptima.TURNOS:
+        return JsonResponse(
+            {'error': f"Turno inválido; use uno de: {', '.join(AsignacionOptima.TURNOS)}"}, status=400
+        )
+    try:
+        sector = int(request.GET['sector']) if request.GET.get('sector') else None
+    except ValueError:
+        return JsonResponse({'error': 'El parámetro sector debe ser entero'}, status=400)
+    
+    asignaciones = consultas.cacheada('asignaciones_activas')
+    if turno:
+        asignaciones = [a for a in asignaciones if a['turno'] == turno]
+    if camion:
+        asignaciones = [a for a in asignaciones if a['camion'] == camion]
+    if sector is not None:
+        asignaciones = [a for a in asignaciones if a['sector'] == sector]
+    
+    return JsonResponse({
+        'versiones': versiones.contexto()['versiones'],
+        'total': len(asignaciones),
+        'asignaciones': asignaciones,
+    })
+
+
+def _calcular_stats():
+    rutas = consultas.resumen_rutas()
+    camiones = consultas.resumen_camiones()
+    asignaciones = consultas.resumen_asignaciones()
     stats = {
         'rutas': {
-            'total': Ruta.objects.count(),
-            'distancia_total': float(Ruta.objects.aggregate(
-                Sum('distancia_km')
-            )['distancia_km__sum'] or 0),
-            'residuos_totales': float(Ruta.objects.aggregate(
-                Sum('residuos_kg')
-            )['residuos_kg__sum'] or 0),
+            'total': rutas['total'],
+            'distancia_total': float(rutas['distancia_total'] or 0),
+            'residuos_totales': float(rutas['residuos_totales'] or 0),
         },
         'camiones': {
-            'total': Camion.objects.count(),
-            'capacidad_total': float(Camion.objects.aggregate(
-                Sum('capacidad_kg')
-            )['capacidad_kg__sum'] or 0),
+            'total': camiones['total'],
+            'capacidad_total': float(camiones['capacidad_total'] or 0),
         },
         'asignaciones': {
-            'total': AsignacionOptima.objects.count(),
+            'total': asignaciones['total'],
         }
     }
     
     if stats['asignaciones']['total'] > 0:
-        stats['asignaciones']['distancia_total'] = float(
-            AsignacionOptima.objects.aggregate(
-                Sum('costo_distancia_km')
-            )['costo_distancia_km__sum'] or 0
-        )
-        stats['asignaciones']['carga_total'] = float(
-            AsignacionOptima.objects.aggregate(
-                Sum('carga_kg')
-            )['carga_kg__sum'] or 0
-        )
+        stats['asignaciones']['distancia_total'] = float(asignaciones['distancia_total'] or 0)
+        stats['asignaciones']['carga_total'] = float(asignaciones['carga_total'] or 0)
     
-    return JsonResponse(stats)
+    return stats
+
+
+@require_http_methods(["GET"])
+def exportar_asignaciones(request, formato):
+    """
+    Descarga de un plan de asignaciones en CSV o NDJSON.
+    
+    Por defecto exporta el plan activo; ?plan=<id> elige una versión
+    guardada y ?ejecucion=<id> el plan generado por una ejecución del solver
+    (SolverRun). La respuesta se genera por páginas mientras se envía.
+    """
+    if formato not in exportacion.FORMATOS:
+        return JsonResponse({'error': f'Formato no soportado: {formato}'}, status=404)
+    try:
+        plan_id = int(request.GET['plan']) if request.GET.get('plan') else None
+        ejecucion_id = int(request.GET['ejecucion']) if request.GET.get('ejecucion') else None
+    except ValueError:
+        return JsonResponse({'error': 'Parámetros plan y ejecucion deben ser enteros'}, status=400)
+    
+    plan = exportacion.buscar_plan(plan_id, ejecucion_id)
+    if plan is None:
+        return JsonResponse({'error': 'No se encontró el plan (puede haber sido podado)'}, status=404)
+    
+    respuesta = StreamingHttpResponse(
+        exportacion.exportar(plan, formato), content_type=exportacion.FORMATOS[formato]
+    )
+    respuesta['Content-Disposition'] = f'attachment; filename="plan_{plan.pk}.{formato}"'
+    respuesta['X-Accel-Buffering'] = 'no'
+    return respuesta
+
+
+def api_solver_runs(request):
+    """
+    API endpoint con el historial de ejecuciones del solver.
+    
+    Devuelve las últimas ejecuciones (?limite=, de 1 a 1000, por defecto 100) y los
+    promedios diarios por fase de los últimos ?dias= días (de 1 a 3650, por
+    defecto 30).
+    """
+    try:
+        dias = max(1, min(int(request.GET.get('dias', 30)), 3650))
+        limite = max(1, min(int(request.GET.get('limite', 100)), 1000))
+    except ValueError:
+        return JsonResponse({'error': 'Parámetros dias y limite deben ser enteros'}, status=400)
+    
+    return JsonResponse({
+        'ejecuciones': [run.como_dict() for run in SolverRun.objects.all()[:limite]],
+        'tendencias': instrumentacion.tendencias(dias),
+    })
+
+
+@require_http_methods(["GET"])
+def metricas_prometheus(request):
+    """
+    Métricas en el formato de texto de Prometheus (ver solver_app.metricas).
+    
+    Si settings.METRICAS_TOKEN está definido se exige como token Bearer; sin
+    token el endpoint solo responde con DEBUG activo (404 en producción).
+    """
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    if not token and not settings.DEBUG:
+        raise Http404('Métricas deshabilitadas: defina METRICAS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('No autorizado\n', status=401, content_type='text/plain; charset=utf-8')
+    return HttpResponse(metricas.exponer(), content_type=metricas.CONTENT_TYPE)